@@ -0,0 +1,111 @@
+""" Cache backend benchmark.
+
+Writes, reads, compacts and clears N pages (10k by default) with every
+page cache backend in a temporary directory and reports the time of
+each step and the disk space used.
+
+Usage:
+    python -m benchmarks.cache_store [--entries N] [--page-size BYTES]
+                                     [--compression LEVEL]
+"""
+
+import os
+import time
+import random
+import hashlib
+import argparse
+import tempfile
+from pathlib import Path
+
+from weatherapp.core.cache import FileCache, SqliteCache
+
+
+def disk_usage(path):
+    """ Return total size of files under the path.
+    """
+
+    path = Path(path)
+    if path.is_dir():
+        files = path.rglob('*')
+    else:
+        # database with its write-ahead log
+        files = path.parent.glob(path.name + '*')
+    return sum(item.stat().st_size for item in files if item.is_file())
+
+
+def make_page(size):
+    """ Return html-like page of roughly given size.
+    """
+
+    words = [b'weather', b'temp', b'wind', b'<div>', b'</div>', b'12',
+             b'cloudy']
+    return b' '.join(random.choice(words) for _ in range(size // 6))
+
+
+def run(cache, keys, page, path):
+    """ Run benchmark steps against the cache, return (name, seconds)
+        pairs and disk usage.
+    """
+
+    timings = []
+    start = time.perf_counter()
+    for key in keys:
+        cache.set(key, page, {'etag': '"{}"'.format(key)})
+    timings.append(('write', time.perf_counter() - start))
+
+    start = time.perf_counter()
+    for key in keys:
+        cache.get(key)
+    timings.append(('read', time.perf_counter() - start))
+
+    start = time.perf_counter()
+    for key in keys:
+        cache.get_meta(key)
+    timings.append(('meta', time.perf_counter() - start))
+
+    usage = disk_usage(path)
+
+    start = time.perf_counter()
+    cache.compact()
+    timings.append(('compact', time.perf_counter() - start))
+
+    start = time.perf_counter()
+    cache.clear()
+    timings.append(('clear', time.perf_counter() - start))
+    cache.close()
+    return timings, usage
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--entries', type=int, default=10000)
+    parser.add_argument('--page-size', type=int, default=20000)
+    parser.add_argument('--compression', type=int, default=6)
+    args = parser.parse_args()
+
+    keys = [hashlib.md5(str(index).encode()).hexdigest()
+            for index in range(args.entries)]
+    page = make_page(args.page_size)
+
+    with tempfile.TemporaryDirectory() as directory:
+        backends = [
+            ('files', FileCache(os.path.join(directory, 'files')),
+             os.path.join(directory, 'files')),
+            ('sqlite', SqliteCache(os.path.join(directory, 'plain.sqlite'),
+                                   compression=0, max_size=0),
+             os.path.join(directory, 'plain.sqlite')),
+            ('sqlite+zlib', SqliteCache(
+                os.path.join(directory, 'zlib.sqlite'),
+                compression=args.compression, max_size=0),
+             os.path.join(directory, 'zlib.sqlite')),
+        ]
+        print('{} entries, {} bytes per page'.format(args.entries, len(page)))
+        for name, cache, path in backends:
+            timings, usage = run(cache, keys, page, path)
+            print('{:<12} {}  disk {:.1f} MB'.format(name, '  '.join(
+                '{} {:7.1f} ms'.format(step, seconds * 1000)
+                for step, seconds in timings), usage / 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+""" Benchmark of the consensus of providers.
+
+Computes consensus of --locations locations reported by --providers
+providers each, with numpy (if installed) and with plain Python.
+
+Usage:
+    python -m benchmarks.consensus [--locations N] [--providers N]
+"""
+
+import time
+import random
+import argparse
+
+from weatherapp.core import consensus
+from weatherapp.core.consensus import Consensus
+from weatherapp.core.observation import Observation
+
+CONDITIONS = ('Sunny', 'Partly sunny', 'Cloudy', 'Rain', 'Snow')
+
+
+def measure(func, repeat):
+    """ Return best time of func in seconds.
+    """
+
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def make_results(locations, providers):
+    """ Return (provider, location, observation) triples, about one in
+    a hundred values is off by 15 degrees.
+    """
+
+    results = []
+    for location in range(locations):
+        temp = random.uniform(-10, 30)
+        wind = random.uniform(0, 10)
+        for provider in range(providers):
+            results.append((
+                'provider-{}'.format(provider),
+                'location-{}'.format(location),
+                Observation(cond=random.choice(CONDITIONS),
+                            temp=temp + random.gauss(0, 1) +
+                            (15 if random.random() < 0.01 else 0),
+                            feels_like=temp - 2 + random.gauss(0, 1),
+                            wind=max(0, wind + random.gauss(0, 0.5)))))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--locations', type=int, default=3334)
+    parser.add_argument('--providers', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    results = make_results(args.locations, args.providers)
+    print('{} results'.format(len(results)))
+    for title, use_numpy in (('numpy', True), ('python', False)):
+        if use_numpy and consensus.get_numpy() is None:
+            print('{:<8} not installed'.format(title))
+            continue
+        stage = Consensus(use_numpy=use_numpy)
+        elapsed = measure(lambda: stage.compute(results), args.repeat)
+        outliers = stage.compute(results).get_outliers()
+        print('{:<8} {:8.1f} ms  {} locations with outliers'.format(
+            title, elapsed * 1000, len(outliers)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+""" Local stand-in for provider sites used by the load test.
+
+Serves recorded provider pages (or generated provider-like pages) with
+configurable latency, error rate and page size, and answers conditional
+requests with 304 Not Modified like real sites do.
+
+Usage:
+    python -m benchmarks.fakeserver [--port N] [--pages DIR] [--latency S]
+                                    [--error-rate R] [--size KB]
+"""
+
+import time
+import random
+import hashlib
+import argparse
+import threading
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FILLER = ('<div class="news"><a href="/news/{0}">Headline {0}</a>'
+          '<p class="lead">Some text of the news item {0}.</p></div>\n')
+
+WEATHER = ('<div class="forecast"><div class="cond">{cond}</div>'
+           '<span class="temp">{temp}&deg;C</span>'
+           '<span class="feels-like">{feels}&deg;C</span>'
+           '<div class="wind">{wind} m/s NW</div></div>\n')
+
+CONDITIONS = ('Sunny', 'Partly sunny', 'Cloudy', 'Rain', 'Snow')
+
+
+def generate_page(size, seed=0):
+    """ Return provider-like page of about size kilobytes, the weather
+    block is placed at a quarter of the page.
+    """
+
+    items = []
+    total = index = 0
+    while total < size * 1024:
+        item = FILLER.format(index)
+        items.append(item)
+        total += len(item)
+        index += 1
+    items.insert(len(items) // 4, WEATHER.format(
+        cond=CONDITIONS[seed % len(CONDITIONS)], temp=seed % 30 - 5,
+        feels=seed % 30 - 7, wind=seed % 12))
+    return '<html><body>{}</body></html>'.format(''.join(items)).encode()
+
+
+def load_pages(directory):
+    """ Return pages recorded in the directory, e.g. ~/weather_cache.
+    """
+
+    return [path.read_bytes() for path in sorted(Path(directory).iterdir())
+            if path.is_file() and not path.name.endswith('.meta')]
+
+
+class FakePageHandler(BaseHTTPRequestHandler):
+    """ Answers every GET with one of the server pages chosen by path.
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        server.count_request()
+        time.sleep(server.latency + random.uniform(0, server.jitter))
+        if random.random() < server.error_rate:
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        page, etag = server.get_page(self.path)
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(page)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        try:
+            self.wfile.write(page)
+        except (BrokenPipeError, ConnectionResetError):
+            # client stopped reading, see --stream
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeWeatherServer(ThreadingHTTPServer):
+    """ Threaded HTTP server with settings changeable while it runs.
+
+    :param address: (host, port) to listen on
+    :type address: tuple
+    :param pages: pages to serve, generated ones if not given
+    :type pages: list
+    :param latency: delay before every answer, in seconds
+    :type latency: float
+    :param jitter: maximum random delay added to latency, in seconds
+    :type jitter: float
+    :param error_rate: share of requests answered with 503
+    :type error_rate: float
+    :param size: size of generated pages in kilobytes
+    :type size: int
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address=('127.0.0.1', 0), pages=None, latency=0.0,
+                 jitter=0.0, error_rate=0.0, size=200):
+        super().__init__(address, FakePageHandler)
+        self.pages = pages or [generate_page(size, seed)
+                               for seed in range(10)]
+        self.etags = ['"{}"'.format(hashlib.md5(page).hexdigest()[:16])
+                      for page in self.pages]
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        return 'http://{}:{}/'.format(*self.server_address)
+
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def get_page(self, path):
+        """ Return (page, etag) served at the path.
+        """
+
+        index = int(hashlib.md5(path.encode()).hexdigest(), 16) % \
+            len(self.pages)
+        return self.pages[index], self.etags[index]
+
+    def start(self):
+        """ Serve requests in a background thread.
+        """
+
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def handle_error(self, request, client_address):
+        # connections dropped by clients are expected under load
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8735)
+    parser.add_argument('--pages', help='directory of recorded pages')
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--size', type=int, default=200)
+    args = parser.parse_args()
+
+    server = FakeWeatherServer(
+        ('127.0.0.1', args.port),
+        load_pages(args.pages) if args.pages else None, args.latency,
+        args.jitter, args.error_rate, args.size)
+    print('Serving {} pages on {}'.format(len(server.pages), server.url))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
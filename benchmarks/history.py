@@ -0,0 +1,91 @@
+""" Benchmark of observation history queries.
+
+Fills a temporary history store with --rows observations spread over
+--series locations and --days days, then times range queries and
+downsampling over all of them.
+
+Usage:
+    python -m benchmarks.history [--rows N] [--series N] [--days N]
+"""
+
+import time
+import random
+import shutil
+import argparse
+import tempfile
+
+from weatherapp.core.history import HistoryStore
+
+CONDITIONS = ('Sunny', 'Partly sunny', 'Cloudy', 'Rain', 'Snow')
+
+
+def measure(func, repeat):
+    """ Return best time of func in seconds and its last result.
+    """
+
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def fill(history, rows, series, days):
+    """ Store rows observations, evenly spaced in time per series.
+    """
+
+    end = time.time()
+    start = end - days * 86400
+    per_series = rows // series
+    step = (end - start) / per_series
+    for index in range(series):
+        history.extend('benchmark', 'location-{}'.format(index), (
+            (start + row * step,
+             {'cond': random.choice(CONDITIONS),
+              'temp': str(random.randint(-10, 30)),
+              'feels_like': str(random.randint(-15, 30)),
+              'wind': '{} m/s'.format(random.randint(0, 15))})
+            for row in range(per_series)))
+    return start, end
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=2000000)
+    parser.add_argument('--series', type=int, default=20)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        history = HistoryStore(directory)
+        started = time.perf_counter()
+        start, end = fill(history, args.rows, args.series, args.days)
+        print('stored {} rows in {:.1f} s'.format(
+            args.rows, time.perf_counter() - started))
+
+        week = end - 7 * 86400
+        cases = [
+            ('count all', lambda: history.count()),
+            ('count last week', lambda: history.count(week)),
+            ('daily means, all', lambda: len(history.downsample(86400))),
+            ('hourly means, one location, last week',
+             lambda: len(history.downsample(3600, week,
+                                            location='location-0'))),
+            ('rows, one location, last day',
+             lambda: sum(1 for _ in history.query(
+                 end - 86400, location='location-0'))),
+        ]
+        for title, func in cases:
+            elapsed, result = measure(func, args.repeat)
+            print('{:<40} {:10.1f} ms  {:>9} results'.format(
+                title, elapsed * 1000, result))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+""" Cold start benchmark of wfapp commands.
+
+Every command is started in a fresh interpreter several times and the
+median wall-clock time is reported together with the time spent on
+importing modules (from python -X importtime).
+
+Usage:
+    python -m benchmarks.import_time [--runs N] [command ...]
+
+HOME is pointed to a temporary directory, so commands like clear_cache
+do not touch the real cache and configuration.
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+DEFAULT_COMMANDS = ['providers', 'clear_cache', 'csv_write --workers 1']
+STARTUP = ('import sys; from weatherapp.core.app import main; '
+           'main(sys.argv[1:])')
+IMPORT_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def run(argv, env, importtime=False):
+    """ Run command in a fresh interpreter, return (seconds, stderr).
+    """
+
+    command = [sys.executable]
+    if importtime:
+        command += ['-X', 'importtime']
+    command += ['-c', STARTUP] + argv
+    start = time.perf_counter()
+    result = subprocess.run(command, env=env, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, universal_newlines=True)
+    return time.perf_counter() - start, result.stderr
+
+
+def top_imports(stderr, count):
+    """ Return the most expensive imports made after interpreter startup,
+        as (module, cumulative seconds) pairs.
+
+    Only modules imported directly by the command (lazy imports) or by
+    the modules it imports are taken into account.
+    """
+
+    imports = []
+    for line in stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        if match.group(4) == 'site' and len(match.group(3)) == 1:
+            # everything before belongs to interpreter startup
+            imports = []
+        elif len(match.group(3)) <= 3:
+            imports.append((match.group(4).strip(),
+                            int(match.group(2)) / 1e6))
+    return sorted(imports, key=lambda item: -item[1])[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('commands', nargs='*', default=DEFAULT_COMMANDS)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=5,
+                        help='Number of slowest imports to show.')
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with tempfile.TemporaryDirectory() as home:
+        env = dict(os.environ, HOME=home, PYTHONPATH=root)
+        for command in args.commands:
+            argv = command.split()
+            timings = [run(argv, env)[0] for _ in range(args.runs)]
+            _, stderr = run(argv, env, importtime=True)
+            print('{:<30} median {:7.1f} ms  min {:7.1f} ms'.format(
+                command, statistics.median(timings) * 1000,
+                min(timings) * 1000))
+            for module, seconds in top_imports(stderr, args.top):
+                print('    {:<40} {:7.1f} ms'.format(module, seconds * 1000))
+
+
+if __name__ == '__main__':
+    main()
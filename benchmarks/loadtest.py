@@ -0,0 +1,318 @@
+""" Load test of the fetch, cache and render path.
+
+Runs a provider against a local stand-in server (see
+benchmarks.fakeserver) in a set of scenarios and reports throughput,
+p50/p99 latency per location and peak memory of every scenario.
+Scenarios run in fresh processes, so they do not share memory caches:
+
+    cold            empty page cache
+    warm            page cache filled by the cold scenario
+    many_locations  ten times more locations, empty cache
+    processes       several processes share one empty cache
+    failure_storm   every request fails, pages come from stale cache
+    render          formatting of the results only
+
+Results are saved as json with --save and compared with a saved run with
+--compare; the command exits with status 1 if any scenario got slower
+than --threshold allows, so it can guard releases.
+
+Usage:
+    python -m benchmarks.loadtest [--locations N] [--latency S]
+                                  [--scenario NAME ...]
+                                  [--save FILE] [--compare FILE]
+"""
+
+import io
+import os
+import sys
+import json
+import logging
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+from benchmarks.fakeserver import FakeWeatherServer, load_pages
+
+try:
+    import resource
+except ImportError:
+    # no peak memory statistics on Windows
+    resource = None
+
+SCENARIOS = ('cold', 'warm', 'many_locations', 'processes', 'failure_storm',
+             'render')
+
+# latency changes smaller than this are noise, not regressions
+NOISE_MS = 1.0
+
+
+def percentile(values, percent):
+    """ Return nearest-rank percentile of the values.
+    """
+
+    values = sorted(values)
+    if not values:
+        return 0.0
+    index = max(0, min(len(values) - 1,
+                       int(round(percent / 100 * len(values))) - 1))
+    return values[index]
+
+
+def make_provider(app, url, locations):
+    """ Return provider fetching given number of locations from the
+    stand-in server and recording latency of every location.
+    """
+
+    from weatherapp.core.abstract import WeatherProvider, Field
+
+    class LoadProvider(WeatherProvider):
+        title = 'Load test'
+        fields = {
+            'cond': Field('div', {'class': 'cond'}),
+            'temp': Field('span', {'class': 'temp'}),
+            'feels_like': Field('span', {'class': 'feels-like'}),
+            'wind': Field('div', {'class': 'wind'}),
+        }
+        latencies = []
+
+        def get_name(self):
+            return 'load'
+
+        def get_default_location(self):
+            return 'location-0'
+
+        def get_default_url(self):
+            return url + '0'
+
+        def configurate(self):
+            pass
+
+        def get_configuration_file(self):
+            return Path(os.devnull)
+
+        def _get_locations(self):
+            return [('location-{}'.format(index), url + str(index))
+                    for index in range(1, locations)]
+
+        def get_weather_info(self, page):
+            return self.parse_fields(page)
+
+        def get_weather(self, location_url):
+            start = time.perf_counter()
+            try:
+                return super().get_weather(location_url)
+            finally:
+                self.latencies.append(time.perf_counter() - start)
+
+    return LoadProvider(app)
+
+
+def run_scenario(settings):
+    """ Run provider for all locations once in this process and return
+    raw measurements. Executed in a worker process.
+    """
+
+    from weatherapp.core.app import App
+    from weatherapp.core.cache import FileCache, SingleFlight
+
+    # failures are expected in some scenarios, keep the report readable
+    logging.disable(logging.CRITICAL)
+    app = App(stdout=io.StringIO(), stderr=io.StringIO())
+    app.options = app.arg_parser.parse_args(settings['argv'])
+    app.cache = FileCache(settings['cache_dir'])
+    app.singleflight = SingleFlight(Path(settings['cache_dir']) / 'locks')
+    # measure the application, not the politeness towards the sites
+    app.sessionmanager.rate_limit = 0
+    provider = make_provider(app, settings['url'], settings['locations'])
+
+    start = time.perf_counter()
+    results = provider.run_locations([])
+    elapsed = time.perf_counter() - start
+    latencies = provider.latencies
+
+    if settings['render']:
+        latencies = []
+        start = time.perf_counter()
+        for _ in range(settings['render']):
+            render_start = time.perf_counter()
+            app.output_locations(provider.title, results)
+            latencies.append(time.perf_counter() - render_start)
+        elapsed = time.perf_counter() - start
+
+    app.revalidator.shutdown()
+    app.sessionmanager.close()
+    return {'latencies': latencies, 'seconds': elapsed,
+            'failed': sum(1 for name, info in results if not info),
+            'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            if resource else None}
+
+
+def run_processes(settings, processes=1):
+    """ Run scenario in fresh processes at once, return merged result.
+    """
+
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=processes,
+                             mp_context=context) as executor:
+        # start every worker before the measured run
+        list(executor.map(time.sleep, [0.2] * processes))
+        start = time.perf_counter()
+        runs = list(executor.map(run_scenario, [settings] * processes))
+        elapsed = time.perf_counter() - start
+
+    latencies = [value for run in runs for value in run['latencies']]
+    rss = [run['max_rss_kb'] for run in runs if run['max_rss_kb']]
+    seconds = elapsed if processes > 1 else runs[0]['seconds']
+    return {'requests': len(latencies),
+            'failed': sum(run['failed'] for run in runs),
+            'seconds': round(seconds, 4),
+            'throughput': round(len(latencies) / seconds, 1),
+            'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+            'max_rss_kb': max(rss) if rss else None}
+
+
+def run_all(args, server):
+    """ Run selected scenarios in order, return results by scenario.
+    """
+
+    cache_dir = tempfile.mkdtemp(prefix='weatherapp-loadtest-')
+    argv = ['--workers', str(args.workers)] + args.app_args
+    base = {'url': server.url, 'cache_dir': cache_dir, 'argv': argv,
+            'locations': args.locations, 'render': 0}
+    results = {}
+    try:
+        for scenario in SCENARIOS:
+            settings = dict(base)
+            processes = 1
+            server.error_rate = 0.0
+            if scenario in ('cold', 'many_locations', 'processes'):
+                shutil.rmtree(cache_dir, ignore_errors=True)
+            if scenario == 'many_locations':
+                settings['locations'] = args.locations * 10
+                settings['argv'] = ['--workers', str(args.workers * 4)] + \
+                    args.app_args
+            elif scenario == 'processes':
+                processes = args.processes
+            elif scenario == 'failure_storm':
+                server.error_rate = 1.0
+                settings['argv'] = argv + ['--refresh']
+            elif scenario == 'render':
+                settings['render'] = args.render
+            if scenario not in args.scenario:
+                # still fill the cache for scenarios which need it
+                if scenario == 'cold' and set(args.scenario) & {
+                        'warm', 'failure_storm', 'render'}:
+                    run_processes(settings)
+                continue
+            results[scenario] = run_processes(settings, processes)
+            print_result(scenario, results[scenario])
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    return results
+
+
+def print_result(scenario, result):
+    print('{:<16} {:>6} req {:>9.1f} req/s  p50 {:>8.2f} ms  p99 {:>8.2f} ms'
+          '  rss {:>7} KB  failed {}'.format(
+              scenario, result['requests'], result['throughput'],
+              result['p50_ms'], result['p99_ms'], result['max_rss_kb'] or '-',
+              result['failed']))
+
+
+def compare(results, baseline, threshold):
+    """ Print changes against the baseline run, return names of
+    scenarios which regressed.
+    """
+
+    regressions = []
+    print('\nchanges against baseline ({}):'.format(
+        baseline.get('created', 'unknown')))
+    for scenario, result in results.items():
+        previous = baseline['results'].get(scenario)
+        if not previous:
+            continue
+        changes = {
+            'throughput': previous['throughput'] / max(result['throughput'],
+                                                       1e-9) - 1,
+            'p50_ms': result['p50_ms'] / max(previous['p50_ms'], 1e-9) - 1,
+            'p99_ms': result['p99_ms'] / max(previous['p99_ms'], 1e-9) - 1,
+        }
+        worse = [name for name, change in changes.items()
+                 if change > threshold and (
+                     name == 'throughput' or
+                     result[name] - previous[name] > NOISE_MS)]
+        print('{:<16} throughput {:+.0%}  p50 {:+.0%}  p99 {:+.0%}  {}'.format(
+            scenario,
+            result['throughput'] / max(previous['throughput'], 1e-9) - 1,
+            changes['p50_ms'], changes['p99_ms'],
+            'REGRESSION ({})'.format(', '.join(worse)) if worse else 'ok'))
+        if worse:
+            regressions.append(scenario)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--locations', type=int, default=50)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--render', type=int, default=200,
+                        help='number of renders in the render scenario')
+    parser.add_argument('--latency', type=float, default=0.02,
+                        help='server delay per request, in seconds')
+    parser.add_argument('--jitter', type=float, default=0.01)
+    parser.add_argument('--size', type=int, default=200,
+                        help='size of generated pages in kilobytes')
+    parser.add_argument('--pages', help='directory of recorded pages')
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS,
+                        help='scenario to run, may be repeated; all by '
+                        'default')
+    parser.add_argument('--save', metavar='FILE',
+                        help='save results as json')
+    parser.add_argument('--compare', metavar='FILE',
+                        help='compare with results saved earlier')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='allowed slowdown against the baseline')
+    parser.add_argument('app_args', nargs=argparse.REMAINDER,
+                        help='arguments passed to the application, '
+                        'e.g. -- --parser regex --stream')
+    args = parser.parse_args()
+    args.scenario = args.scenario or list(SCENARIOS)
+    args.app_args = [arg for arg in args.app_args if arg != '--']
+
+    server = FakeWeatherServer(
+        pages=load_pages(args.pages) if args.pages else None,
+        latency=args.latency, jitter=args.jitter, size=args.size).start()
+    print('{} locations, {} workers, server latency {} ms, pages {} KB'
+          .format(args.locations, args.workers, args.latency * 1000,
+                  sum(map(len, server.pages)) // len(server.pages) // 1024))
+    try:
+        results = run_all(args, server)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    if args.save:
+        with open(args.save, 'w') as results_file:
+            json.dump({'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+                       'python': platform.python_version(),
+                       'settings': {name: value for name, value
+                                    in vars(args).items()
+                                    if name not in ('save', 'compare')},
+                       'results': results}, results_file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
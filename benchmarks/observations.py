@@ -0,0 +1,62 @@
+""" Benchmark of memory used by weather observations.
+
+Builds --count observations as weather_info dicts of provider texts, as
+Observation objects and as an ObservationTable and reports memory
+allocated per observation by each of them.
+
+Usage:
+    python -m benchmarks.observations [--count N]
+"""
+
+import random
+import argparse
+import tracemalloc
+
+from weatherapp.core.observation import Observation, ObservationTable
+
+CONDITIONS = ('Sunny', 'Partly sunny', 'Cloudy', 'Rain', 'Snow')
+
+
+def make_weather_info(index):
+    """ Return weather_info dict like the providers return it.
+    """
+
+    return {'cond': random.choice(CONDITIONS),
+            'temp': '+{}°C'.format(index % 30),
+            'feels_like': '{}°C'.format(index % 30 - 2),
+            'wind': '{} m/s NW'.format(index % 12)}
+
+
+def allocated(build):
+    """ Return memory allocated by objects build() returns, in bytes.
+    """
+
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=100000)
+    args = parser.parse_args()
+
+    source = [make_weather_info(index) for index in range(args.count)]
+    cases = [
+        ('weather_info dicts',
+         lambda: [make_weather_info(index) for index in range(args.count)]),
+        ('Observation objects',
+         lambda: [Observation.from_weather_info(weather_info)
+                  for weather_info in source]),
+        ('ObservationTable', lambda: ObservationTable(source)),
+    ]
+    for title, build in cases:
+        print('{:<20} {:8.1f} bytes per observation'.format(
+            title, allocated(build) / args.count))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+""" Benchmark of parsing pages in worker processes.
+
+Parses --pages generated provider-like pages of --size kilobytes with
+the provider get_weather_info in the main process and in pools of 2, 4,
+... up to --processes worker processes, and reports pages parsed per
+second and the speedup over the main process. Worker processes are
+started before timing, as they are kept for the whole run of the
+application. Scaling is bounded by the number of cores of the machine.
+
+Usage:
+    python -m benchmarks.parsepool [--pages N] [--size KB] [--processes N]
+"""
+
+import os
+import time
+import argparse
+from pathlib import Path
+
+from weatherapp.core.app import App
+from weatherapp.core.abstract import WeatherProvider
+from weatherapp.core.parsepool import ParsePool
+
+from benchmarks.parsers import FIELDS, generate_page
+
+
+class BenchmarkProvider(WeatherProvider):
+    """ Provider extracting the weather block of generated pages.
+    """
+
+    title = 'Benchmark'
+    fields = FIELDS
+
+    def get_name(self):
+        return 'benchmark'
+
+    def get_default_location(self):
+        return 'Kyiv'
+
+    def get_default_url(self):
+        return 'http://127.0.0.1/'
+
+    def configurate(self):
+        pass
+
+    def get_configuration_file(self):
+        return Path(os.devnull)
+
+    def get_weather_info(self, page):
+        return self.parse_fields(page)
+
+
+def measure(func, repeat):
+    """ Return best wall-clock time of func in seconds and its result.
+    """
+
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--size', type=int, default=100,
+                        help='page size in kilobytes')
+    parser.add_argument('--processes', type=int, default=os.cpu_count(),
+                        help='largest pool, defaults to the number of cores')
+    parser.add_argument('--parser', default='html.parser')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    app = App()
+    app.options = app.arg_parser.parse_args(['--parser', args.parser])
+    provider = BenchmarkProvider(app)
+    pages = [generate_page(args.size).encode('utf-8')
+             for _ in range(args.pages)]
+
+    print('{} pages of {} KB, {} parser, {} cores'.format(
+        args.pages, args.size, args.parser, os.cpu_count()))
+    baseline, reference = measure(lambda: [
+        provider.get_weather_info(page.decode('utf-8')) for page in pages],
+        args.repeat)
+    print('{:<12} {:8.1f} pages/s'.format('main process',
+                                          args.pages / baseline))
+
+    processes = 2
+    while processes <= max(args.processes, 2):
+        pool = ParsePool(processes=processes)
+        try:
+            # start the workers
+            pool.parse(provider, pages[:processes])
+            elapsed, results = measure(lambda: pool.parse(provider, pages),
+                                       args.repeat)
+        finally:
+            pool.shutdown()
+        print('{:<12} {:8.1f} pages/s  x{:.2f}  {}'.format(
+            '{} processes'.format(processes), args.pages / elapsed,
+            baseline / elapsed, 'ok' if results == reference else 'WRONG'))
+        processes *= 2
+
+
+if __name__ == '__main__':
+    main()
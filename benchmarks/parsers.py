@@ -0,0 +1,119 @@
+""" Benchmark of html parser backends.
+
+Extracts weather fields from a page with every installed parser backend
+and reports time per page. Results of every backend are compared with
+the BeautifulSoup (html.parser) backend, so a faster backend which
+extracts different values is reported as wrong.
+
+By default a generated page shaped like a provider page (a large
+document with the weather block near its end) is used. Recorded pages,
+e.g. files from ~/weather_cache, are given with --page together with
+the fields to extract as NAME=TAG.CLASS.
+
+Usage:
+    python -m benchmarks.parsers [--repeat N] [--size KB]
+    python -m benchmarks.parsers --page FILE --field temp=span.temp ...
+"""
+
+import time
+import argparse
+
+from weatherapp.core.abstract import Field
+from weatherapp.core.parsermanager import ParserManager
+
+FIELDS = {
+    'cond': Field('div', {'class': 'cond'}),
+    'temp': Field('span', {'class': 'temp'}),
+    'feels_like': Field('span', {'class': 'feels-like'}),
+    'wind': Field('div', {'class': 'wind'}),
+}
+
+FILLER = ('<div class="news"><a href="/news/{0}">Headline {0}</a>'
+          '<p class="lead">Some text of the news item {0}.</p></div>\n')
+
+WEATHER = ('<div class="forecast"><div class="cond">Partly sunny</div>'
+           '<span class="temp">12<sup>&deg;C</sup></span>'
+           '<span class="feels-like">10&deg;C</span>'
+           '<div class="wind">3 m/s NW</div></div>\n')
+
+
+def generate_page(size):
+    """ Return provider-like page of about size kilobytes.
+    """
+
+    items = []
+    total = index = 0
+    while total < size * 1024:
+        item = FILLER.format(index)
+        items.append(item)
+        total += len(item)
+        index += 1
+    items.insert(len(items) * 3 // 4, WEATHER)
+    return '<html><body>{}</body></html>'.format(''.join(items))
+
+
+def parse_field(value):
+    """ Parse NAME=TAG.CLASS field argument.
+    """
+
+    name, selector = value.split('=', 1)
+    tag, _, css_class = selector.partition('.')
+    return name, Field(tag, {'class': css_class} if css_class else None)
+
+
+def measure(func, repeat):
+    """ Return best wall-clock time of func in seconds.
+    """
+
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--size', type=int, default=200,
+                        help='size of generated page in kilobytes')
+    parser.add_argument('--page', action='append', default=[],
+                        help='recorded page file, may be repeated')
+    parser.add_argument('--field', action='append', default=[],
+                        type=parse_field, help='NAME=TAG.CLASS')
+    args = parser.parse_args()
+
+    if args.page:
+        pages = []
+        for path in args.page:
+            with open(path, 'rb') as page_file:
+                pages.append(page_file.read().decode('utf-8', 'replace'))
+        fields = dict(args.field)
+    else:
+        pages = [generate_page(args.size)]
+        fields = FIELDS
+
+    manager = ParserManager()
+    reference_parser = manager.get('html.parser')()
+    reference = [reference_parser.extract(page, fields) for page in pages]
+
+    print('{} page(s), {:.0f} KB, {} fields'.format(
+        len(pages), sum(len(page) for page in pages) / 1024, len(fields)))
+    for name in manager.names():
+        backend = manager.get(name)
+        if not backend.is_available():
+            print('{:<12} not installed'.format(name))
+            continue
+        instance = backend()
+        results = [instance.extract(page, fields) for page in pages]
+        elapsed = measure(lambda: [instance.extract(page, fields)
+                                   for page in pages], args.repeat)
+        print('{:<12} {:8.2f} ms/page  {}'.format(
+            name, elapsed * 1000 / len(pages),
+            'ok' if results == reference else 'WRONG: {}'.format(results)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+""" Rendering benchmark of formatters.
+
+Renders many provider results through App.output_weather_info and
+App.output_locations and reports time per result. For reference it also
+measures construction of a whole App, which every rendered result used
+to pay when TableFormatter created its own application.
+
+Usage:
+    python -m benchmarks.render [--results N] [--formatter NAME]
+"""
+
+import io
+import time
+import argparse
+
+from weatherapp.core.app import App
+
+WEATHER_INFO = {'cond': 'Partly sunny', 'temp': '12°C',
+                'feels_like': '10°C', 'wind': '3 m/s NW'}
+
+
+def measure(func, repeat=3):
+    """ Return best wall-clock time of func in seconds.
+    """
+
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--results', type=int, default=200)
+    parser.add_argument('--formatter', default='table')
+    args = parser.parse_args()
+
+    app = App(stdout=io.StringIO())
+    app.options = app.arg_parser.parse_args(['-f', args.formatter])
+    results = [('City {}'.format(index), WEATHER_INFO)
+               for index in range(args.results)]
+
+    def separate():
+        for location, data in results:
+            app.output_weather_info('Provider', location, data)
+
+    def combined():
+        app.output_locations('Provider', results)
+
+    print('{} results, formatter {!r}'.format(args.results, args.formatter))
+    for name, func in [('one table per result', separate),
+                       ('one combined table', combined)]:
+        elapsed = measure(func)
+        print('{:<24} {:8.1f} ms total {:8.3f} ms/result'.format(
+            name, elapsed * 1000, elapsed * 1000 / args.results))
+    print('{:<24} {:8.3f} ms'.format('App() construction', measure(App) *
+                                     1000))
+
+
+if __name__ == '__main__':
+    main()
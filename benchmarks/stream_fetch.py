@@ -0,0 +1,166 @@
+""" Benchmark of streaming page fetch.
+
+Serves a large provider-like page from a local HTTP server and fetches
+it through a provider with and without --stream, reporting bytes read,
+peak memory allocated by the fetch and time to result. Pages are parsed
+with the "stream" parser backend in both cases. The weather block is
+placed at --position percent of the page.
+
+Usage:
+    python -m benchmarks.stream_fetch [--size KB] [--position PCT]
+"""
+
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import tracemalloc
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from weatherapp.core.app import App
+from weatherapp.core.abstract import WeatherProvider, Field
+from weatherapp.core.cache import FileCache, SingleFlight
+
+FILLER = ('<div class="news"><a href="/news/{0}">Headline {0}</a>'
+          '<p class="lead">Some text of the news item {0}.</p></div>\n')
+
+WEATHER = ('<div class="forecast"><div class="cond">Partly sunny</div>'
+           '<span class="temp">12&deg;C</span>'
+           '<span class="feels-like">10&deg;C</span>'
+           '<div class="wind">3 m/s NW</div></div>\n')
+
+
+def generate_page(size, position):
+    """ Return page of about size kilobytes with the weather block at
+    position percent of it.
+    """
+
+    items = []
+    total = index = 0
+    while total < size * 1024:
+        item = FILLER.format(index)
+        items.append(item)
+        total += len(item)
+        index += 1
+    items.insert(len(items) * position // 100, WEATHER)
+    return '<html><body>{}</body></html>'.format(''.join(items)).encode()
+
+
+class QuietServer(ThreadingHTTPServer):
+    """ Server which does not report connections closed by the client
+    in the middle of a page.
+    """
+
+    def handle_error(self, request, client_address):
+        pass
+
+
+class BenchmarkProvider(WeatherProvider):
+    """ Provider reading the page of the local server.
+    """
+
+    url = None
+    title = 'Benchmark'
+    fields = {
+        'cond': Field('div', {'class': 'cond'}),
+        'temp': Field('span', {'class': 'temp'}),
+        'feels_like': Field('span', {'class': 'feels-like'}),
+        'wind': Field('div', {'class': 'wind'}),
+    }
+
+    def get_name(self):
+        return 'benchmark'
+
+    def get_default_location(self):
+        return 'Kyiv'
+
+    def get_default_url(self):
+        return BenchmarkProvider.url
+
+    def configurate(self):
+        pass
+
+    def get_configuration_file(self):
+        return Path(os.devnull)
+
+    def get_weather_info(self, page):
+        return self.parse_fields(page)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=2048,
+                        help='page size in kilobytes')
+    parser.add_argument('--position', type=int, default=10,
+                        help='position of weather block in percent')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    body = generate_page(args.size, args.position)
+
+    class PageHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            try:
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def log_message(self, *args):
+            pass
+
+    server = QuietServer(('127.0.0.1', 0), PageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    BenchmarkProvider.url = 'http://127.0.0.1:{}/'.format(
+        server.server_port)
+    cache_dir = Path(tempfile.mkdtemp())
+
+    print('page {} KB, weather block at {}%'.format(len(body) // 1024,
+                                                    args.position))
+    try:
+        for title, argv in [('full fetch', ['--parser', 'stream']),
+                            ('streaming fetch', ['--parser', 'stream',
+                                                 '--stream'])]:
+            app = App()
+            app.options = app.arg_parser.parse_args(argv)
+            app.cache = FileCache(cache_dir)
+            app.singleflight = SingleFlight(cache_dir / 'locks')
+            app.sessionmanager.rate_limit = 0
+            provider = BenchmarkProvider(app)
+
+            def run():
+                # fetch and parse the page every time
+                app.cache.clear()
+                app.memorycache.clear()
+                provider.run([])
+
+            best = None
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                run()
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            tracemalloc.start()
+            run()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            read = len(provider.read_cache(provider.url))
+            print('{:<16} {:8.1f} ms  {:8.0f} KB read  {:8.0f} KB peak '
+                  'memory'.format(title, best * 1000, read / 1024,
+                                  peak / 1024))
+            app.sessionmanager.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+        shutil.rmtree(cache_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -9,15 +9,22 @@ setup(
     author="Vasyl Rostykus",
     description="A simple cli weather aggregator",
     long_description=long_description,
-    packages=find_namespace_packages(),
+    packages=find_namespace_packages(include=['weatherapp*']),
     entry_points={
-        'console_scripts': 'wfapp=weatherapp.core.app:main'
+        'console_scripts': [
+            'wfapp=weatherapp.core.app:main',
+            'wfappc=weatherapp.core.client:main',
+        ]
     },
     install_requires=[
         'requests',
         'bs4',
         'prettytable',
     ],
+    extras_require={
+        'lxml': ['lxml'],
+        'numpy': ['numpy'],
+    },
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
@@ -2,6 +2,9 @@ from weatherapp.core.abstract.command import Command
 from weatherapp.core.abstract.manager import Manager
 from weatherapp.core.abstract.provider import WeatherProvider
 from weatherapp.core.abstract.formatter import Formatter
+from weatherapp.core.abstract.cache import Cache
+from weatherapp.core.abstract.parser import Parser, Field
 
 
-__all__ = ['Command', 'Manager', 'WeatherProvider', 'Formatter']
+__all__ = ['Command', 'Manager', 'WeatherProvider', 'Formatter', 'Cache',
+           'Parser', 'Field']
@@ -0,0 +1,69 @@
+import abc
+
+from weatherapp.core import config
+
+
+class Cache(abc.ABC):
+    """ Base abstract class for page cache backends.
+
+    Entries are stored under the url hash and hold the page source,
+    response validators (meta) and time of the last update in seconds
+    since the epoch.
+    """
+
+    name = None
+
+    @abc.abstractmethod
+    def get(self, key):
+        """ Return (page, meta, updated) stored under the key or None.
+
+        :param key: url hash
+        :type key: str
+        """
+
+    @abc.abstractmethod
+    def get_meta(self, key):
+        """ Return (meta, updated) stored under the key or None, without
+            reading the page itself.
+
+        :param key: url hash
+        :type key: str
+        """
+
+    @abc.abstractmethod
+    def set(self, key, page, meta):
+        """ Store page and its validators under the key.
+
+        :param key: url hash
+        :type key: str
+        :param page: page source
+        :type page: bytes
+        :param meta: response validators
+        :type meta: dict
+        """
+
+    @abc.abstractmethod
+    def touch(self, key, meta):
+        """ Replace validators and update time of an existing entry.
+        Returns False if there is no entry under the key (e.g. it was
+        removed by another process).
+        """
+
+    @abc.abstractmethod
+    def delete(self, key):
+        """ Remove entry stored under the key, if any.
+        """
+
+    @abc.abstractmethod
+    def clear(self):
+        """ Remove all entries.
+        """
+
+    def compact(self, max_age=config.CACHE_RETENTION):
+        """ Remove entries not updated for max_age seconds and reclaim
+            free space.
+        """
+
+    def close(self):
+        """ Release resources held by the backend.
+        """
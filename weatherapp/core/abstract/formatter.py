@@ -1,11 +1,22 @@
 import abc
+import sys
 
 
 class Formatter(abc.ABC):
 
     """ Base abstract class for formatters.
+
+    :param options: render options of the running application,
+                    see app.App.get_formatter_options
+    :type options: dict
+    :param stdout: output stream where data should be written
+    :type stdout: sys.stdout or file like object
     """
 
+    def __init__(self, options=None, stdout=None):
+        self.options = options or {}
+        self.stdout = stdout or sys.stdout
+
     @abc.abstractmethod
     def emit(self, column_names, data):
         """ Format and print data from the iterable source.
@@ -19,3 +30,21 @@ class Formatter(abc.ABC):
         :type stdout: sys.stdout or file like object
 
         """
+
+    def emit_rows(self, column_names, rows):
+        """ Format and print many objects as one table.
+
+        Formatters should override it; by default every row is emitted
+        on its own.
+
+        :param column_names: names of the columns, the first one holds
+                             the object name
+        :type column_names: list
+        :param rows: one list of values per object in order of
+                     column names
+        :type rows: list
+
+        """
+
+        for row in rows:
+            self.emit([row[0], ''], dict(zip(column_names[1:], row[1:])))
@@ -0,0 +1,59 @@
+import abc
+from collections import namedtuple
+
+
+class Field(namedtuple('Field', 'tag attrs pattern')):
+    """ Location of one weather field in a provider page.
+
+    Tree parsers find the first 'tag' element with given 'attrs' and
+    take its text; 'pattern' is a regular expression with one group used
+    by the regex parser instead, if given.
+
+    :param tag: element name, e.g. 'span'
+    :type tag: str
+    :param attrs: element attributes, e.g. {'class': 'temp'}
+    :type attrs: dict
+    :param pattern: regular expression capturing field value
+    :type pattern: str
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, tag, attrs=None, pattern=None):
+        return super().__new__(cls, tag, attrs or {}, pattern)
+
+
+class Parser(abc.ABC):
+    """ Base abstract class for html parser backends.
+
+    Backends extract weather fields described by Field objects from the
+    page source, so a provider can run on any available backend.
+    """
+
+    name = None
+
+    @classmethod
+    def is_available(cls):
+        """ Return True if libraries required by the backend are
+            installed.
+        """
+
+        return True
+
+    @abc.abstractmethod
+    def extract(self, page, fields):
+        """ Return dict with text of every field found in the page,
+            None for fields which are not found.
+
+        :param page: page source
+        :type page: str
+        :param fields: Field objects by field name
+        :type fields: dict
+        """
+
+    @staticmethod
+    def clean(text):
+        """ Collapse whitespace in the extracted text.
+        """
+
+        return ' '.join(text.split())
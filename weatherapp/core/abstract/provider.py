@@ -1,14 +1,19 @@
+import re
 import abc
+import json
+import codecs
 import time
 import hashlib
 import logging
 import configparser
 from pathlib import Path
-
-import requests
+from urllib.parse import urlsplit
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 from weatherapp.core import config
 from weatherapp.core.abstract.command import Command
+from weatherapp.core.observation import Observation
 
 
 class WeatherProvider(Command):
@@ -18,12 +23,23 @@ class WeatherProvider(Command):
     # create logger
     logger = logging.getLogger(__name__)
 
+    # version of the page parser, bump it whenever get_weather_info output
+    # changes so results parsed by an older version are not reused
+    version = '1'
+
+    # fields of the page extracted by parse_fields(), Field objects by
+    # field name, see abstract.parser.Field
+    fields = {}
+
     def __init__(self, app):
         super().__init__(app)
 
         location, url = self._get_configuration()
         self.location = location
         self.url = url
+        self.locations = [(location, url)] + self._get_locations()
+        self.parser_name = self._get_parser_name()
+        self._parsers = {}
 
     @abc.abstractmethod
     def get_name(self):
@@ -63,6 +79,9 @@ class WeatherProvider(Command):
             'feels_like' ''    # feels like temperature
             'wind'       ''    # information about wind
         }
+
+        See get_observation for the same information with numeric
+        fields.
         """
 
     @staticmethod
@@ -96,6 +115,82 @@ class WeatherProvider(Command):
             name, url = locatoin_config['name'], locatoin_config['url']
         return name, url
 
+    def _read_configuration(self):
+        """ Return parsed configuration file, None if it is broken.
+        """
+
+        configuration = configparser.ConfigParser()
+        # keep location names as they are written
+        configuration.optionxform = str
+        try:
+            configuration.read(self.get_configuration_file())
+        except configparser.Error:
+            return None
+        return configuration
+
+    def _get_locations(self):
+        """ Return additional (name, url) locations of the provider.
+
+        They are listed in the '<provider>:locations' section of the
+        configuration file, one 'name = url' pair per line.
+        """
+
+        configuration = self._read_configuration()
+        if configuration is None:
+            return []
+
+        section = self.get_name() + config.CONFIG_LOCATIONS_SUFFIX
+        if configuration.has_section(section):
+            return [(name, url) for name, url in
+                    configuration.items(section, raw=True)]
+        return []
+
+    def _get_parser_name(self):
+        """ Return parser backend set by the 'parser' option of the
+        provider section of the configuration file, if any.
+        """
+
+        configuration = self._read_configuration()
+        if configuration is None or \
+                not configuration.has_section(self.get_name()):
+            return None
+        return configuration[self.get_name()].get('parser')
+
+    def get_parser_name(self):
+        """ Return name of the parser backend to use.
+
+        The backend is chosen by --parser, then by --regexp, then by the
+        configuration file and defaults to config.PARSER.
+        """
+
+        options = self.app.options
+        name = getattr(options, 'parser', None)
+        if not name and getattr(options, 'regexp', False):
+            name = 'regex'
+        return name or self.parser_name or config.PARSER
+
+    def get_parser(self):
+        """ Return instance of the selected parser backend.
+        """
+
+        name = self.get_parser_name()
+        parser = self._parsers.get(name)
+        if parser is None:
+            parser_factory = self.app.parsermanager.get(name)
+            if parser_factory is None or not parser_factory.is_available():
+                self.logger.warning('Parser %r is not available, using %r',
+                                    name, config.PARSER)
+                parser_factory = self.app.parsermanager.get(config.PARSER)
+            parser = self._parsers[name] = parser_factory()
+        return parser
+
+    def parse_fields(self, page):
+        """ Extract self.fields from the page with the selected parser
+        backend. Returns dict of field texts, None for missing fields.
+        """
+
+        return self.get_parser().extract(page, self.fields)
+
     def save_configuration(self, name, url):
         """ Write the data received from the user (the city name and its URL)
         into the configuration file.
@@ -125,78 +220,653 @@ class WeatherProvider(Command):
 
         return hashlib.md5(url.encode('utf-8')).hexdigest()
 
-    def save_cache(self, url, page):
+    def save_cache(self, url, page, headers=None, partial=False):
         """ Save page source by given url address.
+
+        Response validators (ETag, Last-Modified and Cache-Control
+        max-age) from the headers are stored next to the page, so the
+        entry can be revalidated with a conditional request once it
+        expires. The page digest is stored too, to find its parsed
+        weather information.
+
+        A partial page (see read_stream) is marked with the provider
+        version, which is the only version known to find its fields there.
         """
 
         url_hash = self.get_url_hash(url)
-        cache_dir = self.get_cache_directory()
-        if not cache_dir.exists():
-            cache_dir.mkdir(parents=True)
+        validators = self.get_validators(headers or {})
+        validators['digest'] = self.get_digest(page)
+        if partial:
+            validators['partial'] = self.version
+        self.app.cache.set(url_hash, page, validators)
+        self.app.memorycache.delete(config.PARSED_CACHE_PREFIX + url_hash)
+        self.app.memorycache.set(
+            url_hash, page, self.get_cache_lifetime(validators.get('max_age')))
 
-        with (cache_dir / url_hash).open('wb') as cache_file:
-            cache_file.write(page)
+    @staticmethod
+    def get_digest(page):
+        """ Return digest of the page content.
+        """
+
+        return hashlib.sha1(page).hexdigest()
+
+    @staticmethod
+    def get_validators(headers):
+        """ Extract cache validators from the response headers.
+        """
+
+        validators = {}
+        if headers.get('ETag'):
+            validators['etag'] = headers['ETag']
+        if headers.get('Last-Modified'):
+            validators['last_modified'] = headers['Last-Modified']
+        max_age = re.search(r'max-age=(\d+)',
+                            headers.get('Cache-Control', ''))
+        if max_age:
+            validators['max_age'] = int(max_age.group(1))
+        return validators
+
+    def get_cache_validators(self, url):
+        """ Return validators stored for the cached page, if any.
+        """
+
+        entry = self.app.cache.get_meta(self.get_url_hash(url))
+        return entry[0] if entry else {}
 
     @staticmethod
-    def is_valid(path):
+    def get_cache_lifetime(max_age=None):
+        """ Return how long cached page stays fresh, in seconds.
+
+        The entry lives for config.CACHE_TIME seconds, or longer if the
+        server allowed it with Cache-Control max-age.
+        """
+
+        return max(config.CACHE_TIME, max_age or 0)
+
+    @classmethod
+    def is_valid(cls, path, max_age=None):
         """ Check if current cache file is valid.
         """
 
-        return (time.time() - path.stat().st_mtime) < config.CACHE_TIME
+        return ((time.time() - path.stat().st_mtime) <
+                cls.get_cache_lifetime(max_age))
+
+    def read_cache(self, url):
+        """ Return cached page regardless of its age.
+        """
+
+        entry = self.app.cache.get(self.get_url_hash(url))
+        return entry[0] if entry else b''
+
+    def get_page_info(self, url):
+        """ Return (digest, time it was fetched) of the cached page of
+        the url, None if there is no such.
+        """
+
+        entry = self.app.cache.get_meta(self.get_url_hash(url))
+        if entry is None or 'digest' not in entry[0]:
+            return None
+        meta, updated = entry
+        return meta['digest'], updated
+
+    def get_cache_ttl(self, url):
+        """ Return number of seconds the cached page stays fresh.
+
+        The value is negative for an expired page and None if the page
+        is not cached at all.
+        """
+
+        entry = self.app.cache.get_meta(self.get_url_hash(url))
+        if entry is None:
+            return None
+        meta, updated = entry
+        return (self.get_cache_lifetime(meta.get('max_age')) -
+                (time.time() - updated))
+
+    def is_complete(self, meta):
+        """ Check that cached page has all fields of the provider: it is
+        either complete or its prefix was read by this provider version.
+        """
+
+        return meta.get('partial', self.version) == self.version
 
     def get_cache(self, url):
         """ Return cache data if any.
+
+        Pages are looked up in the application memory cache first, so
+        repeated lookups in one process do not touch the cache backend.
         """
 
-        cache = b''
         url_hash = self.get_url_hash(url)
-        cache_dir = self.get_cache_directory()
-        if cache_dir.exists():
-            cache_path = cache_dir / url_hash
-            if cache_path.exists() and self.is_valid(cache_path):
-                with cache_path.open('rb') as cache_file:
-                    cache = cache_file.read()
+        metrics = self.app.metrics
+        cache = self.app.memorycache.get(url_hash)
+        if cache is not None:
+            metrics.inc('cache_hits', provider=self.get_name(), tier='memory')
+            return cache
+
+        cache = b''
+        entry = self.app.cache.get(url_hash)
+        if entry is not None:
+            page, meta, updated = entry
+            ttl = (self.get_cache_lifetime(meta.get('max_age')) -
+                   (time.time() - updated))
+            if ttl > 0 and self.is_complete(meta):
+                cache = page
+                self.app.memorycache.set(url_hash, cache, ttl)
+        if cache:
+            metrics.inc('cache_hits', provider=self.get_name(),
+                        tier=self.app.cache.name)
+        else:
+            metrics.inc('cache_misses', provider=self.get_name())
         return cache
 
+    def refresh_cache(self, url, headers):
+        """ Extend lifetime of the cached page after the server answered
+        304 Not Modified. Return the cached page, an empty page if it was
+        removed after the request was sent.
+        """
+
+        url_hash = self.get_url_hash(url)
+        validators = self.get_cache_validators(url)
+        validators.update(self.get_validators(headers))
+        if not self.app.cache.touch(url_hash, validators):
+            return b''
+        page = self.read_cache(url)
+        if not page:
+            return page
+        self.app.memorycache.set(
+            url_hash, page, self.get_cache_lifetime(validators.get('max_age')))
+        return page
+
+    def get_conditional_headers(self, url):
+        """ Build conditional request headers for an expired cache entry.
+        """
+
+        headers = {}
+        entry = self.app.cache.get_meta(self.get_url_hash(url))
+        if entry is not None:
+            validators = entry[0]
+            if 'etag' in validators:
+                headers['If-None-Match'] = validators['etag']
+            if 'last_modified' in validators:
+                headers['If-Modified-Since'] = validators['last_modified']
+        return headers
+
+    def fetch_page(self, url):
+        """ Download the page and store it in the cache, see download_page.
+
+        Every fetch is timed and a failed one counted in the metrics,
+        whether it is made by a provider run, the background revalidation
+        or the prefetch scheduler. Network errors are raised to the
+        caller.
+        """
+
+        # imported here to keep application startup fast
+        import requests
+        try:
+            with self.app.metrics.span('fetch', provider=self.get_name(),
+                                       host=urlsplit(url).netloc):
+                return self.download_page(url)
+        except requests.RequestException as error:
+            self.count_error(url, error)
+            raise
+
+    def download_page(self, url):
+        """ Download the page and store it in the cache.
+
+        Only one thread or process fetches a url at a time; callers which
+        waited for it reuse the page it stored instead of fetching the
+        page again.
+
+        Expired cache entries are revalidated with a conditional request:
+        on 304 Not Modified the cached page is reused and its lifetime
+        is extended. Network errors are raised to the caller.
+        """
+
+        url_hash = self.get_url_hash(url)
+        entry = self.app.cache.get_meta(url_hash)
+        updated = entry[1] if entry else None
+        with self.app.singleflight.lock(url_hash):
+            entry = self.app.cache.get_meta(url_hash)
+            if entry is not None and entry[1] != updated:
+                self.logger.debug('%s fetched by another caller', url)
+                return self.read_cache(url)
+
+            streaming = self.is_streaming()
+            response = self.app.sessionmanager.get(
+                url, headers=self.get_conditional_headers(url),
+                stream=streaming)
+            if response.status_code == 304:
+                self.logger.debug('%s not modified, reuse cache', url)
+                if streaming:
+                    response.close()
+                page = self.refresh_cache(url, response.headers)
+                if page:
+                    return page
+                # cached page was removed (e.g. by clear_cache) meanwhile
+                self.logger.debug('%s is not cached any more, fetch it '
+                                  'again', url)
+                response = self.app.sessionmanager.get(url, stream=streaming)
+            if response.status_code >= 400:
+                # do not store error pages as the weather page
+                import requests
+                if streaming:
+                    response.close()
+                raise requests.HTTPError(
+                    '{} returned {}'.format(url, response.status_code),
+                    response=response)
+            if streaming:
+                page, partial = self.read_stream(response)
+            else:
+                page, partial = response.content, False
+            self.save_cache(url, page, response.headers, partial)
+            self.app.metrics.inc('bytes_fetched', len(page),
+                                 provider=self.get_name())
+            return page
+
+    def is_streaming(self):
+        """ Check if pages are parsed while they are downloaded (see
+        --stream). Only providers declaring their fields can stream.
+        """
+
+        return bool(self.fields) and getattr(self.app.options, 'stream',
+                                             False)
+
+    def read_stream(self, response):
+        """ Read response body in chunks until every field is extracted.
+
+        Returns (page, partial) pair: the body read so far and whether the
+        rest of it was skipped. The prefix holds all fields, so it is
+        enough to parse the page again; the connection of an unfinished
+        response is closed instead of being reused.
+        """
+
+        collector = self.app.parsermanager.get('stream').collector(
+            self.fields)
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        chunks = []
+        partial = False
+        try:
+            for chunk in response.iter_content(config.STREAM_CHUNK_SIZE):
+                chunks.append(chunk)
+                collector.feed(decoder.decode(chunk))
+                if collector.done:
+                    partial = True
+                    break
+        finally:
+            response.close()
+
+        page = b''.join(chunks)
+        if partial:
+            # do not keep a character cut at the chunk boundary
+            page = page.decode('utf-8', 'ignore').encode('utf-8')
+            self.logger.debug('%s: fields found in first %d bytes',
+                              response.url, len(page))
+        return page, partial
+
+    def get_stale_cache(self, url, max_stale):
+        """ Return (page, age) of the cached page if it expired less than
+        max_stale seconds ago, (b'', None) otherwise. Age is the number of
+        seconds since the page was fetched.
+        """
+
+        entry = self.app.cache.get(self.get_url_hash(url))
+        if entry is not None:
+            page, meta, updated = entry
+            age = time.time() - updated
+            if (age - self.get_cache_lifetime(meta.get('max_age')) <
+                    max_stale and self.is_complete(meta)):
+                return page, age
+        return b'', None
+
+    def get_stale_weather(self, url):
+        """ Return weather information of the cached page of the url
+        marked with its 'age', empty if there is no page expired less
+        than --max_stale seconds ago. Nothing is fetched.
+        """
+
+        page, age = self.get_stale_cache(url, getattr(
+            self.app.options, 'max_stale', config.CACHE_MAX_STALE))
+        if not page:
+            return {}
+        weather_info = self.get_parsed(url, self.get_digest(page))
+        if weather_info is None:
+            weather_info = self.get_weather_info(page.decode('utf-8'))
+        return dict(weather_info, age=self.format_age(age))
+
+    def get_stale_locations(self, locations=None):
+        """ Return (location, weather_info) pairs of the cached pages of
+        the locations, see get_stale_weather.
+        """
+
+        return [(name, self.get_stale_weather(url))
+                for name, url in locations or self.locations]
+
+    def get_page_with_age(self, url):
+        """ Get the html-page at the specified url address as bytes.
+
+        Returns (page, age) pair, age is None for a fresh page. A page
+        expired less than --stale_while_revalidate seconds ago is returned
+        at once and refreshed in background. If the page can not be
+        fetched, the cached copy expired less than --max_stale seconds ago
+        is returned, or an empty page if there is no such.
+        """
+
+        options = self.app.options
+        metrics = self.app.metrics
+        provider = self.get_name()
+        if not options.refresh:
+            with metrics.span('cache', provider=provider):
+                cache = self.get_cache(url)
+            if cache:
+                return cache, None
+            page, age = self.get_stale_cache(url, getattr(
+                options, 'stale_while_revalidate',
+                config.CACHE_STALE_WHILE_REVALIDATE))
+            if page:
+                self.logger.debug('%s is stale, refresh in background', url)
+                self.app.revalidator.submit(self.get_url_hash(url),
+                                            self.fetch_page, url)
+                metrics.inc('stale_served', provider=provider)
+                return page, age
+
+        # imported here to keep application startup fast
+        import requests
+        try:
+            return self.fetch_page(url), None
+        except requests.ConnectionError as msg:
+            self.report_error(url, msg, "OOPS!! Connection Error. Make sure"
+                              " you are connected to Internet. Technical"
+                              " Details given below. \n")
+        except requests.Timeout as msg:
+            self.report_error(url, msg, "OOPS!! Timeout Error")
+        except requests.RequestException as msg:
+            self.report_error(url, msg, "OOPS!! General Error")
+
+        page, age = self.get_stale_cache(url, getattr(
+            options, 'max_stale', config.CACHE_MAX_STALE))
+        if page:
+            self.logger.warning('%s is not available, using cached page '
+                                'fetched %d seconds ago', url, age)
+            metrics.inc('stale_served', provider=provider)
+        return page, age
+
+    def report_error(self, url, error, message):
+        """ Log failed fetch and show the message, fetch_page counted it.
+
+        The same error of one host is logged once per
+        config.LOG_REPEAT_INTERVAL seconds (see logconfig.RepeatFilter),
+        so an unreachable site does not flood the log with one record
+        per page.
+        """
+
+        self.app.stdout.write(message)
+        extra = {'repeat_key': (self.get_name(), urlsplit(url).netloc,
+                                type(error).__name__)}
+        if self.app.options.debug:
+            self.logger.exception(error, extra=extra)
+        else:
+            self.logger.error(error, extra=extra)
+
+    def count_error(self, url, error):
+        """ Count failed fetch by provider, host and exception class.
+        """
+
+        self.app.metrics.inc('fetch_errors', provider=self.get_name(),
+                             host=urlsplit(url).netloc,
+                             exception=type(error).__name__)
+
+    def get_page(self, url):
+        """ Get the html-page at the specified url address as bytes.
+        """
+
+        return self.get_page_with_age(url)[0]
+
+    @staticmethod
+    def format_age(age):
+        """ Return human readable age of the page.
+        """
+
+        if age < 3600:
+            return '{} min'.format(int(age // 60))
+        return '{:.1f} h'.format(age / 3600)
+
     def get_page_source(self, url):
         """ Get the html-page at the specified url address.
         """
 
-        cache = self.get_cache(url)
-        if cache and not self.app.options.refresh:
-            page = cache
-        else:
-            headers = \
-                {'User-Agent': 'Mozilla/5.0 (X11; Ubuntu; Linux x86_64;)'}
-            try:
-                page = requests.get(url, headers=headers, timeout=5)
-            except requests.ConnectionError as msg:
-                self.app.stdout.write("OOPS!! Connection Error. Make sure you"
-                                      "are connected to Internet. Technical"
-                                      "Details given below. \n")
-                if self.app.options.debug:
-                    self.logger.exception(msg)
-                else:
-                    self.logger.error(msg)
-            except requests.Timeout as msg:
-                self.app.stdout.write("OOPS!! Timeout Error")
-                if self.app.options.debug:
-                    self.logger.exception(msg)
-                else:
-                    self.logger.error(msg)
-            except requests.RequestException as msg:
-                self.app.stdout.write("OOPS!! General Error")
-                if self.app.options.debug:
-                    self.logger.exception(msg)
-                else:
-                    self.logger.error(msg)
-            page = page.content
-            self.save_cache(url, page)
-        return page.decode('utf-8')
+        return self.get_page(url).decode('utf-8')
+
+    def get_parse_options(self):
+        """ Return options the parsed weather information depends on.
+        """
+
+        return '{}:{}:{}'.format(
+            self.version, self.get_parser_name(),
+            getattr(self.app.options, 'tomorrow', None) or '')
+
+    def get_parse_arguments(self):
+        """ Return application options get_weather_info depends on, to
+        parse pages in worker processes (see parsepool.ParsePool).
+        """
+
+        return {'parser': self.get_parser_name(),
+                'tomorrow': getattr(self.app.options, 'tomorrow', None)}
+
+    def get_parsed_key(self, url, digest):
+        """ Return cache key of weather information parsed from the page
+        with given digest.
+        """
+
+        key = ':'.join((self.get_name(), self.get_url_hash(url), digest,
+                        self.get_parse_options()))
+        return (config.PARSED_CACHE_PREFIX +
+                hashlib.md5(key.encode('utf-8')).hexdigest())
+
+    def get_parsed(self, url, digest):
+        """ Return weather information parsed earlier from the page with
+        given digest, None if there is no such.
+        """
+
+        entry = self.app.cache.get(self.get_parsed_key(url, digest))
+        if entry is None:
+            return None
+        try:
+            return json.loads(entry[0].decode('utf-8'))
+        except ValueError:
+            return None
+
+    def save_parsed(self, url, digest, weather_info):
+        """ Store weather information parsed from the page with given
+        digest.
+        """
+
+        try:
+            data = json.dumps(weather_info).encode('utf-8')
+        except (TypeError, ValueError):
+            self.logger.debug('%s parse result is not cacheable', url)
+            return
+        self.app.cache.set(self.get_parsed_key(url, digest), data, {})
+
+    def _remember_parsed(self, url, weather_info, ttl):
+        """ Keep parse result in the memory cache while the page is fresh.
+        """
+
+        key = config.PARSED_CACHE_PREFIX + self.get_url_hash(url)
+        parsed = dict(self.app.memorycache.get(key) or {})
+        parsed[self.get_parse_options()] = weather_info
+        self.app.memorycache.set(key, parsed, ttl or 0)
+
+    def get_weather(self, url):
+        """ Return weather information for the page at the url.
+
+        Parse results are cached by page digest, provider version and
+        parse options (parser backend, tomorrow): a fresh cached page is not
+        read, decoded and parsed again, and a refetched page with
+        unchanged content reuses the previous parse.
+
+        Information from an expired page is marked with its age in the
+        'age' field; if there is no page at all, it is empty.
+        """
+
+        weather_info, page = self.get_weather_or_page(url)
+        if page is None:
+            return weather_info
+        with self.app.metrics.span('parse', provider=self.get_name()):
+            weather_info = self.get_weather_info(page[0].decode('utf-8'))
+        return self.set_weather(url, page, weather_info)
+
+    def get_weather_or_page(self, url):
+        """ Return (weather_info, None) if weather information for the
+        url is known without parsing, else (None, page) where page is
+        the (page, age, digest) triple to parse and pass to set_weather.
+        """
+
+        metrics = self.app.metrics
+        provider = self.get_name()
+        if not self.app.options.refresh:
+            with metrics.span('cache', provider=provider):
+                weather_info = self.get_cached_weather(url)
+            if weather_info is not None:
+                metrics.inc('parsed_cache_hits', provider=provider)
+                return weather_info, None
+
+        page, age = self.get_page_with_age(url)
+        if not page:
+            return {}, None
+        digest = self.get_digest(page)
+        weather_info = self.get_parsed(url, digest)
+        if weather_info is None:
+            return None, (page, age, digest)
+        return self._complete_weather(url, age, weather_info), None
+
+    def set_weather(self, url, page, weather_info):
+        """ Store weather information parsed from the page returned by
+        get_weather_or_page and return it.
+        """
+
+        page, age, digest = page
+        self.save_parsed(url, digest, weather_info)
+        return self._complete_weather(url, age, weather_info)
+
+    def _complete_weather(self, url, age, weather_info):
+        if age is not None:
+            return dict(weather_info, age=self.format_age(age))
+        self._remember_parsed(url, weather_info, self.get_cache_ttl(url))
+        return weather_info
+
+    def get_cached_weather(self, url):
+        """ Return weather information parsed from the fresh cached page,
+        None if there is no such.
+        """
+
+        url_hash = self.get_url_hash(url)
+        parsed = self.app.memorycache.get(
+            config.PARSED_CACHE_PREFIX + url_hash) or {}
+        if self.get_parse_options() in parsed:
+            return parsed[self.get_parse_options()]
+
+        entry = self.app.cache.get_meta(url_hash)
+        if entry is not None and 'digest' in entry[0]:
+            meta, updated = entry
+            ttl = (self.get_cache_lifetime(meta.get('max_age')) -
+                   (time.time() - updated))
+            weather_info = (self.get_parsed(url, meta['digest'])
+                            if ttl > 0 else None)
+            if weather_info is not None:
+                self._remember_parsed(url, weather_info, ttl)
+                return weather_info
+        return None
 
     def run(self, argv):
         """ Run provider.
         """
 
-        content = self.get_page_source(self.url)
-        return self.get_weather_info(content)
+        return self.get_weather(self.url)
+
+    def _run_url(self, url):
+        """ Fetch and parse weather information for one url.
+        """
+
+        return self.get_weather(url)
+
+    def get_observation(self, url):
+        """ Return weather of the url as a normalized Observation, None
+        if it is not available.
+
+        The default adapter parses the get_weather_info texts; providers
+        which read numbers from the page may build the observation
+        directly instead.
+        """
+
+        weather_info = self.get_weather(url)
+        if not weather_info:
+            return None
+        return Observation.from_weather_info(weather_info)
+
+    def observe_locations(self, argv, locations=None):
+        """ Run provider for many locations like run_locations, but
+        return (location, Observation) pairs, None for locations without
+        weather information.
+        """
+
+        return [(name, Observation.from_weather_info(weather_info)
+                 if weather_info else None)
+                for name, weather_info in self.run_locations(argv, locations)]
+
+    def run_locations(self, argv, locations=None):
+        """ Run provider for many locations at once.
+
+        Every unique url is fetched only once; pages are fetched and
+        parsed concurrently (see --workers), or fetched concurrently and
+        parsed in worker processes (see --processes). Returns list of
+        (location, weather_info) pairs in the order of locations.
+
+        :param argv: list of passed arguments
+        :param locations: (name, url) pairs, defaults to all configured
+                          locations of the provider
+        :type locations: list
+        """
+
+        locations = locations or self.locations
+        if locations == [(self.location, self.url)]:
+            return [(self.location, self.run(argv))]
+
+        urls = list(OrderedDict.fromkeys(url for name, url in locations))
+        workers = max(1, min(getattr(self.app.options, 'workers', 1),
+                             len(urls)))
+        if self.app.parsepool.is_enabled(len(urls)):
+            weather_info = self._run_urls_in_processes(urls, workers)
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                weather_info = dict(zip(urls,
+                                        executor.map(self._run_url, urls)))
+        return [(name, weather_info[url]) for name, url in locations]
+
+    def _run_urls_in_processes(self, urls, workers):
+        """ Fetch pages of the urls concurrently and parse the pages
+        which have no cached parse result in worker processes. Returns
+        dict of weather information by url.
+        """
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            loaded = list(executor.map(self.get_weather_or_page, urls))
+
+        weather_info = {}
+        pending = []
+        for url, (info, page) in zip(urls, loaded):
+            if page is None:
+                weather_info[url] = info
+            else:
+                pending.append((url, page))
+        if not pending:
+            return weather_info
+
+        with self.app.metrics.span('parse', provider=self.get_name()):
+            parsed = self.app.parsepool.parse(
+                self, [page[0] for url, page in pending])
+        for (url, page), info in zip(pending, parsed):
+            if info is None:
+                info = self.get_weather_info(page[0].decode('utf-8'))
+            weather_info[url] = self.set_weather(url, page, info)
+        return weather_info
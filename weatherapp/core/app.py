@@ -2,9 +2,20 @@
 """
 
 import sys
+import time
 import logging
 from argparse import ArgumentParser
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
 from weatherapp.core import config
+from weatherapp.core import logconfig
+from weatherapp.core.cache import MemoryCache, SingleFlight, Revalidator
+from weatherapp.core.cachemanager import CacheManager
+from weatherapp.core.parsermanager import ParserManager
+from weatherapp.core.parsepool import ParsePool
+from weatherapp.core.httpsession import SessionManager
+from weatherapp.core.metrics import Metrics
+from weatherapp.core.history import HistoryStore
 from weatherapp.core.formattermanager import FormatterManager
 from weatherapp.core.commandmanager import CommandManager
 from weatherapp.core.providermanager import ProviderManager
@@ -18,15 +29,30 @@ class App:
     LOG_LEVEL_MAP = {0: logging.WARNING,
                      1: logging.INFO,
                      2: logging.DEBUG}
+    # arguments passed to formatters as render options
+    FORMATTER_OPTIONS = ('align', 'padding_width', 'vertical_char',
+                         'horizontal_char', 'set_style')
 
     def __init__(self, stdin=None, stdout=None, stderr=None):
         self.stdin = stdin or sys.stdin
         self.stdout = stdout or sys.stdout
         self.stderr = stderr or sys.stderr
         self.arg_parser = self._arg_parser()
-        self.providermanager = ProviderManager()
+        self.metrics = Metrics()
+        with self.metrics.span('discover'):
+            self.providermanager = ProviderManager()
         self.commandmanager = CommandManager()
         self.formattermanager = FormatterManager()
+        self.cachemanager = CacheManager()
+        self.parsermanager = ParserManager()
+        self.parsepool = ParsePool()
+        self.sessionmanager = SessionManager(metrics=self.metrics)
+        self.memorycache = MemoryCache()
+        self.singleflight = SingleFlight()
+        self.revalidator = Revalidator()
+        self.history = HistoryStore()
+        self.cache = None
+        self.providers = {}
 
     @staticmethod
     def _arg_parser():
@@ -52,6 +78,15 @@ class App:
         arg_parser.add_argument(
             '--regexp', help='html parsing is done using regular expressions.',
             action='store_true')
+        arg_parser.add_argument(
+            '--parser', help='Html parser backend: "html.parser" - '
+            'BeautifulSoup, "lxml" - C-backed lxml, "regex" - regular '
+            'expressions. Defaults to the "parser" option of the provider '
+            'configuration or {}.'.format(config.PARSER))
+        arg_parser.add_argument(
+            '--stream', help='Parse pages while they are downloaded and '
+            'stop reading once all weather fields are found.',
+            action='store_true')
         arg_parser.add_argument(
             '--align', help='Change the alignment of all the columns. '
             'The allowed strings are "l", "r" and "c" for left, right and '
@@ -60,7 +95,7 @@ class App:
         arg_parser.add_argument(
             '-p_w', '--padding_width', help='Number of spaces on either '
             'side of column data. Defaults is 1.',
-            default=1, nargs='?')
+            default=1, type=int, nargs='?')
         arg_parser.add_argument(
             '-v_char', '--vertical_char', help='Single character string '
             'used to draw vertical lines. Default is "|".',
@@ -82,44 +117,94 @@ class App:
         arg_parser.add_argument(
             '-f', '--formatter', default='table',
             nargs='?', help="Output format, defaults to table.")
+        arg_parser.add_argument(
+            '--workers', help='Number of providers fetched concurrently. '
+            'Use 1 to run providers one after another. Defaults to {}.'
+            .format(config.DEFAULT_WORKERS),
+            type=int, default=config.DEFAULT_WORKERS)
+        arg_parser.add_argument(
+            '--processes', help='Number of processes pages of a provider '
+            'with many locations are parsed in. Use 1 to parse in the main '
+            'process. Defaults to {}.'.format(config.PARSE_PROCESSES),
+            type=int, default=config.PARSE_PROCESSES)
+        arg_parser.add_argument(
+            '--deadline', help='Time in seconds every provider is given to '
+            'finish its run, extended by the time requests of its locations '
+            'wait for the per-host rate limits. Defaults to {}.'
+            .format(config.PROVIDER_DEADLINE),
+            type=float, default=config.PROVIDER_DEADLINE)
+        arg_parser.add_argument(
+            '--cache_backend', help='Page cache backend: "files" - one '
+            'file per page, "sqlite" - single indexed database. '
+            'Defaults to {}.'.format(config.CACHE_BACKEND),
+            default=config.CACHE_BACKEND)
+        arg_parser.add_argument(
+            '--stale_while_revalidate', help='Expired pages younger than '
+            'this many seconds past expiry are shown at once and refreshed '
+            'in background. Use 0 to always wait for a fresh page. '
+            'Defaults to {}.'.format(config.CACHE_STALE_WHILE_REVALIDATE),
+            type=float, default=config.CACHE_STALE_WHILE_REVALIDATE)
+        arg_parser.add_argument(
+            '--max_stale', help='When the site can not be reached, show '
+            'cached pages up to this many seconds past expiry. '
+            'Defaults to {}.'.format(config.CACHE_MAX_STALE),
+            type=float, default=config.CACHE_MAX_STALE)
+        arg_parser.add_argument(
+            '--log_file', help='File the log is written to, use an empty '
+            'value to write no log file. Defaults to {}.'
+            .format(config.LOG_FILE), default=config.LOG_FILE)
+        arg_parser.add_argument(
+            '--log_max_bytes', help='Size in bytes the log file is rotated '
+            'at, 0 - never. Defaults to {}.'.format(config.LOG_MAX_BYTES),
+            type=int, default=config.LOG_MAX_BYTES)
+        arg_parser.add_argument(
+            '--log_backup_count', help='Number of rotated log files kept. '
+            'Defaults to {}.'.format(config.LOG_BACKUP_COUNT),
+            type=int, default=config.LOG_BACKUP_COUNT)
+        arg_parser.add_argument(
+            '--timings', help='Show time spent in every stage of the run '
+            'per provider and command.', action='store_true')
+        arg_parser.add_argument(
+            '--profile', help='Save cProfile statistics of the run to the '
+            'file, read them with python -m pstats FILE. Providers are run '
+            'one after another, as with --workers 1 --processes 1.',
+            metavar='FILE')
+        arg_parser.add_argument(
+            '--trace', help='Save stages of the run to the file in Chrome '
+            'trace format, open it in chrome://tracing or Perfetto.',
+            metavar='FILE')
+        arg_parser.add_argument(
+            '--metrics_file', help='Save metrics of the run to the file in '
+            'Prometheus text format.', metavar='FILE')
+        arg_parser.add_argument(
+            '--consensus', help='After the providers, show mean, median, '
+            'spread and outliers of their weather per location.',
+            action='store_true')
+        arg_parser.add_argument(
+            '--no_history', help='Do not store observations of the run in '
+            'the history (see the history command).', action='store_true')
 
         return arg_parser
 
     def configurate_logging(self):
-        """ Create logging handlers for any log output.
+        """ Send log output through the logging queue, see
+        logconfig.setup_logging. Handlers are created by the first run
+        of the process, later runs only change the console level.
         """
 
-        # create logger
-        root_logger = logging.getLogger('')
-        root_logger.setLevel(logging.DEBUG)
-
-        # create file write handler and set level to debug
-        file_write = logging.FileHandler(filename="weatherapp.log")
-        file_write.setLevel(logging.DEBUG)
+        logconfig.setup_logging(
+            console_level=self.LOG_LEVEL_MAP.get(self.options.verbose_level,
+                                                 logging.WARNING),
+            path=self.options.log_file,
+            max_bytes=self.options.log_max_bytes,
+            backup_count=self.options.log_backup_count)
 
-        # create formatter add formatter to file write
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s'
-                                      ' - ' + config.DEFAULT_MESSAGE_FORMAT)
-        file_write.setFormatter(formatter)
-
-        # add file write to logger
-        root_logger.addHandler(file_write)
-
-        # create console handler and set level to debug
-        console = logging.StreamHandler()
-        console_level = self.LOG_LEVEL_MAP.get(self.options.verbose_level,
-                                               logging.WARNING)
-        console.setLevel(console_level)
-
-        # create formatter
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s'
-                                      ' - ' + config.DEFAULT_MESSAGE_FORMAT)
-
-        # add formatter to console
-        console.setFormatter(formatter)
+    def get_formatter_options(self):
+        """ Return render options for formatters from parsed arguments.
+        """
 
-        # add console to logger
-        root_logger.addHandler(console)
+        return {name: getattr(self.options, name, None)
+                for name in self.FORMATTER_OPTIONS}
 
     def output_weather_info(self, title, location, data):
         """ Displays the result of the received values the state of
@@ -134,7 +219,8 @@ class App:
                 columns = [location, 'tomorrow']
             else:
                 columns = [location, 'today']
-            formatter().emit(columns, data)
+            formatter(self.get_formatter_options(),
+                      self.stdout).emit(columns, data)
             self.stdout.write('\n')
         else:
             self.stdout.write('{}:\n'.format(title))
@@ -151,12 +237,51 @@ class App:
             self.stdout.write("=" * 40)
             self.stdout.write('\n\n')
 
+    def output_locations(self, title, results):
+        """ Displays weather of many locations of one provider as a single
+            table, one row per location.
+
+        :param title: provider title
+        :type title: str
+        :param results: (location, weather_info) pairs
+        :type results: list
+        """
+
+        if len(results) == 1:
+            return self.output_weather_info(title, *results[0])
+
+        keys = list(OrderedDict.fromkeys(
+            key for location, data in results for key in data))
+        column_names = ['location'] + keys
+        rows = [[location] + [data.get(key, '') for key in keys]
+                for location, data in results]
+
+        formatter_name = self.options.formatter
+        if formatter_name:
+            formatter = self.formattermanager.get(formatter_name)
+            self.stdout.write('{}: \n'.format(title))
+            formatter(self.get_formatter_options(),
+                      self.stdout).emit_rows(column_names, rows)
+            self.stdout.write('\n')
+        else:
+            self.stdout.write('{}:\n'.format(title))
+            self.stdout.write('*' * 12)
+            self.stdout.write('\n')
+            for row in rows:
+                self.stdout.write('; '.join(
+                    '{0}: {1}'.format(key, value)
+                    for key, value in zip(column_names, row)))
+                self.stdout.write('\n')
+            self.stdout.write("=" * 40)
+            self.stdout.write('\n\n')
+
     def run_command(self, name, argv):
         """ Run command
         """
         command = self.commandmanager.get(name)
         try:
-            command(self).run(argv)
+            with self.metrics.span('command', command=name):
+                command(self).run(argv)
         except Exception:
             msg = "Error during command: %s run"
             if self.options.debug:
@@ -164,26 +289,222 @@ class App:
             else:
                 self.logger.error(msg, name)
 
+    def configurate_cache(self):
+        """ Create page cache backend selected by --cache_backend.
+        """
+
+        name = self.options.cache_backend
+        if self.cache is not None and self.cache.name == name:
+            return
+        backend = self.cachemanager.get(name)
+        if backend is None:
+            self.logger.error('Unknown cache backend %r, using %r', name,
+                              config.CACHE_BACKEND)
+            backend = self.cachemanager.get(config.CACHE_BACKEND)
+        if self.cache is not None:
+            self.cache.close()
+        self.cache = backend()
+
+    def get_provider(self, name):
+        """ Return provider instance by name.
+
+        Instances are created once and kept for the lifetime of the
+        application, so a long-running process does not re-read the
+        configuration for every query.
+        """
+
+        provider = self.providers.get(name)
+        if provider is None:
+            with self.metrics.span('load', provider=name):
+                provider_factory = self.providermanager.get(name)
+            if provider_factory:
+                with self.metrics.span('configure', provider=name):
+                    provider = self.providers[name] = provider_factory(self)
+        return provider
+
     def run_provider(self, name, argv):
         """ Run specified provider
         """
 
-        provider = self.providermanager.get(name)
+        provider = self.get_provider(name)
         if provider:
-            provider = provider(self)
-            self.output_weather_info(provider.title,
-                                     provider.location,
-                                     provider.run(argv))
+            results = self.run_locations(provider, argv)
+            with self.metrics.span('render', provider=name):
+                self.output_locations(provider.title, results)
+            self.record_history(provider, results)
+
+    def run_locations(self, provider, argv):
+        """ Run provider for all its locations, recording the run time.
+        """
+
+        with self.metrics.span('run', provider=provider.get_name()):
+            return provider.run_locations(argv)
 
     def run_providers(self, argv):
         """ Execute all available providers.
         """
 
-        for name, provider in self.providermanager:
-            provider = provider(self)
-            self.output_weather_info(provider.title,
-                                     provider.location,
-                                     provider.run(argv))
+        providers = [self.get_provider(name)
+                     for name in self.providermanager.names()]
+        all_results = []
+        for provider, results in self.run_concurrently(providers, argv):
+            with self.metrics.span('render', provider=provider.get_name()):
+                self.output_locations(provider.title, results)
+            self.record_history(provider, results)
+            all_results.extend((provider.get_name(), location, weather_info)
+                               for location, weather_info in results)
+
+        if getattr(self.options, 'consensus', False):
+            from weatherapp.core.consensus import Consensus
+            self.output_consensus(Consensus().compute(all_results))
+
+    def output_consensus(self, consensus):
+        """ Displays consensus of the providers as a table, one row per
+            location.
+
+        :param consensus: consensus of provider results
+        :type consensus: consensus.ConsensusResult
+        """
+
+        with self.metrics.span('render', command='consensus'):
+            summary = consensus.summary()
+            if summary:
+                self.output_locations('Consensus', summary)
+
+    def record_history(self, provider, results):
+        """ Append weather of today to the observation history.
+
+        Forecasts for tomorrow, stale pages (shown with their 'age') and
+        empty results are not observations and are skipped. Weather is
+        stored with the time its page was fetched, and only once per
+        page: results served from the page or parse cache to later runs
+        are not stored again. History errors are logged and never fail
+        the run.
+
+        :param provider: provider instance
+        :param results: (location, weather_info) pairs
+        :type results: list
+        """
+
+        if getattr(self.options, 'no_history', False) or \
+                getattr(self.options, 'tomorrow', None) == 'tomorrow':
+            return
+        name = provider.get_name()
+        urls = dict(getattr(provider, 'locations', ()))
+        try:
+            with self.metrics.span('history', provider=name):
+                for location, weather_info in results:
+                    if not weather_info or 'age' in weather_info:
+                        continue
+                    page_info = None
+                    if self.cache is not None and location in urls:
+                        page_info = provider.get_page_info(urls[location])
+                    if page_info is None:
+                        self.history.append(name, location, weather_info)
+                    else:
+                        digest, fetched = page_info
+                        self.history.append(name, location, weather_info,
+                                            fetched, digest)
+        except OSError:
+            self.logger.exception('Can not store history of %s', name)
+
+    def run_concurrently(self, providers, argv):
+        """ Run providers in a thread pool.
+
+        Yields (provider, results) pairs in the order the providers were
+        given, so the output stays stable no matter which fetch finishes
+        first. Results are (location, weather_info) pairs for every
+        location of the provider. Providers that do not finish in time
+        (see --deadline and get_deadline) are shown from their cached
+        pages, see get_stale_results, or logged and skipped if there are
+        no such.
+
+        :param providers: provider instances
+        :type providers: list
+        :param argv: list of passed arguments
+        """
+
+        workers = max(1, min(self.options.workers, len(providers)))
+        if workers == 1:
+            for provider in providers:
+                yield provider, self.run_locations(provider, argv)
+            return
+
+        started = {}
+
+        def run(index, provider):
+            started[index] = time.monotonic()
+            return self.run_locations(provider, argv)
+
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            futures = [executor.submit(run, index, provider)
+                       for index, provider in enumerate(providers)]
+            for index, (provider, future) in enumerate(zip(providers,
+                                                           futures)):
+                deadline = self.get_deadline(provider)
+                if self._wait_for(future, started, index, deadline):
+                    yield provider, future.result()
+                    continue
+                results = self.get_stale_results(provider)
+                if results is None:
+                    self.logger.error("Provider %s did not finish in %.1f "
+                                      "seconds", provider.get_name(),
+                                      deadline)
+                else:
+                    self.logger.warning("Provider %s did not finish in %.1f "
+                                        "seconds, showing cached pages",
+                                        provider.get_name(), deadline)
+                    yield provider, results
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_stale_results(self, provider):
+        """ Return (location, weather_info) pairs of the cached pages of
+        a provider which did not finish in time (see --max_stale), None
+        if there are no such.
+        """
+
+        if not hasattr(provider, 'get_stale_locations'):
+            return None
+        try:
+            results = provider.get_stale_locations()
+        except Exception:
+            self.logger.exception('Can not read cached pages of %s',
+                                  provider.get_name())
+            return None
+        if not any(weather_info for location, weather_info in results):
+            return None
+        return results
+
+    def get_deadline(self, provider):
+        """ Return time in seconds the provider is given to finish its
+        run: --deadline plus the time requests to the urls of all its
+        locations have to wait for the per-host rate limiters.
+        """
+
+        urls = {url for name, url in getattr(provider, 'locations', ())}
+        return self.options.deadline + \
+            self.sessionmanager.get_queue_time(urls)
+
+    def _wait_for(self, future, started, index, deadline):
+        """ Wait until provider future is done or its deadline is reached.
+        The deadline is counted from the moment provider starts running,
+        not from the moment it was queued.
+        """
+
+        while True:
+            start = started.get(index)
+            if start is None:
+                remaining = deadline
+            else:
+                remaining = start + deadline - time.monotonic()
+            done, _ = wait([future], timeout=max(remaining, 0))
+            if done:
+                return True
+            start = started.get(index)
+            if start is not None and start + deadline <= time.monotonic():
+                return False
 
     def run(self, argv):
         """ Run application.
@@ -192,8 +513,65 @@ class App:
 
         self.options, remaining_args = self.arg_parser.parse_known_args(argv)
         self.configurate_logging()
+        try:
+            if not self.options.profile:
+                result = self.dispatch(remaining_args)
+            else:
+                import cProfile
+                # the profiler sees only the thread it runs in, so
+                # providers and their pages are run in it one by one
+                self.options.workers = 1
+                self.options.processes = 1
+                profiler = cProfile.Profile()
+                try:
+                    result = profiler.runcall(self.dispatch, remaining_args)
+                finally:
+                    profiler.dump_stats(self.options.profile)
+        finally:
+            self.parsepool.shutdown()
+        self.output_metrics()
+        return result
+
+    def output_metrics(self):
+        """ Show stage timings and save the trace and metrics files, if
+        requested.
+        """
+
+        if self.options.metrics_file:
+            from weatherapp.core import prometheus
+            prometheus.write_textfile(self.metrics, self.options.metrics_file)
+
+        if self.options.trace:
+            import json
+            with open(self.options.trace, 'w') as trace_file:
+                json.dump(self.metrics.chrome_trace(), trace_file)
+
+        if not self.options.timings:
+            return
+        timings = self.metrics.timings('provider', 'command')
+        self.stderr.write('{:<10} {:<16} {:>6} {:>10} {:>10}\n'.format(
+            'stage', 'provider', 'calls', 'total ms', 'max ms'))
+        for (stage, provider, command), stats in sorted(
+                timings.items(), key=lambda item: -item[1]['total']):
+            self.stderr.write('{:<10} {:<16} {:>6} {:>10.1f} {:>10.1f}\n'
+                              .format(stage, provider or command,
+                                      stats['calls'], stats['total'] * 1000,
+                                      stats['max'] * 1000))
+        counters = self.metrics.counters()
+        for name in sorted({name for name, labels in counters}):
+            self.stderr.write('{}: {}\n'.format(name, self.metrics.get(name)))
+
+    def dispatch(self, remaining_args):
+        """ Run command or provider selected by already parsed options.
+        :param remaining_args: list of arguments not parsed by application
+        """
 
         command_name = self.options.command
+        self.configurate_cache()
+        # let concurrent fetches of one host share keep-alive connections
+        self.sessionmanager.pool_maxsize = max(
+            self.sessionmanager.pool_maxsize, self.options.workers)
+        self.parsepool.processes = self.options.processes
 
         if not command_name:
             # run all providers
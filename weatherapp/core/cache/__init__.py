@@ -0,0 +1,5 @@
+from weatherapp.core.cache.memory import MemoryCache
+from weatherapp.core.cache.files import FileCache
+from weatherapp.core.cache.sqlite import SqliteCache
+from weatherapp.core.cache.locks import SingleFlight
+from weatherapp.core.cache.revalidate import Revalidator
@@ -0,0 +1,142 @@
+""" Page cache stored as one file per url in the cache directory.
+"""
+
+import os
+import json
+import time
+import shutil
+import tempfile
+from pathlib import Path
+
+from weatherapp.core import config
+from weatherapp.core.abstract import Cache
+
+
+# key of the page size in '.meta' files, see FileCache
+SIZE_KEY = '_size'
+
+
+class FileCache(Cache):
+    """ Stores every page in its own file named by the url hash, with
+        validators in a '.meta' file next to it. Files are written to a
+        temporary file first and renamed into place.
+
+    The page and its '.meta' file are replaced one after another, so the
+    '.meta' file also holds the size of its page. A page whose '.meta'
+    file is missing or was written for a page of another size (by a
+    write in progress or interrupted between the renames) is not
+    returned, and is fetched again.
+
+    :param directory: cache directory, defaults to ~/weather_cache
+    :type directory: str or Path
+    """
+
+    name = 'files'
+
+    def __init__(self, directory=None):
+        self.directory = Path(directory or Path.home() / config.CACHE_DIR)
+
+    def _meta_path(self, key):
+        return self.directory / (key + config.CACHE_META_SUFFIX)
+
+    def _read_meta(self, key, size):
+        """ Return meta of the page of given size, None if there is no
+            such.
+        """
+
+        try:
+            with self._meta_path(key).open('r') as meta_file:
+                meta = json.load(meta_file)
+        except (OSError, ValueError):
+            return None
+        # files written before the size was stored are trusted
+        if meta.pop(SIZE_KEY, size) != size:
+            return None
+        return meta
+
+    def _write_meta(self, key, meta, size):
+        self._write(self._meta_path(key), json.dumps(
+            dict(meta, **{SIZE_KEY: size})).encode('utf-8'))
+
+    def _write(self, path, data):
+        """ Replace file content atomically, so readers never see a
+            partly written file.
+        """
+
+        descriptor, temp_path = tempfile.mkstemp(dir=str(self.directory),
+                                                 prefix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as temp_file:
+                temp_file.write(data)
+            os.replace(temp_path, str(path))
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def get(self, key):
+        path = self.directory / key
+        try:
+            updated = path.stat().st_mtime
+            with path.open('rb') as cache_file:
+                page = cache_file.read()
+        except OSError:
+            return None
+        meta = self._read_meta(key, len(page))
+        if meta is None:
+            return None
+        return page, meta, updated
+
+    def get_meta(self, key):
+        try:
+            stat = (self.directory / key).stat()
+        except OSError:
+            return None
+        meta = self._read_meta(key, stat.st_size)
+        if meta is None:
+            return None
+        return meta, stat.st_mtime
+
+    def set(self, key, page, meta):
+        if not self.directory.exists():
+            self.directory.mkdir(parents=True)
+
+        self._write(self.directory / key, page)
+        self._write_meta(key, meta, len(page))
+
+    def touch(self, key, meta):
+        path = self.directory / key
+        try:
+            os.utime(path)
+            size = path.stat().st_size
+        except FileNotFoundError:
+            return False
+        self._write_meta(key, meta, size)
+        return True
+
+    def delete(self, key):
+        for path in (self.directory / key, self._meta_path(key)):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        if self.directory.exists():
+            shutil.rmtree(self.directory)
+
+    def compact(self, max_age=config.CACHE_RETENTION):
+        if not self.directory.exists():
+            return
+        expired = time.time() - max_age
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.startswith('.tmp'):
+                    # left by an interrupted write
+                    if entry.stat().st_mtime < expired:
+                        os.unlink(entry.path)
+                elif entry.name.endswith(config.CACHE_META_SUFFIX):
+                    key = entry.name[:-len(config.CACHE_META_SUFFIX)]
+                    if not (self.directory / key).exists():
+                        os.unlink(entry.path)
+                elif entry.stat().st_mtime < expired:
+                    self.delete(entry.name)
@@ -0,0 +1,58 @@
+""" Per-url locks shared by threads and processes.
+"""
+
+import threading
+import contextlib
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    # no advisory file locks (Windows), only threads are synchronized
+    fcntl = None
+
+from weatherapp.core import config
+
+
+class SingleFlight:
+    """ Lets only one caller at a time work on a key.
+
+    Threads of one process wait on a per-key lock; processes wait on an
+    advisory lock of a per-key file in the lock directory, so any number
+    of wfapp processes sharing one cache fetch a url only once.
+
+    :param directory: lock files directory, defaults to
+                      ~/weather_cache.locks
+    :type directory: str or Path
+    """
+
+    def __init__(self, directory=None):
+        self.directory = Path(directory or
+                              Path.home() / config.CACHE_LOCK_DIR)
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def _thread_lock(self, key):
+        with self._guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+    @contextlib.contextmanager
+    def lock(self, key):
+        """ Hold exclusive lock of the key for the duration of the block.
+        """
+
+        with self._thread_lock(key):
+            if fcntl is None:
+                yield
+                return
+            if not self.directory.exists():
+                self.directory.mkdir(parents=True, exist_ok=True)
+            with (self.directory / (key + '.lock')).open('a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
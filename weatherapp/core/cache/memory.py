@@ -0,0 +1,118 @@
+""" In-process LRU cache placed in front of the on-disk page cache.
+"""
+
+import sys
+import time
+import threading
+from collections import OrderedDict
+
+from weatherapp.core import config
+
+
+class MemoryCache:
+    """ Bounded LRU cache with per-entry time to live.
+
+    The cache is limited both by number of entries and by total size of
+    stored values in bytes; the least recently used entries are evicted
+    first. Expired entries are dropped on access.
+
+    :param max_entries: maximum number of entries
+    :type max_entries: int
+    :param max_bytes: maximum total size of stored values
+    :type max_bytes: int
+    """
+
+    def __init__(self, max_entries=config.MEMORY_CACHE_ENTRIES,
+                 max_bytes=config.MEMORY_CACHE_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_size(value):
+        """ Return size of the value in bytes.
+        """
+
+        if isinstance(value, (bytes, bytearray, str)):
+            return len(value)
+        return sys.getsizeof(value)
+
+    def get(self, key, default=None):
+        """ Return value stored under the key if it is not expired.
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, ttl=config.CACHE_TIME):
+        """ Store value under the key for ttl seconds.
+        """
+
+        size = self.get_size(value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if ttl <= 0 or size > self.max_bytes:
+                return
+            self._entries[key] = (value, time.monotonic() + ttl, size)
+            self._size += size
+            while (len(self._entries) > self.max_entries or
+                   self._size > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def delete(self, key):
+        """ Remove entry from the cache, if any.
+        """
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def _remove(self, key):
+        """ Remove entry, lock must be held by caller.
+        """
+
+        value, expires, size = self._entries.pop(key)
+        self._size -= size
+
+    def clear(self):
+        """ Remove all entries.
+        """
+
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        """ Return cache counters.
+        """
+
+        with self._lock:
+            return {'entries': len(self._entries),
+                    'bytes': self._size,
+                    'hits': self.hits,
+                    'misses': self.misses,
+                    'evictions': self.evictions}
+
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[1] > time.monotonic()
+
+    def __len__(self):
+        return len(self._entries)
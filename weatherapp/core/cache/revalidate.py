@@ -0,0 +1,76 @@
+""" Background revalidation of stale cache entries.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from weatherapp.core import config
+
+
+class Revalidator:
+    """ Runs cache refreshes in background threads.
+
+    A key is refreshed by only one task at a time; submitting a key that
+    is already being refreshed does nothing, so a burst of requests for
+    one stale page triggers a single fetch.
+
+    :param workers: maximum number of concurrent refreshes
+    :type workers: int
+    """
+
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, workers=config.REVALIDATE_WORKERS):
+        self.workers = workers
+        self.submitted = 0
+        self.failed = 0
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def submit(self, key, function, *args):
+        """ Call function(*args) in background unless the key is being
+        refreshed already. Return True if the refresh was started.
+        """
+
+        with self._lock:
+            if key in self._pending:
+                return False
+            self._pending.add(key)
+            self.submitted += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix='revalidate')
+        self._executor.submit(self._run, key, function, *args)
+        return True
+
+    def _run(self, key, function, *args):
+        try:
+            function(*args)
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            self.logger.exception('Background refresh of %s failed', key)
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+
+    def stats(self):
+        """ Return revalidation counters.
+        """
+
+        with self._lock:
+            return {'pending': len(self._pending),
+                    'submitted': self.submitted,
+                    'failed': self.failed}
+
+    def shutdown(self, wait=True):
+        """ Stop worker threads, waiting for running refreshes by default.
+        """
+
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
@@ -0,0 +1,171 @@
+""" Page cache stored in a single indexed SQLite database.
+"""
+
+import json
+import time
+import zlib
+import sqlite3
+import threading
+from pathlib import Path
+
+from weatherapp.core import config
+from weatherapp.core.abstract import Cache
+
+
+class SqliteCache(Cache):
+    """ Stores all pages in one SQLite database file.
+
+    Lookups go through the primary key index instead of the directory,
+    pages can be compressed with zlib and the total size of stored pages
+    is kept under max_size by evicting the least recently updated
+    entries.
+
+    :param path: database file, defaults to ~/weather_cache.sqlite
+    :type path: str or Path
+    :param compression: zlib compression level, 0 disables compression
+    :type compression: int
+    :param max_size: maximum total size of stored pages in bytes,
+                     0 means unlimited
+    :type max_size: int
+    """
+
+    name = 'sqlite'
+
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS pages (
+            key TEXT PRIMARY KEY,
+            page BLOB NOT NULL,
+            meta TEXT NOT NULL,
+            updated REAL NOT NULL,
+            size INTEGER NOT NULL,
+            compressed INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS pages_updated ON pages (updated);
+    '''
+
+    def __init__(self, path=None, compression=config.CACHE_COMPRESSION,
+                 max_size=config.CACHE_MAX_SIZE):
+        self.path = Path(path or Path.home() / config.CACHE_DB)
+        self.compression = compression
+        self.max_size = max_size
+        self._connection = None
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def connection(self):
+        """ Database connection, opened on first use.
+        """
+
+        if self._connection is None:
+            if not self.path.parent.exists():
+                self.path.parent.mkdir(parents=True)
+            connection = sqlite3.connect(str(self.path), timeout=30,
+                                         check_same_thread=False)
+            # readers do not block the writer of another process; losing
+            # the last writes on power failure is fine for a cache
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.executescript(self.SCHEMA)
+            self._connection = connection
+            self._size = self._get_size()
+        return self._connection
+
+    def _get_size(self):
+        """ Return total size of stored pages.
+        """
+
+        return self._connection.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM pages').fetchone()[0]
+
+    def get(self, key):
+        with self._lock:
+            row = self.connection.execute(
+                'SELECT page, meta, updated, compressed FROM pages '
+                'WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        page, meta, updated, compressed = row
+        if compressed:
+            page = zlib.decompress(page)
+        return page, json.loads(meta), updated
+
+    def get_meta(self, key):
+        with self._lock:
+            row = self.connection.execute(
+                'SELECT meta, updated FROM pages WHERE key = ?',
+                (key,)).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, key, page, meta):
+        compressed = 0
+        if self.compression:
+            page = zlib.compress(page, self.compression)
+            compressed = 1
+        with self._lock, self.connection:
+            row = self.connection.execute(
+                'SELECT size FROM pages WHERE key = ?', (key,)).fetchone()
+            self._size += len(page) - (row[0] if row else 0)
+            self.connection.execute(
+                'INSERT OR REPLACE INTO pages '
+                '(key, page, meta, updated, size, compressed) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (key, page, json.dumps(meta), time.time(), len(page),
+                 compressed))
+            if self.max_size:
+                self._evict()
+
+    def _evict(self):
+        """ Remove oldest entries until the size limit is met, lock must
+            be held by caller.
+        """
+
+        if self._size <= self.max_size:
+            return
+        keys = []
+        for key, size in self.connection.execute(
+                'SELECT key, size FROM pages ORDER BY updated'):
+            keys.append((key,))
+            self._size -= size
+            if self._size <= self.max_size:
+                break
+        self.connection.executemany('DELETE FROM pages WHERE key = ?', keys)
+
+    def touch(self, key, meta):
+        with self._lock, self.connection:
+            cursor = self.connection.execute(
+                'UPDATE pages SET meta = ?, updated = ? WHERE key = ?',
+                (json.dumps(meta), time.time(), key))
+        return cursor.rowcount > 0
+
+    def delete(self, key):
+        with self._lock, self.connection:
+            self.connection.execute('DELETE FROM pages WHERE key = ?',
+                                    (key,))
+            self._size = self._get_size()
+
+    def clear(self):
+        with self._lock:
+            with self.connection:
+                self.connection.execute('DELETE FROM pages')
+            self._size = 0
+            self.connection.execute('VACUUM')
+
+    def compact(self, max_age=config.CACHE_RETENTION):
+        with self._lock:
+            with self.connection:
+                self.connection.execute('DELETE FROM pages WHERE updated < ?',
+                                        (time.time() - max_age,))
+                # other processes may have changed the database
+                self._size = self._get_size()
+                if self.max_size:
+                    self._evict()
+            self.connection.execute('VACUUM')
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
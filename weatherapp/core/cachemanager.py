@@ -0,0 +1,22 @@
+""" Module container for page cache backends.
+"""
+
+
+import logging
+
+from weatherapp.core import commandmanager
+from weatherapp.core.cache import FileCache, SqliteCache
+
+
+class CacheManager(commandmanager.CommandManager):
+    """ Registry of available page cache backends.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    def _load_commands(self):
+        """ Loads all existing cache backends.
+        """
+
+        for backend in [FileCache, SqliteCache]:
+            self.add(backend.name, backend)
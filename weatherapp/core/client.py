@@ -0,0 +1,51 @@
+""" Thin client sending queries to the running daemon.
+
+It imports nothing but the standard library, so a query answered by a
+warm daemon skips the application startup completely. When no daemon
+is running, or it refuses the query (see daemon.DaemonServer.query),
+the query is executed locally.
+"""
+
+import os
+import sys
+import json
+import http.client
+
+from weatherapp.core import config
+
+
+def query(argv, host=None, port=None, timeout=30):
+    """ Send arguments to the daemon and return its output.
+
+    Raises OSError if the daemon is not reachable.
+    """
+
+    host = host or os.environ.get('WFAPP_HOST', config.DAEMON_HOST)
+    port = int(port or os.environ.get('WFAPP_PORT', config.DAEMON_PORT))
+    connection = http.client.HTTPConnection(host, port, timeout=timeout)
+    try:
+        connection.request('POST', '/run', json.dumps({'argv': argv}),
+                           {'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        body = response.read().decode('utf-8')
+        if response.status != 200:
+            raise OSError('Daemon error {}: {}'.format(response.status,
+                                                       response.reason))
+        return body
+    finally:
+        connection.close()
+
+
+def main(argv=sys.argv[1:]):
+    """ Client entry point.
+    """
+
+    try:
+        sys.stdout.write(query(argv))
+    except OSError:
+        from weatherapp.core import app
+        return app.main(argv)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -2,7 +2,7 @@
 """
 
 from weatherapp.core.commands import Configurate, Providers, ClearCache,\
-    CsvWrite
+    CsvWrite, Serve, Prefetch, History, Consensus
 from weatherapp.core import abstract
 
 
@@ -28,7 +28,8 @@ class CommandManager(abstract.Manager):
     def _load_commands(self):
         """Load all external (from an entrypoints) commands."""
 
-        for command in [Configurate, Providers, ClearCache, CsvWrite]:
+        for command in [Configurate, Providers, ClearCache, CsvWrite,
+                        Serve, Prefetch, History, Consensus]:
             self.add(command.name, command)
 
     def get(self, name):
@@ -43,6 +44,12 @@ class CommandManager(abstract.Manager):
 
         return self._commands.get(name, None)
 
+    def names(self):
+        """ Return names of all registered commands without loading them.
+        """
+
+        return list(self._commands)
+
     def __getitem__(self, name):
         return self._commands[name]
 
@@ -2,3 +2,7 @@ from weatherapp.core.commands.config import Configurate
 from weatherapp.core.commands.providers import Providers
 from weatherapp.core.commands.clear_cache import ClearCache
 from weatherapp.core.commands.csv_write import CsvWrite
+from weatherapp.core.commands.serve import Serve
+from weatherapp.core.commands.prefetch import Prefetch
+from weatherapp.core.commands.history import History
+from weatherapp.core.commands.consensus import Consensus
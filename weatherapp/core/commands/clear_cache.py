@@ -1,27 +1,36 @@
-""" Remove cache directory.
+""" Remove cached pages.
 """
 
 
-from pathlib import Path
-
 from weatherapp.core.abstract import Command
-from weatherapp.core import config
 
 
 class ClearCache(Command):
-    """ Remove cache directory.
+    """ Remove all cached pages, or only outdated ones with --compact.
     """
 
     name = "clear_cache"
 
+    def get_parser(self):
+        """ Initialize argument parser for command.
+        """
+
+        parser = super(ClearCache, self).get_parser()
+        parser.add_argument('--compact', action='store_true',
+                            help='Remove only outdated pages and reclaim '
+                            'free space.')
+        return parser
+
     def run(self, argv):
         """ Run command
         """
 
-        cache_dir = Path.home() / config.CACHE_DIR
-        if cache_dir.exists():
-            for current_file in cache_dir.iterdir():
-                # To delete a folder you must first delete all the files inside
-                current_file.unlink()
-            cache_dir.rmdir()
+        parsed_args = self.get_parser().parse_args(argv)
+        if parsed_args.compact:
+            self.app.cache.compact()
+            self.app.stdout.write('Compaction completed! \n')
+            return
+
+        self.app.cache.clear()
+        self.app.memorycache.clear()
         self.app.stdout.write('Deletion completed! \n')
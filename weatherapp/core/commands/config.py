@@ -23,3 +23,5 @@ class Configurate(Command):
         provider_name = parsed_args.provider
         provider_factory = self.app.providermanager.get(provider_name)
         provider_factory(self.app).configurate()
+        # drop instance holding the previous location
+        self.app.providers.pop(provider_name, None)
@@ -0,0 +1,52 @@
+""" Consensus of all providers.
+"""
+
+
+from weatherapp.core.abstract import Command
+from weatherapp.core import config
+
+
+class Consensus(Command):
+    """ Show mean, median, spread and outliers of the weather reported
+        by all providers, per location.
+    """
+
+    name = 'consensus'
+
+    def get_parser(self):
+        """ Initialize argument parser for command.
+        """
+
+        parser = super(Consensus, self).get_parser()
+        parser.add_argument('--threshold', type=float,
+                            default=config.CONSENSUS_OUTLIER_THRESHOLD,
+                            help='Flag values further from the median than '
+                            'this many scaled median absolute deviations. '
+                            'Defaults to {}.'.format(
+                                config.CONSENSUS_OUTLIER_THRESHOLD))
+        parser.add_argument('--min_deviation', type=float,
+                            default=config.CONSENSUS_MIN_DEVIATION,
+                            help='Never flag values closer to the median '
+                            'than this (°C or m/s). Defaults to {}.'.format(
+                                config.CONSENSUS_MIN_DEVIATION))
+        return parser
+
+    def run(self, argv):
+        """ Run command.
+        """
+
+        # imported here to keep application startup fast
+        from weatherapp.core.consensus import Consensus as ConsensusStage
+
+        parsed_args, remaining_args = self.get_parser().parse_known_args(argv)
+        providers = [self.app.get_provider(name)
+                     for name in self.app.providermanager.names()]
+        results = []
+        for provider, locations in self.app.run_concurrently(
+                providers, remaining_args):
+            results.extend((provider.get_name(), location, weather_info)
+                           for location, weather_info in locations)
+            self.app.record_history(provider, locations)
+        stage = ConsensusStage(threshold=parsed_args.threshold,
+                               min_deviation=parsed_args.min_deviation)
+        self.app.output_consensus(stage.compute(results))
@@ -2,8 +2,9 @@
 """
 
 
-import csv
 from weatherapp.core.abstract import Command
+from weatherapp.core.csvstream import CsvStreamWriter
+from weatherapp.core import config
 
 
 class CsvWrite(Command):
@@ -16,21 +17,47 @@ class CsvWrite(Command):
         super().__init__(app)
         self.options = self.app.options
 
-    def run(self, argv):
-        """ Run command.
+    def get_parser(self):
+        """ Initialize argument parser for command.
         """
 
-        data = []
-        for name, provider in self.app.providermanager:
-            location = {'location': provider(self).location}
-            weather_info = provider(self).run(argv)
-            location.update(weather_info)
-            data.append(location)
+        parser = super(CsvWrite, self).get_parser()
+        parser.add_argument('-o', '--output', default=config.CSV_FILE,
+                            help='File to write, "-" for stdout. '
+                            'Defaults to {}.'.format(config.CSV_FILE))
+        parser.add_argument('--append', action='store_true',
+                            help='Append rows to existing file.')
+        parser.add_argument('--gzip', action='store_true', default=None,
+                            help='Compress output with gzip (default for '
+                            'files with .gz suffix).')
+        return parser
+
+    def run(self, argv):
+        """ Run command.
 
-            with open('data_weather.csv', 'wt') as frecord:
-                writer = \
-                    csv.DictWriter(frecord, fieldnames=list(data[0].keys()))
-                writer.writeheader()
-                writer.writerows(data)
+        Rows are written as soon as every provider result arrives.
+        """
 
-        self.app.stdout.write('Writing completed!\n')
+        parsed_args, remaining_args = self.get_parser().parse_known_args(argv)
+        if self.options.tomorrow == 'tomorrow':
+            day = 'tomorrow'
+        else:
+            day = 'today'
+
+        providers = [self.app.get_provider(name)
+                     for name in self.app.providermanager.names()]
+        writer = CsvStreamWriter(parsed_args.output, append=parsed_args.append,
+                                 compress=parsed_args.gzip,
+                                 stdout=self.app.stdout)
+        with writer:
+            for provider, results in self.app.run_concurrently(
+                    providers, remaining_args):
+                for location, weather_info in results:
+                    row = {'provider': provider.get_name(),
+                           'location': location, 'day': day}
+                    row.update(weather_info)
+                    writer.write(row)
+                self.app.record_history(provider, results)
+
+        if parsed_args.output != '-':
+            self.app.stdout.write('Writing completed!\n')
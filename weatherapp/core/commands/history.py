@@ -0,0 +1,150 @@
+""" Query stored weather observations.
+"""
+
+import re
+import time
+from collections import deque
+
+from weatherapp.core.abstract import Command
+from weatherapp.core import config
+
+DURATION_RE = re.compile(r'^(\d+(?:\.\d+)?)([smhdw]?)$')
+
+DURATION_UNITS = {'': 1, 's': 1, 'm': 60, 'h': 3600, 'd': 86400,
+                  'w': 7 * 86400}
+
+TIME_FORMATS = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%dT%H:%M:%S',
+                '%Y-%m-%dT%H:%M', '%Y-%m-%d')
+
+
+def parse_duration(value):
+    """ Return number of seconds in a duration like '90', '15m', '6h',
+    '7d' or '2w'.
+    """
+
+    match = DURATION_RE.match(value.strip())
+    if match is None:
+        raise ValueError('Bad duration: {!r}'.format(value))
+    return float(match.group(1)) * DURATION_UNITS[match.group(2)]
+
+
+def parse_time(value, now=None):
+    """ Return timestamp of a local date and time like '2020-01-31' or
+    '2020-01-31 12:00', or of a duration before now like '7d'.
+    """
+
+    now = time.time() if now is None else now
+    for time_format in TIME_FORMATS:
+        try:
+            return time.mktime(time.strptime(value, time_format))
+        except ValueError:
+            continue
+    return now - parse_duration(value)
+
+
+def format_value(value):
+    """ Format numeric value of an observation for output.
+    """
+
+    if value is None:
+        return ''
+    if isinstance(value, float):
+        return '{:.1f}'.format(value).rstrip('0').rstrip('.')
+    return str(value)
+
+
+class History(Command):
+    """ Show observations stored after provider runs, raw or averaged
+        over intervals per location.
+    """
+
+    name = 'history'
+
+    def get_parser(self):
+        """ Initialize argument parser for command.
+        """
+
+        parser = super(History, self).get_parser()
+        parser.add_argument('--provider', help='Show only this provider.')
+        parser.add_argument('--location', help='Show only this location.')
+        parser.add_argument('--since', help='Start of the range: local date '
+                            'and time like "2020-01-31 12:00" or a '
+                            'duration before now like "7d" or "12h". '
+                            'Defaults to the oldest observation.')
+        parser.add_argument('--until', help='End of the range, same format '
+                            'as --since. Defaults to the newest '
+                            'observation.')
+        parser.add_argument('--every', help='Average observations over '
+                            'intervals like "1h" or "1d" per location.')
+        parser.add_argument('--limit', type=int, default=config.HISTORY_LIMIT,
+                            help='Show only the last rows, 0 for all. '
+                            'Defaults to {}.'.format(config.HISTORY_LIMIT))
+        parser.add_argument('--count', action='store_true',
+                            help='Only count observations in the range.')
+        parser.add_argument('--prune', nargs='?', type=parse_duration,
+                            const=config.HISTORY_RETENTION_DAYS * 86400,
+                            metavar='AGE', help='Remove days of history '
+                            'older than AGE, defaults to {} days.'.format(
+                                config.HISTORY_RETENTION_DAYS))
+        return parser
+
+    def run(self, argv):
+        """ Run command
+        """
+
+        parsed_args = self.get_parser().parse_args(argv)
+        history = self.app.history
+
+        if parsed_args.prune is not None:
+            removed = history.prune(time.time() - parsed_args.prune)
+            self.app.stdout.write('Removed {} days of history \n'.format(
+                removed))
+            return
+
+        start = parse_time(parsed_args.since) if parsed_args.since else None
+        end = parse_time(parsed_args.until) if parsed_args.until else None
+        selection = {'start': start, 'end': end,
+                     'provider': parsed_args.provider,
+                     'location': parsed_args.location}
+
+        if parsed_args.count:
+            self.app.stdout.write('{} \n'.format(history.count(**selection)))
+            return
+
+        if parsed_args.every:
+            rows = history.downsample(parse_duration(parsed_args.every),
+                                      **selection)
+            column_names = ['time', 'provider', 'location', 'count', 'cond',
+                            'temp', 'temp_min', 'temp_max'] + \
+                [name for name in history.fields if name != 'temp']
+        else:
+            rows = history.query(**selection)
+            column_names = ['time', 'provider', 'location', 'cond'] + \
+                list(history.fields)
+
+        # keep only the last rows without building the whole list
+        rows = deque(rows, maxlen=parsed_args.limit or None)
+        self.output(column_names, [
+            [time.strftime('%Y-%m-%d %H:%M', time.localtime(row['time']))] +
+            [format_value(row[name]) for name in column_names[1:]]
+            for row in rows])
+
+    def output(self, column_names, rows):
+        """ Display rows with the selected formatter.
+        """
+
+        if not rows:
+            self.app.stdout.write('No observations found \n')
+            return
+
+        formatter_name = self.app.options.formatter
+        if formatter_name:
+            formatter = self.app.formattermanager.get(formatter_name)
+            formatter(self.app.get_formatter_options(),
+                      self.app.stdout).emit_rows(column_names, rows)
+        else:
+            for row in rows:
+                self.app.stdout.write('; '.join(
+                    '{0}: {1}'.format(key, value)
+                    for key, value in zip(column_names, row)))
+                self.app.stdout.write('\n')
@@ -0,0 +1,40 @@
+""" Keep provider pages cached by refreshing them before expiry.
+"""
+
+
+import time
+
+from weatherapp.core.abstract import Command
+from weatherapp.core.scheduler import PrefetchScheduler
+
+
+class Prefetch(Command):
+    """ Refresh cache of all configured providers in the foreground
+        until interrupted.
+    """
+
+    name = 'prefetch'
+
+    def get_parser(self):
+        """ Initialize argument parser for command.
+        """
+
+        parser = super(Prefetch, self).get_parser()
+        parser.add_argument('--interval', default=60, type=float,
+                            help='Seconds between statistics reports.')
+        return parser
+
+    def run(self, argv):
+        """ Run command
+        """
+
+        parsed_args = self.get_parser().parse_args(argv)
+        scheduler = PrefetchScheduler(self.app)
+        scheduler.track_providers()
+        scheduler.start()
+        try:
+            while True:
+                time.sleep(parsed_args.interval)
+                self.app.logger.info('prefetch stats: %s', scheduler.stats())
+        finally:
+            scheduler.stop()
@@ -11,5 +11,5 @@ class Providers(Command):
         """ Run command
         """
 
-        for name, provider in self.app.providermanager:
+        for name in self.app.providermanager.names():
             self.app.stdout.write('{} \n'.format(name))
@@ -0,0 +1,57 @@
+""" Run application as a long-running daemon.
+"""
+
+
+from weatherapp.core.abstract import Command
+from weatherapp.core.scheduler import PrefetchScheduler
+from weatherapp.core import config
+
+
+class Serve(Command):
+    """ Serve queries from the thin client (wfappc) over local HTTP.
+    """
+
+    name = 'serve'
+
+    def get_parser(self):
+        """ Initialize argument parser for command.
+        """
+
+        parser = super(Serve, self).get_parser()
+        parser.add_argument('--host', default=config.DAEMON_HOST,
+                            help='Address to listen on.')
+        parser.add_argument('--port', default=config.DAEMON_PORT, type=int,
+                            help='Port to listen on.')
+        parser.add_argument('--prefetch', action='store_true',
+                            help='Refresh cached pages in the background '
+                            'before they expire.')
+        parser.add_argument('--metrics_file', metavar='FILE',
+                            help='Write metrics in Prometheus text format '
+                            'to the file every {} seconds, e.g. for the '
+                            'node exporter textfile collector.'.format(
+                                config.METRICS_FILE_INTERVAL))
+        return parser
+
+    def run(self, argv):
+        """ Run command
+        """
+
+        from weatherapp.core.daemon import DaemonServer
+
+        parsed_args = self.get_parser().parse_args(argv)
+        server = DaemonServer(self.app, (parsed_args.host, parsed_args.port))
+        server.metrics_file = parsed_args.metrics_file
+        self.app.stdout.write('Serving on {}:{} \n'.format(
+            *server.server_address))
+        self.app.stdout.flush()
+        if parsed_args.prefetch:
+            server.scheduler = PrefetchScheduler(self.app)
+            server.scheduler.track_providers()
+            server.scheduler.start()
+        try:
+            server.serve_forever()
+        finally:
+            if server.scheduler:
+                server.scheduler.stop()
+            server.server_close()
+            self.app.sessionmanager.close()
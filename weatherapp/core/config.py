@@ -5,16 +5,158 @@
 DEFAULT_VERBOSE_LEVEL = 0
 DEFAULT_MESSAGE_FORMAT = '%(message)s'
 
+# Log file, size in bytes it is rotated at (0 - never), number of rotated
+# files kept and seconds a repeated error of one host is not logged for.
+LOG_FILE = 'weatherapp.log'
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUP_COUNT = 3
+LOG_REPEAT_INTERVAL = 60
+# Level of library loggers which log a record for every request, e.g. a
+# warning for every retry of urllib3 (SessionManager counts retries).
+LOG_LIBRARY_LEVELS = {'urllib3.connectionpool': 'ERROR'}
+
 # A file in which the data about the city and the address for which weather
 # conditions will be displayed will be recorded.
 CONFIG_LOCATION = 'Location'
 CONFIG_FILE = 'weatherapp.ini'
 
+# Suffix of the configuration section listing additional locations of
+# a provider, e.g. [accu:locations].
+CONFIG_LOCATIONS_SUFFIX = ':locations'
+
 # The directory where the cached data will be stored.
 CACHE_DIR = 'weather_cache'
 
+# Suffix of the file with response validators stored next to a cached page.
+CACHE_META_SUFFIX = '.meta'
+
+# Page cache backend: "files" keeps one file per page in CACHE_DIR,
+# "sqlite" keeps all pages in the CACHE_DB database.
+CACHE_BACKEND = 'files'
+CACHE_DB = 'weather_cache.sqlite'
+
+# zlib compression level of cached pages (0 - no compression) and maximum
+# total size of cached pages in bytes (0 - unlimited), sqlite backend only.
+CACHE_COMPRESSION = 0
+CACHE_MAX_SIZE = 256 * 1024 * 1024
+
+# Entries not updated for this many seconds are removed on compaction.
+CACHE_RETENTION = 24 * 60 * 60
+
+# Directory of lock files which let only one process fetch a url at a time.
+CACHE_LOCK_DIR = 'weather_cache.locks'
+
+# Prefix of cache keys under which parsed weather information is stored.
+PARSED_CACHE_PREFIX = 'parsed-'
+
 # The time at which you want to update the cache.
 CACHE_TIME = 300
 
+# Expired pages younger than CACHE_STALE_WHILE_REVALIDATE seconds past
+# their expiry are served at once and refreshed in background; when the
+# site can not be reached, pages up to CACHE_MAX_STALE seconds past expiry
+# are served instead of an error. REVALIDATE_WORKERS limits concurrent
+# background refreshes.
+CACHE_STALE_WHILE_REVALIDATE = 10 * 60
+CACHE_MAX_STALE = 24 * 60 * 60
+REVALIDATE_WORKERS = 2
+
+# Limits of the in-process page cache kept in front of the cache directory.
+MEMORY_CACHE_ENTRIES = 256
+MEMORY_CACHE_BYTES = 32 * 1024 * 1024
+
+# Default html parser backend of providers: "html.parser" (BeautifulSoup),
+# "lxml" or "regex".
+PARSER = 'html.parser'
+
+# Size of chunks a page is read in when it is parsed while downloaded.
+STREAM_CHUNK_SIZE = 16 * 1024
+
 # entry points group for providers
 PROVIDER_EP_NAMESPACE = 'weatherapp.provider'
+
+# Number of providers fetched concurrently and the time (in seconds)
+# every single provider is given to finish its run.
+DEFAULT_WORKERS = 4
+PROVIDER_DEADLINE = 10
+
+# Pages of one provider run parsed in worker processes: number of
+# processes (1 parses in the main process), pages sent to a worker at
+# once, the smallest batch worth the processes and how they are started.
+PARSE_PROCESSES = 1
+PARSE_CHUNK_SIZE = 8
+PARSE_POOL_MIN_PAGES = 4
+PARSE_POOL_START_METHOD = 'spawn'
+
+# HTTP connection pooling and retry policy shared by all providers.
+HTTP_TIMEOUT = 5
+HTTP_POOL_CONNECTIONS = 10
+HTTP_POOL_MAXSIZE = 10
+HTTP_RETRIES = 2
+HTTP_BACKOFF_FACTOR = 0.3
+HTTP_RETRY_STATUSES = (429, 500, 502, 503, 504)
+HTTP_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (X11; Ubuntu; Linux x86_64;)',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+}
+
+# Per-host request limits: every host gets HTTP_RATE_LIMIT requests per
+# second with bursts of up to HTTP_RATE_BURST requests (0 - no limit),
+# hosts listed in HTTP_HOST_RATE_LIMITS get their own (rate, burst).
+HTTP_RATE_LIMIT = 5
+HTTP_RATE_BURST = 10
+HTTP_HOST_RATE_LIMITS = {}
+
+# After CIRCUIT_FAILURES consecutive failed requests to a host, requests
+# to it fail at once for CIRCUIT_RESET_TIMEOUT seconds, then one probe
+# request decides whether the host is back.
+CIRCUIT_FAILURES = 5
+CIRCUIT_RESET_TIMEOUT = 30
+
+# Address the daemon (see "serve" command) listens on.
+DAEMON_HOST = '127.0.0.1'
+DAEMON_PORT = 8734
+# Commands which run until interrupted and options which write files or
+# report on the whole run are refused by the daemon, the thin client
+# runs such queries locally.
+DAEMON_LOCAL_COMMANDS = ('prefetch', 'serve')
+DAEMON_LOCAL_OPTIONS = ('timings', 'profile', 'trace', 'metrics_file')
+
+# Background prefetch: number of concurrent refreshes, how many seconds
+# before expiry a page is refreshed, random spread of refresh times and
+# delay before a failed refresh is retried.
+PREFETCH_WORKERS = 2
+PREFETCH_LEAD_TIME = 30
+PREFETCH_JITTER = 15
+PREFETCH_RETRY_INTERVAL = 60
+
+# Number of most recent timing spans kept by the metrics registry, upper
+# bounds (in seconds) of latency histogram buckets and prefix of metric
+# names in Prometheus format.
+METRICS_MAX_SPANS = 10000
+METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+METRICS_NAMESPACE = 'weatherapp'
+
+# How often (in seconds) the daemon rewrites its metrics file.
+METRICS_FILE_INTERVAL = 15
+
+# Default csv file and column schema used by csv_write command.
+CSV_FILE = 'data_weather.csv'
+CSV_FIELDS = ('provider', 'location', 'day', 'cond', 'temp', 'feels_like',
+              'wind')
+
+# Observation history: store directory, numeric fields kept as columns,
+# how many days of history the history command keeps with --prune and
+# default number of rows it shows.
+HISTORY_DIR = 'weather_history'
+HISTORY_FIELDS = ('temp', 'feels_like', 'wind')
+HISTORY_RETENTION_DAYS = 90
+HISTORY_LIMIT = 50
+
+# Consensus of providers: numeric fields compared, outlier threshold in
+# scaled median absolute deviations and deviation from the median which
+# is never an outlier (°C or m/s).
+CONSENSUS_FIELDS = ('temp', 'feels_like', 'wind')
+CONSENSUS_OUTLIER_THRESHOLD = 3.0
+CONSENSUS_MIN_DEVIATION = 3.0
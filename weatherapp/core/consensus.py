@@ -0,0 +1,292 @@
+""" Consensus of the weather reported by many providers.
+"""
+
+import math
+import statistics
+from collections import Counter, OrderedDict
+
+from weatherapp.core import config
+from weatherapp.core.observation import Observation, Condition
+
+# consistency constant of the median absolute deviation for normally
+# distributed values
+MAD_SCALE = 1.4826
+
+
+def get_numpy():
+    """ Return numpy module, None if it is not installed.
+
+    numpy is imported on first use only, it takes longer to import than
+    the rest of the application.
+    """
+
+    try:
+        import numpy
+    except ImportError:
+        # statistics are computed with plain Python, see Consensus.compute
+        return None
+    return numpy
+
+
+class ConsensusResult:
+    """ Statistics of every location over the providers which reported
+        it.
+
+    Per-location statistics are sequences indexed like locations, the
+    outlier flags are sequences indexed like the input results.
+
+    :param locations: location names, in order of first appearance
+    :type locations: list
+    :param results: (provider, location) pairs of the input results
+    :type results: list
+    :param stats: field name -> statistic name ('count', 'mean',
+                  'median', 'std', 'min', 'max', 'spread') -> values
+    :type stats: dict
+    :param outliers: field name -> outlier flag of every result
+    :type outliers: dict
+    :param conditions: most frequent Condition of every location
+    :type conditions: list
+    """
+
+    def __init__(self, locations, results, stats, outliers, conditions):
+        self.locations = locations
+        self.results = results
+        self.stats = stats
+        self.outliers = outliers
+        self.conditions = conditions
+
+    @staticmethod
+    def format_number(value):
+        if value != value:
+            return ''
+        return '{:.1f}'.format(value)
+
+    def get_outliers(self):
+        """ Return dict of (provider, field) pairs flagged as outliers by
+        location.
+        """
+
+        flagged = {}
+        for name, flags in self.outliers.items():
+            for (provider, location), flag in zip(self.results, flags):
+                if flag:
+                    flagged.setdefault(location, []).append((provider, name))
+        return flagged
+
+    def summary(self):
+        """ Return (location, consensus) pairs, consensus is an ordered
+        dict of texts to display: number of providers, condition, mean,
+        median and spread of every field and the outliers.
+        """
+
+        flagged = self.get_outliers()
+        providers = Counter(location for provider, location in self.results)
+        summary = []
+        for index, location in enumerate(self.locations):
+            data = OrderedDict()
+            data['providers'] = providers[location]
+            condition = Condition(self.conditions[index])
+            data['cond'] = condition.name.lower().replace('_', ' ') \
+                if condition else ''
+            for name, stats in self.stats.items():
+                data[name] = self.format_number(stats['mean'][index])
+                data[name + ' median'] = self.format_number(
+                    stats['median'][index])
+                data[name + ' spread'] = self.format_number(
+                    stats['spread'][index])
+            data['outliers'] = ', '.join(
+                '{} ({})'.format(provider, name)
+                for provider, name in flagged.get(location, []))
+            summary.append((location, data))
+        return summary
+
+
+class Consensus:
+    """ Computes per-location mean, median, spread and outliers of the
+        numeric fields reported by many providers.
+
+    A value is an outlier when it deviates from the median of its
+    location by more than threshold scaled median absolute deviations
+    and by more than min_deviation; at least three values are needed to
+    tell an outlier.
+
+    With numpy installed (pip install weatherapp.core[numpy]) all
+    locations are computed at once on batched arrays; otherwise the
+    same statistics are computed location by location.
+
+    :param fields: numeric fields of observation.Observation
+    :type fields: tuple
+    :param threshold: outlier threshold in scaled MADs
+    :type threshold: float
+    :param min_deviation: deviation from the median that is never an
+                          outlier, in units of the field
+    :type min_deviation: float
+    :param use_numpy: use numpy, by default when it is installed
+    :type use_numpy: bool
+    """
+
+    def __init__(self, fields=config.CONSENSUS_FIELDS,
+                 threshold=config.CONSENSUS_OUTLIER_THRESHOLD,
+                 min_deviation=config.CONSENSUS_MIN_DEVIATION,
+                 use_numpy=None):
+        self.fields = tuple(fields)
+        self.threshold = threshold
+        self.min_deviation = min_deviation
+        if use_numpy is None or use_numpy:
+            use_numpy = get_numpy() is not None
+        self.use_numpy = use_numpy
+
+    def compute(self, results):
+        """ Return ConsensusResult of the results.
+
+        :param results: (provider, location, weather) triples, weather is
+                        an Observation, a weather_info dict or None
+        :type results: iterable
+        """
+
+        observations = [(provider, location,
+                         Observation.from_weather_info(weather))
+                        for provider, location, weather in results if weather]
+        locations = OrderedDict()
+        index = [locations.setdefault(location, len(locations))
+                 for provider, location, observation in observations]
+        conditions = [int(observation.condition)
+                      for provider, location, observation in observations]
+        columns = {}
+        for name in self.fields:
+            columns[name] = [getattr(observation, name)
+                             for provider, location, observation
+                             in observations]
+            columns[name] = [math.nan if value is None else value
+                             for value in columns[name]]
+        pairs = [(provider, location)
+                 for provider, location, observation in observations]
+
+        compute = self._compute_numpy if self.use_numpy else \
+            self._compute_python
+        stats, outliers, modes = compute(index, columns, conditions,
+                                         len(locations))
+        return ConsensusResult(list(locations), pairs, stats, outliers,
+                               modes)
+
+    def _compute_numpy(self, index, columns, conditions, size):
+        """ Compute statistics of all locations at once.
+        """
+
+        if not index:
+            return self._compute_python(index, columns, conditions, size)
+
+        np = get_numpy()
+        index = np.asarray(index, dtype=np.intp)
+        # first row of every location among rows sorted by location
+        starts = np.searchsorted(np.sort(index), np.arange(size))
+        stats, outliers = {}, {}
+        for name, column in columns.items():
+            values = np.asarray(column, dtype=float)
+            valid = ~np.isnan(values)
+            count = np.bincount(index, weights=valid, minlength=size)
+            total = np.bincount(index, weights=np.where(valid, values, 0),
+                                minlength=size)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                mean = total / count
+                squares = np.bincount(index, weights=np.where(
+                    valid, (values - mean[index]) ** 2, 0), minlength=size)
+                std = np.sqrt(squares / count)
+
+            # values sorted by location, NaN last within every location
+            ordered = values[np.lexsort((values, index))]
+            count = count.astype(np.intp)
+            median = self._median_numpy(ordered, starts, count)
+            low = self._take_numpy(ordered, starts, count)
+            high = self._take_numpy(ordered, starts + count - 1, count)
+
+            deviation = np.abs(values - median[index])
+            mad = self._median_numpy(
+                deviation[np.lexsort((deviation, index))], starts, count)
+            limit = np.maximum(self.threshold * MAD_SCALE * mad[index],
+                               self.min_deviation)
+            with np.errstate(invalid='ignore'):
+                outliers[name] = valid & (count[index] >= 3) & \
+                    (deviation > limit)
+            stats[name] = {'count': count, 'mean': mean, 'median': median,
+                           'std': std, 'min': low, 'max': high,
+                           'spread': high - low}
+
+        # most frequent known condition of every location
+        kinds = len(Condition)
+        votes = np.bincount(index * kinds + np.asarray(conditions, dtype=int),
+                            minlength=size * kinds).reshape(size, kinds)
+        votes[:, Condition.UNKNOWN] = 0
+        modes = np.where(votes.max(axis=1) > 0, votes.argmax(axis=1),
+                         Condition.UNKNOWN)
+        return stats, outliers, modes
+
+    @staticmethod
+    def _take_numpy(ordered, positions, count):
+        """ Return ordered values at positions, NaN for locations without
+        values.
+        """
+
+        np = get_numpy()
+        positions = np.clip(positions, 0, len(ordered) - 1)
+        return np.where(count > 0, ordered[positions], np.nan)
+
+    @classmethod
+    def _median_numpy(cls, ordered, starts, count):
+        """ Return median of every location from values sorted by
+        location with NaN last.
+        """
+
+        lower = cls._take_numpy(ordered, starts + (count - 1) // 2, count)
+        upper = cls._take_numpy(ordered, starts + count // 2, count)
+        return (lower + upper) / 2
+
+    def _compute_python(self, index, columns, conditions, size):
+        """ Compute statistics location by location.
+        """
+
+        rows = [[] for _ in range(size)]
+        for row, location in enumerate(index):
+            rows[location].append(row)
+
+        stats, outliers = {}, {}
+        for name, column in columns.items():
+            result = {statistic: [math.nan] * size for statistic in
+                      ('mean', 'median', 'std', 'min', 'max', 'spread')}
+            result['count'] = [0] * size
+            flags = [False] * len(column)
+            for location, members in enumerate(rows):
+                values = [column[row] for row in members
+                          if column[row] == column[row]]
+                if not values:
+                    continue
+                mean = sum(values) / len(values)
+                median = statistics.median(values)
+                result['count'][location] = len(values)
+                result['mean'][location] = mean
+                result['median'][location] = median
+                result['std'][location] = math.sqrt(sum(
+                    (value - mean) ** 2 for value in values) / len(values))
+                result['min'][location] = min(values)
+                result['max'][location] = max(values)
+                result['spread'][location] = max(values) - min(values)
+                if len(values) < 3:
+                    continue
+                mad = statistics.median(abs(value - median)
+                                        for value in values)
+                limit = max(self.threshold * MAD_SCALE * mad,
+                            self.min_deviation)
+                for row in members:
+                    if abs(column[row] - median) > limit:
+                        flags[row] = True
+            stats[name] = result
+            outliers[name] = flags
+
+        modes = []
+        for members in rows:
+            votes = Counter(conditions[row] for row in members
+                            if conditions[row] != Condition.UNKNOWN)
+            # ties go to the lower condition, like numpy.argmax
+            modes.append(max(votes, key=lambda cond: (votes[cond], -cond))
+                         if votes else Condition.UNKNOWN)
+        return stats, outliers, modes
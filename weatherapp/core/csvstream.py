@@ -0,0 +1,111 @@
+""" Streaming csv output of weather data.
+"""
+
+import io
+import os
+import csv
+import sys
+import gzip
+
+from weatherapp.core import config
+
+
+class CsvStreamWriter:
+    """ Writes weather rows to csv one by one as they arrive.
+
+    Columns are fixed by the field names, so files written by different
+    runs (e.g. in append mode, as a time series) share one schema; keys
+    which are not in the schema are ignored and missing ones are left
+    empty. The writer never reads its output back.
+
+    :param target: file path, '-' for stdout, or a writable text file
+                   object
+    :type target: str or file like object
+    :param fieldnames: column names
+    :type fieldnames: list
+    :param append: append to existing file instead of overwriting it,
+                   header is written only to an empty file
+    :type append: bool
+    :param compress: write gzip compressed file, by default files with
+                     '.gz' suffix are compressed
+    :type compress: bool
+    """
+
+    def __init__(self, target, fieldnames=config.CSV_FIELDS, append=False,
+                 compress=None, stdout=None):
+        self.target = target
+        self.fieldnames = list(fieldnames)
+        self.append = append
+        self.compress = compress
+        self.stdout = stdout or sys.stdout
+        self.rows = 0
+        self._file = None
+        self._owned = False
+        self._writer = None
+
+    def open(self):
+        """ Open the target and write the header if needed.
+        """
+
+        write_header = True
+        if self.target == '-':
+            self._file = self.stdout
+        elif isinstance(self.target, (str, os.PathLike)):
+            path = os.fspath(self.target)
+            compress = self.compress
+            if compress is None:
+                compress = path.endswith('.gz')
+            if self.append and os.path.exists(path):
+                write_header = os.path.getsize(path) == 0
+            mode = 'at' if self.append else 'wt'
+            if compress:
+                self._file = gzip.open(path, mode, newline='',
+                                       encoding='utf-8')
+            else:
+                self._file = open(path, mode, newline='', encoding='utf-8')
+            self._owned = True
+        else:
+            self._file = self.target
+            if self.compress:
+                self._file = io.TextIOWrapper(
+                    gzip.GzipFile(fileobj=self.target, mode='ab'
+                                  if self.append else 'wb'),
+                    newline='', encoding='utf-8')
+                self._owned = True
+
+        self._writer = csv.DictWriter(self._file, self.fieldnames,
+                                      restval='', extrasaction='ignore')
+        if write_header:
+            self._writer.writeheader()
+        return self
+
+    def write(self, row):
+        """ Write one row.
+
+        :param row: values by column name
+        :type row: dict
+        """
+
+        self._writer.writerow(row)
+        self.rows += 1
+        if not self._owned:
+            # let the consumer see rows as soon as they are ready
+            self._file.flush()
+
+    def close(self):
+        """ Flush and close the target, if it was opened by the writer.
+        """
+
+        if self._file is None:
+            return
+        if self._owned:
+            self._file.close()
+        else:
+            self._file.flush()
+        self._file = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, *exc_info):
+        self.close()
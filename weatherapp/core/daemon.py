@@ -0,0 +1,183 @@
+""" Long-running server keeping the application warm between queries.
+"""
+
+import io
+import copy
+import json
+import time
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from weatherapp.core import config
+from weatherapp.core import prometheus
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """ Handles queries sent by the thin client.
+
+    POST /run     body {"argv": [...]}, answers with the command output
+    GET  /stats   answers with cache and connection statistics as json
+    GET  /metrics answers with metrics in Prometheus text format
+    """
+
+    logger = logging.getLogger(__name__)
+
+    def do_POST(self):
+        if self.path != '/run':
+            return self.send_error(404)
+
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            argv = json.loads(self.rfile.read(length).decode('utf-8'))['argv']
+        except (ValueError, KeyError):
+            return self.send_error(400, 'Expected json body with "argv"')
+        try:
+            output = self.server.query(argv)
+        except ValueError as error:
+            # the thin client runs refused queries locally
+            return self.send_error(400, str(error))
+        self.respond(output, 'text/plain; charset=utf-8')
+
+    def do_GET(self):
+        if self.path == '/stats':
+            self.respond(json.dumps(self.server.stats()), 'application/json')
+        elif self.path == '/metrics':
+            self.respond(prometheus.render(self.server.app.metrics),
+                         prometheus.CONTENT_TYPE)
+        else:
+            self.send_error(404)
+
+    def respond(self, text, content_type):
+        """ Send response body with given content type.
+        """
+
+        body = text.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, msg_format, *args):
+        self.logger.debug(msg_format, *args)
+
+
+class DaemonServer(ThreadingHTTPServer):
+    """ HTTP server answering queries with one warm application instance.
+
+    Managers, provider instances, pooled HTTP sessions and the memory
+    cache live as long as the server does. Every query runs concurrently
+    with the others on its own copy of the application, see
+    get_query_app, which shares this state and keeps options and output
+    streams of the query.
+
+    :param app: application instance
+    :type app: app.App
+    :param address: (host, port) to listen on
+    :type address: tuple
+    """
+
+    daemon_threads = True
+
+    def __init__(self, app, address):
+        super().__init__(address, RequestHandler)
+        self.app = app
+        self.scheduler = None
+        self.metrics_file = None
+        self.metrics_interval = config.METRICS_FILE_INTERVAL
+        self._metrics_written = 0.0
+        self._lock = threading.Lock()
+
+    def service_actions(self):
+        """ Write metrics file every metrics_interval seconds, if set.
+        Called by serve_forever between requests.
+        """
+
+        now = time.monotonic()
+        if (self.metrics_file and
+                now - self._metrics_written >= self.metrics_interval):
+            self._metrics_written = now
+            try:
+                prometheus.write_textfile(self.app.metrics,
+                                          self.metrics_file)
+            except OSError:
+                self.app.logger.exception('Can not write metrics to %s',
+                                          self.metrics_file)
+
+    def query(self, argv):
+        """ Run application with given arguments and return its output.
+
+        Raises ValueError for queries the daemon does not run: invalid
+        arguments, commands which run until interrupted, options listed
+        in config.DAEMON_LOCAL_OPTIONS and another cache backend than
+        the one the server runs with.
+        """
+
+        try:
+            options, remaining_args = \
+                self.app.arg_parser.parse_known_args(argv)
+        except SystemExit:
+            raise ValueError('Invalid arguments')
+        if options.command in config.DAEMON_LOCAL_COMMANDS:
+            raise ValueError('Command {} is not run by the daemon'.format(
+                options.command))
+        for name in config.DAEMON_LOCAL_OPTIONS:
+            if getattr(options, name):
+                raise ValueError('Option --{} is not supported by the '
+                                 'daemon'.format(name))
+        if self.app.cache is not None and \
+                options.cache_backend != self.app.cache.name:
+            raise ValueError('Daemon runs with cache backend {}'.format(
+                self.app.cache.name))
+
+        output = io.StringIO()
+        app = self.get_query_app(options, output)
+        try:
+            app.dispatch(remaining_args)
+        except SystemExit:
+            # argument errors of commands
+            raise ValueError('Invalid arguments')
+        except Exception:
+            self.app.logger.exception('Error during query: %s', argv)
+        return output.getvalue()
+
+    def get_query_app(self, options, output):
+        """ Return copy of the application for one query.
+
+        The copy shares managers, caches, sessions and metrics with the
+        server application, and has its own options, output streams and
+        copies of the warm provider instances bound to it.
+
+        :param options: parsed options of the query
+        :type options: argparse.Namespace
+        :param output: stream the query writes its output to
+        :type output: io.StringIO
+        """
+
+        app = copy.copy(self.app)
+        app.options = options
+        app.stdout = app.stderr = output
+        app.providers = {}
+        with self._lock:
+            # warm instances are created once, by the first query
+            providers = {name: self.app.get_provider(name)
+                         for name in self.app.providermanager.names()}
+        for name, provider in providers.items():
+            if provider is not None:
+                provider = app.providers[name] = copy.copy(provider)
+                provider.app = app
+        return app
+
+    def stats(self):
+        """ Return statistics of the warm application state.
+        """
+
+        stats = {'providers': sorted(self.app.providers),
+                 'memorycache': self.app.memorycache.stats(),
+                 'sessions': self.app.sessionmanager.stats(),
+                 'hosts': self.app.sessionmanager.host_stats(),
+                 'revalidate': self.app.revalidator.stats()}
+        if self.scheduler:
+            stats['prefetch'] = self.scheduler.stats()
+        return stats
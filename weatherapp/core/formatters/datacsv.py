@@ -1,11 +1,9 @@
-import csv
-from prettytable import from_csv
 from weatherapp.core.abstract import Formatter
 
 
 class CsvFormatter(Formatter):
-    """ Format and print data from table data in a comma separated values
-        file (.csv).
+    """ Format and print data as a compact table laid out like comma
+        separated values (.csv) records.
     """
 
     name = 'csvtable'
@@ -21,19 +19,26 @@ class CsvFormatter(Formatter):
 
         """
 
-        datacsv = []
-
-        location = {column_names[0]: column_names[1]}
-        location.update(data)
-        datacsv.append(location)
-
-        with open('data_weather.csv', 'wt') as frecord:
-            writer = \
-                csv.DictWriter(frecord, fieldnames=list(datacsv[0].keys()))
-            writer.writeheader()
-            writer.writerows(datacsv)
-        with open("data_weather.csv", "r") as fp:
-            x = from_csv(fp)
-            x.align = "c"
-            x.padding_width = 0
-        print(x)
+        location = [column_names[1]] + list(data.values())
+        self.emit_rows([column_names[0]] + list(data.keys()), [location])
+
+    def emit_rows(self, column_names, rows):
+        """ Format and print many objects as one table.
+
+        :param column_names: names of the columns
+        :type column_names: list
+        :param rows: one list of values per object in order of
+                     column names
+        :type rows: list
+
+        """
+
+        import prettytable
+
+        pt = prettytable.PrettyTable(column_names)
+        for row in rows:
+            pt.add_row(row)
+        pt.align = "c"
+        pt.padding_width = 0
+        self.stdout.write(pt.get_string())
+        self.stdout.write('\n')
@@ -1,6 +1,4 @@
-import prettytable
 from weatherapp.core.abstract import Formatter
-from weatherapp.core import app
 
 
 class TableFormatter(Formatter):
@@ -9,9 +7,6 @@ class TableFormatter(Formatter):
 
     name = 'table'
 
-    def __init__(self):
-        self.app = app.App()
-
     def emit(self, column_names, data):
         """ Format and print data from the iterable source.
 
@@ -23,33 +18,61 @@ class TableFormatter(Formatter):
 
         """
 
-        options = self.app.arg_parser.parse_args()
+        import prettytable
+
         pt = prettytable.PrettyTable()
 
         for column, values in zip(column_names, (data.keys(), data.values())):
             if any(values):
                 pt.add_column(column, list(values))
 
-        if options.align:
-            pt.align = options.align
+        self._print(pt)
+
+    def emit_rows(self, column_names, rows):
+        """ Format and print many objects as one table.
+
+        :param column_names: names of the columns
+        :type column_names: list
+        :param rows: one list of values per object in order of
+                     column names
+        :type rows: list
+
+        """
+
+        import prettytable
+
+        pt = prettytable.PrettyTable(column_names)
+        for row in rows:
+            pt.add_row(row)
+
+        self._print(pt)
+
+    def _print(self, pt):
+        """ Apply render options to the table and print it.
+        """
+
+        import prettytable
+
+        options = self.options
+
+        if options.get('align'):
+            pt.align = options['align']
 
-        if options.padding_width:
-            pt.padding_width = options.padding_width
+        if options.get('padding_width'):
+            pt.padding_width = options['padding_width']
 
-        if options.vertical_char:
-            pt.vertical_char = options.vertical_char
+        if options.get('vertical_char'):
+            pt.vertical_char = options['vertical_char']
 
-        if options.horizontal_char:
-            pt.horizontal_char = options.horizontal_char
+        if options.get('horizontal_char'):
+            pt.horizontal_char = options['horizontal_char']
 
-        if options.set_style == 'MSWORD_FRIENDLY':
+        style = options.get('set_style')
+        if style == 'MSWORD_FRIENDLY':
             pt.set_style(prettytable.MSWORD_FRIENDLY)
-            print(pt.get_string())
-        elif options.set_style == 'PLAIN_COLUMNS':
+        elif style == 'PLAIN_COLUMNS':
             pt.set_style(prettytable.PLAIN_COLUMNS)
-            print(pt.get_string())
-        elif options.set_style == 'RANDOM':
+        elif style == 'RANDOM':
             pt.set_style(prettytable.RANDOM)
-            print(pt.get_string())
-        else:
-            print(pt.get_string())
+        self.stdout.write(pt.get_string())
+        self.stdout.write('\n')
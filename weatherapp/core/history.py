@@ -0,0 +1,397 @@
+""" Append-only store of weather observations.
+"""
+
+import time
+import bisect
+import hashlib
+import logging
+from array import array
+from pathlib import Path
+from collections import Counter
+
+from weatherapp.core import config
+from weatherapp.core.cache import SingleFlight
+from weatherapp.core.observation import Observation, NAN
+
+
+def get_day(timestamp):
+    """ Return name of the day partition (UTC date) of the timestamp.
+    """
+
+    return time.strftime('%Y-%m-%d', time.gmtime(timestamp))
+
+
+class HistoryStore:
+    """ Time series of weather observations per provider and location.
+
+    Observations are only ever appended. They are partitioned by UTC day
+    into directories; every day directory keeps the columns of every
+    series (provider and location pair) in separate files:
+
+        <series>.time    timestamps, float64, in ascending order
+        <series>.values  numeric fields (config.HISTORY_FIELDS) of the
+                         observation.Observation, float32 per field,
+                         NaN for missing values
+        <series>.cond    condition ids, uint16, into the 'conditions'
+                         file of the day, one condition text per line
+
+    The time column is the index of a partition: range queries bisect it
+    and read only the days and series they need, one partition at a
+    time. Values are stored in native byte order. The digest of the page
+    last stored for a series is kept in <series>.digest, next to the
+    'series' file listing provider and location of every series.
+
+    :param directory: store directory, defaults to ~/weather_history
+    :type directory: str or Path
+    :param locks: locks serializing writers of one day, also across
+                  processes
+    :type locks: cache.SingleFlight
+    """
+
+    logger = logging.getLogger(__name__)
+
+    fields = config.HISTORY_FIELDS
+
+    def __init__(self, directory=None, locks=None):
+        self.directory = Path(directory or
+                              Path.home() / config.HISTORY_DIR)
+        self.locks = locks or SingleFlight(self.directory / '.locks')
+        self._series = None
+
+    @staticmethod
+    def get_series_id(provider, location):
+        """ Return id of the series, used as its file name.
+        """
+
+        key = '{}\0{}'.format(provider, location)
+        return hashlib.md5(key.encode('utf-8')).hexdigest()[:16]
+
+    def series(self):
+        """ Return dict of (provider, location) pairs by series id.
+        """
+
+        path = self.directory / 'series'
+        if self._series is None or not path.exists():
+            self._series = {}
+        if path.exists():
+            with path.open(encoding='utf-8') as series_file:
+                for line in series_file:
+                    fields = line.rstrip('\n').split('\t')
+                    if len(fields) == 3:
+                        self._series[fields[0]] = (fields[1], fields[2])
+        return dict(self._series)
+
+    def _register(self, series_id, provider, location):
+        if series_id in (self._series or {}) or \
+                series_id in self.series():
+            return
+        with self.locks.lock('series'):
+            if series_id in self.series():
+                return
+            with (self.directory / 'series').open(
+                    'a', encoding='utf-8') as series_file:
+                series_file.write('{}\t{}\t{}\n'.format(
+                    series_id, provider.replace('\t', ' '),
+                    location.replace('\t', ' ')))
+            self._series[series_id] = (provider, location)
+
+    def append(self, provider, location, weather_info, timestamp=None,
+               digest=None):
+        """ Store weather information of the location observed at the
+        timestamp, defaults to now. Returns False if it was not stored.
+
+        With the digest of the page the weather was parsed from, the
+        observation is stored only if the last one stored for the series
+        came from another page, so a page served from the cache to many
+        runs is stored once.
+
+        :param provider: provider name
+        :type provider: str
+        :param location: location name
+        :type location: str
+        :param weather_info: weather fields, e.g. {'temp': '+12°C'}, or
+                             an Observation
+        :type weather_info: dict or observation.Observation
+        :param digest: digest of the page
+        :type digest: str
+        """
+
+        timestamp = time.time() if timestamp is None else timestamp
+        if digest is None:
+            self.extend(provider, location, [(timestamp, weather_info)])
+            return True
+
+        series_id = self.get_series_id(provider, location)
+        path = self.directory / (series_id + '.digest')
+        with self.locks.lock('digest-' + series_id):
+            if path.exists() and path.read_text() == digest:
+                return False
+            self.extend(provider, location, [(timestamp, weather_info)])
+            path.write_text(digest)
+        return True
+
+    def extend(self, provider, location, observations):
+        """ Store many observations of the location at once, e.g. when
+        importing older data.
+
+        Timestamps of a series never go back: an observation older than
+        the last one of its day is stored with the time of the last one.
+
+        :param observations: (timestamp, weather_info) pairs
+        :type observations: iterable
+        """
+
+        series_id = self.get_series_id(provider, location)
+        days = {}
+        for timestamp, weather_info in observations:
+            days.setdefault(get_day(timestamp), []).append(
+                (timestamp, weather_info))
+        if not days:
+            return
+        if not self.directory.exists():
+            self.directory.mkdir(parents=True, exist_ok=True)
+        self._register(series_id, provider, location)
+
+        for day, rows in days.items():
+            partition = self.directory / day
+            with self.locks.lock('day-' + day):
+                partition.mkdir(exist_ok=True)
+                self._write(partition, series_id, rows)
+
+    def _write(self, partition, series_id, rows):
+        """ Append rows to the columns of the series in the partition.
+        """
+
+        count = self._repair(partition, series_id)
+        last = float('-inf')
+        if count:
+            with (partition / (series_id + '.time')).open('rb') as times:
+                times.seek((count - 1) * 8)
+                last = array('d', times.read(8))[0]
+
+        conditions = self._read_conditions(partition)
+        stored = len(conditions)
+        known = {cond: index for index, cond in enumerate(conditions)}
+        times, values, conds = array('d'), array('f'), array('H')
+        for timestamp, weather_info in rows:
+            last = max(timestamp, last)
+            times.append(last)
+            observation = Observation.from_weather_info(weather_info)
+            for name in self.fields:
+                value = getattr(observation, name)
+                values.append(NAN if value is None else value)
+            cond = observation.cond
+            if cond not in known:
+                known[cond] = len(conditions)
+                conditions.append(cond)
+            conds.append(known[cond])
+
+        if len(conditions) > stored:
+            with (partition / 'conditions').open(
+                    'a', encoding='utf-8') as cond_file:
+                cond_file.write(''.join(cond + '\n'
+                                        for cond in conditions[stored:]))
+        for suffix, column in (('.time', times), ('.values', values),
+                               ('.cond', conds)):
+            with (partition / (series_id + suffix)).open('ab') as data:
+                column.tofile(data)
+
+    def _repair(self, partition, series_id):
+        """ Cut columns of the series to the number of complete rows, in
+        case a writer was interrupted, and return that number.
+        """
+
+        sizes = {'.time': 8, '.values': 4 * len(self.fields), '.cond': 2}
+        lengths = {}
+        for suffix, size in sizes.items():
+            path = partition / (series_id + suffix)
+            lengths[suffix] = path.stat().st_size if path.exists() else 0
+        rows = min(length // sizes[suffix]
+                   for suffix, length in lengths.items())
+        for suffix, length in lengths.items():
+            if length != rows * sizes[suffix]:
+                self.logger.warning('Truncating incomplete history rows '
+                                    'in %s', partition / series_id)
+                with (partition / (series_id + suffix)).open('r+b') as data:
+                    data.truncate(rows * sizes[suffix])
+        return rows
+
+    @staticmethod
+    def _read_conditions(partition):
+        path = partition / 'conditions'
+        if not path.exists():
+            return []
+        return path.read_text(encoding='utf-8').split('\n')[:-1]
+
+    def days(self, start=None, end=None):
+        """ Return names of the day partitions overlapping the range.
+        """
+
+        first = get_day(start) if start is not None else ''
+        last = get_day(end) if end is not None else '9999'
+        return sorted(path.name for path in self.directory.glob('????-??-??')
+                      if first <= path.name <= last)
+
+    def _select(self, provider, location):
+        return {series_id: names for series_id, names in self.series().items()
+                if (provider is None or names[0] == provider) and
+                (location is None or names[1] == location)}
+
+    @staticmethod
+    def _read(path, typecode):
+        column = array(typecode)
+        if path.exists():
+            data = path.read_bytes()
+            column.frombytes(data[:len(data) // column.itemsize *
+                                  column.itemsize])
+        return column
+
+    def segments(self, start=None, end=None, provider=None, location=None):
+        """ Yield columns of the series in the range, one day partition
+        of one series at a time.
+
+        Yields (provider, location, times, values, conds, conditions, lo,
+        hi) tuples: rows lo to hi of the columns fall in the range,
+        values hold len(fields) numbers per row and conditions are the
+        texts of condition ids.
+        """
+
+        selected = self._select(provider, location)
+        if not selected or not self.directory.exists():
+            return
+        for day in self.days(start, end):
+            partition = self.directory / day
+            conditions = None
+            for series_id, (provider_name, location_name) in sorted(
+                    selected.items(), key=lambda item: item[1]):
+                times = self._read(partition / (series_id + '.time'), 'd')
+                if not times:
+                    continue
+                values = self._read(partition / (series_id + '.values'), 'f')
+                conds = self._read(partition / (series_id + '.cond'), 'H')
+                rows = min(len(times), len(values) // len(self.fields),
+                           len(conds))
+                lo = 0 if start is None else \
+                    bisect.bisect_left(times, start, 0, rows)
+                hi = rows if end is None else \
+                    bisect.bisect_left(times, end, lo, rows)
+                if lo == hi:
+                    continue
+                if conditions is None:
+                    conditions = self._read_conditions(partition)
+                yield (provider_name, location_name, times, values, conds,
+                       conditions, lo, hi)
+
+    def count(self, start=None, end=None, provider=None, location=None):
+        """ Return number of observations in the range.
+        """
+
+        return sum(hi - lo for *columns, lo, hi in
+                   self.segments(start, end, provider, location))
+
+    def query(self, start=None, end=None, provider=None, location=None):
+        """ Yield observations in the range [start, end) as dicts with
+        'time', 'provider', 'location', 'cond' and numeric fields (None
+        when missing), ordered by series and time.
+
+        :param start: first timestamp, defaults to the oldest observation
+        :type start: float
+        :param end: timestamp after the last one, defaults to no upper
+                    bound, the newest observation included
+        :type end: float
+        """
+
+        width = len(self.fields)
+        for (provider_name, location_name, times, values, conds, conditions,
+             lo, hi) in self.segments(start, end, provider, location):
+            for row in range(lo, hi):
+                observation = {'time': times[row], 'provider': provider_name,
+                               'location': location_name,
+                               'cond': conditions[conds[row]]
+                               if conds[row] < len(conditions) else ''}
+                for index, name in enumerate(self.fields):
+                    value = values[row * width + index]
+                    observation[name] = value if value == value else None
+                yield observation
+
+    def downsample(self, interval, start=None, end=None, provider=None,
+                   location=None):
+        """ Return observations in the range aggregated into buckets of
+        interval seconds per series.
+
+        Returns list of dicts with bucket start 'time', 'provider',
+        'location', number of observations 'count', the most frequent
+        'cond', mean of every numeric field and 'temp_min'/'temp_max',
+        ordered by series and time.
+
+        :param interval: bucket length in seconds, buckets are aligned to
+                         multiples of it since the epoch
+        :type interval: float
+        """
+
+        width = len(self.fields)
+        buckets = {}
+        for (provider_name, location_name, times, values, conds, conditions,
+             lo, hi) in self.segments(start, end, provider, location):
+            while lo < hi:
+                bucket = times[lo] // interval * interval
+                upper = bisect.bisect_left(times, bucket + interval, lo, hi)
+                stats = buckets.get((provider_name, location_name, bucket))
+                if stats is None:
+                    stats = buckets[provider_name, location_name, bucket] = {
+                        'count': 0, 'cond': Counter(),
+                        'values': [[0.0, 0, None, None] for _ in self.fields]}
+                stats['count'] += upper - lo
+                # count condition ids in C, then name them
+                for cond, count in Counter(conds[lo:upper]).items():
+                    if cond < len(conditions):
+                        stats['cond'][conditions[cond]] += count
+                for index, aggregate in enumerate(stats['values']):
+                    # slicing the array column is done in C
+                    column = values[lo * width + index:upper * width:width]
+                    total = sum(column)
+                    if total != total:
+                        # skip missing values, stored as NaN
+                        column = [value for value in column if value == value]
+                        total = sum(column)
+                    if not column:
+                        continue
+                    aggregate[0] += total
+                    aggregate[1] += len(column)
+                    if self.fields[index] == 'temp':
+                        low, high = min(column), max(column)
+                        aggregate[2] = low if aggregate[2] is None else \
+                            min(aggregate[2], low)
+                        aggregate[3] = high if aggregate[3] is None else \
+                            max(aggregate[3], high)
+                lo = upper
+
+        results = []
+        for (provider_name, location_name, bucket), stats in sorted(
+                buckets.items(), key=lambda item: item[0]):
+            result = {'time': bucket, 'provider': provider_name,
+                      'location': location_name, 'count': stats['count'],
+                      'cond': stats['cond'].most_common(1)[0][0]
+                      if stats['cond'] else ''}
+            for name, (total, count, low, high) in zip(self.fields,
+                                                       stats['values']):
+                result[name] = total / count if count else None
+                if name == 'temp':
+                    result['temp_min'] = low
+                    result['temp_max'] = high
+            results.append(result)
+        return results
+
+    def prune(self, before):
+        """ Remove day partitions older than the day of the timestamp.
+        Returns number of removed partitions.
+        """
+
+        import shutil
+
+        removed = 0
+        for day in self.days(end=before):
+            if day < get_day(before):
+                shutil.rmtree(self.directory / day)
+                removed += 1
+        return removed
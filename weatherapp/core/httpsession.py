@@ -0,0 +1,237 @@
+""" Pooled HTTP sessions shared by all providers.
+"""
+
+import logging
+import threading
+from urllib.parse import urlsplit
+from collections import Counter
+
+from weatherapp.core import config
+from weatherapp.core.metrics import Metrics
+from weatherapp.core.throttle import TokenBucket, CircuitBreaker
+
+
+class SessionManager:
+    """ Keeps one pooled keep-alive session per host.
+
+    Sessions are created on first use and reused by every provider, so a
+    host pays for the TCP and TLS handshake once per process instead of
+    once per fetch. requests is imported with the first session, not at
+    application startup.
+
+    Requests to every host are rate limited with a token bucket and go
+    through a circuit breaker: while the host keeps failing, requests to
+    it raise requests.ConnectionError without touching the network.
+
+    :param pool_connections: number of connection pools to cache
+    :type pool_connections: int
+    :param pool_maxsize: maximum number of connections kept per pool
+    :type pool_maxsize: int
+    :param retries: how many times a failed request is retried
+    :type retries: int
+    :param backoff_factor: backoff factor between retries, in seconds
+    :type backoff_factor: float
+    :param timeout: default request timeout, in seconds
+    :type timeout: float
+    :param rate_limit: requests per second sent to one host
+    :type rate_limit: float
+    :param rate_burst: number of requests sent to one host without delay
+    :type rate_burst: int
+    :param circuit_failures: consecutive failures which stop requests to
+                             the host
+    :type circuit_failures: int
+    :param circuit_reset_timeout: seconds before a stopped host is probed
+    :type circuit_reset_timeout: float
+    :param metrics: registry counting requests, requests in flight,
+                    retries and rejected requests per host
+    :type metrics: metrics.Metrics
+    """
+
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, pool_connections=config.HTTP_POOL_CONNECTIONS,
+                 pool_maxsize=config.HTTP_POOL_MAXSIZE,
+                 retries=config.HTTP_RETRIES,
+                 backoff_factor=config.HTTP_BACKOFF_FACTOR,
+                 timeout=config.HTTP_TIMEOUT,
+                 rate_limit=config.HTTP_RATE_LIMIT,
+                 rate_burst=config.HTTP_RATE_BURST,
+                 circuit_failures=config.CIRCUIT_FAILURES,
+                 circuit_reset_timeout=config.CIRCUIT_RESET_TIMEOUT,
+                 metrics=None):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
+        self.rate_limit = rate_limit
+        self.rate_burst = rate_burst
+        self.circuit_failures = circuit_failures
+        self.circuit_reset_timeout = circuit_reset_timeout
+        self.metrics = metrics or Metrics()
+        self._sessions = {}
+        self._guards = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_host(url):
+        """ Return host part of the url, used as a session key.
+        """
+
+        return urlsplit(url).netloc
+
+    def _create_session(self):
+        """ Create session with pooled adapter and retry policy.
+        """
+
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        # a host which accepted the connection and does not answer is
+        # not asked again: every read timeout would cost another
+        # timeout seconds of the provider deadline
+        retry = Retry(total=self.retries, read=0,
+                      backoff_factor=self.backoff_factor,
+                      status_forcelist=config.HTTP_RETRY_STATUSES,
+                      allowed_methods=frozenset(['GET', 'HEAD']),
+                      raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=self.pool_connections,
+                              pool_maxsize=self.pool_maxsize,
+                              max_retries=retry)
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers.update(config.HTTP_HEADERS)
+        return session
+
+    def session(self, url):
+        """ Return session for the host of given url.
+        """
+
+        host = self.get_host(url)
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                self.logger.debug('create http session for %s', host)
+                session = self._sessions[host] = self._create_session()
+        return session
+
+    def guards(self, host):
+        """ Return (rate limiter, circuit breaker) pair of the host.
+        """
+
+        with self._lock:
+            guards = self._guards.get(host)
+            if guards is None:
+                rate, burst = self.get_rate_limit(host)
+                guards = self._guards[host] = (
+                    TokenBucket(rate, burst),
+                    CircuitBreaker(self.circuit_failures,
+                                   self.circuit_reset_timeout))
+        return guards
+
+    def get_rate_limit(self, host):
+        """ Return (requests per second, burst) limit of the host.
+        """
+
+        return config.HTTP_HOST_RATE_LIMITS.get(
+            host, (self.rate_limit, self.rate_burst))
+
+    def get_queue_time(self, urls):
+        """ Return the least number of seconds requests to all the urls
+        wait for the rate limiters. Hosts are limited separately, so
+        requests to different hosts wait at the same time.
+
+        :param urls: urls to request
+        :type urls: iterable
+        """
+
+        counts = Counter(self.get_host(url) for url in urls)
+        queue_time = 0.0
+        for host, count in counts.items():
+            rate, burst = self.get_rate_limit(host)
+            if rate:
+                queue_time = max(queue_time, max(count - burst, 0) / rate)
+        return queue_time
+
+    def get(self, url, **kwargs):
+        """ Send GET request through the pooled session.
+        """
+
+        import requests
+
+        host = self.get_host(url)
+        bucket, breaker = self.guards(host)
+        if not breaker.allow():
+            self.metrics.inc('http_rejected', host=host)
+            raise requests.ConnectionError(
+                'Too many failed requests to {}, retry in {} seconds'.format(
+                    host, self.circuit_reset_timeout))
+        bucket.acquire()
+
+        kwargs.setdefault('timeout', self.timeout)
+        self.metrics.inc('http_requests', host=host)
+        self.metrics.add('http_in_flight', 1, host=host)
+        try:
+            response = self.session(url).get(url, **kwargs)
+        except Exception:
+            breaker.failure()
+            raise
+        finally:
+            self.metrics.add('http_in_flight', -1, host=host)
+        retries = getattr(getattr(response.raw, 'retries', None),
+                          'history', ())
+        if retries:
+            self.metrics.inc('http_retries', len(retries), host=host)
+        if response.status_code in config.HTTP_RETRY_STATUSES:
+            breaker.failure()
+        else:
+            breaker.success()
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug('connection stats for %s: %s',
+                              host, self.stats().get(host))
+        return response
+
+    def stats(self):
+        """ Return connection reuse statistics per host.
+
+        'requests' is the number of requests sent, 'connections' the
+        number of new connections (handshakes) made and 'reused' the
+        number of requests served by an already open connection.
+        """
+
+        stats = {}
+        with self._lock:
+            sessions = list(self._sessions.items())
+        for host, session in sessions:
+            requests_sent = connections = 0
+            for adapter in set(session.adapters.values()):
+                pools = adapter.poolmanager.pools
+                for key in pools.keys():
+                    pool = pools[key]
+                    requests_sent += pool.num_requests
+                    connections += pool.num_connections
+            stats[host] = {'requests': requests_sent,
+                           'connections': connections,
+                           'reused': max(requests_sent - connections, 0)}
+        return stats
+
+    def host_stats(self):
+        """ Return circuit breaker state and time spent waiting for the
+        rate limiter, in seconds, per host.
+        """
+
+        with self._lock:
+            guards = list(self._guards.items())
+        return {host: dict(breaker.stats(), throttled=round(bucket.waited, 3))
+                for host, (bucket, breaker) in guards}
+
+    def close(self):
+        """ Close all sessions and their connection pools.
+        """
+
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
@@ -0,0 +1,189 @@
+""" Logging of the application through a queue.
+
+Records are put on a queue by the thread which logs them and written to
+the log file and the console by a single listener thread, so a provider
+run never waits for the disk or the terminal. Handlers are installed
+once per process, however many times the application runs.
+"""
+
+import sys
+import atexit
+import logging
+import threading
+
+from weatherapp.core import config
+
+FORMAT = ('%(asctime)s - %(name)s - %(levelname)s - ' +
+          config.DEFAULT_MESSAGE_FORMAT)
+
+# listener and its handlers, see setup_logging
+_lock = threading.Lock()
+_state = {}
+
+
+class QueueHandler(logging.Handler):
+    """ Puts records on the queue for the listener thread to write.
+
+    Unlike logging.handlers.QueueHandler records are not copied and
+    formatted by the logging thread, only their message is merged with
+    its arguments, which may change once the call returns; records stay
+    in the process, so they are not made picklable.
+
+    :param records: queue read by logging.handlers.QueueListener
+    :type records: queue.SimpleQueue
+    """
+
+    def __init__(self, records):
+        super().__init__()
+        self.queue = records
+
+    def emit(self, record):
+        try:
+            record.msg = record.getMessage()
+            record.args = None
+            self.queue.put_nowait(record)
+        except Exception:
+            self.handleError(record)
+
+
+class RepeatFilter(logging.Filter):
+    """ Drops records logged again with the same repeat_key within
+        interval seconds.
+
+    Only records with a repeat_key attribute (logged with
+    extra={'repeat_key': ...}) are limited, e.g. errors of one host
+    which repeat for every page of it. The first record passed after
+    the interval tells how many were dropped.
+
+    :param interval: seconds a repeated record is dropped for
+    :type interval: float
+    """
+
+    def __init__(self, interval=config.LOG_REPEAT_INTERVAL):
+        super().__init__()
+        self.interval = interval
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        key = getattr(record, 'repeat_key', None)
+        if key is None:
+            return True
+        with self._lock:
+            passed, suppressed = self._seen.get(key, (None, 0))
+            if passed is not None and \
+                    record.created - passed < self.interval:
+                self._seen[key] = (passed, suppressed + 1)
+                return False
+            self._seen[key] = (record.created, 0)
+        if suppressed:
+            record.msg = '{} ({} similar messages suppressed)'.format(
+                record.getMessage(), suppressed)
+            record.args = None
+        return True
+
+
+def _get_file_handler(path, max_bytes, backup_count):
+    """ Return handler of the log file, rotated when it grows over
+    max_bytes (0 - never), None if there is no path.
+    """
+
+    if not path:
+        return None
+    # imported here to keep application startup fast
+    from logging.handlers import RotatingFileHandler
+
+    handler = RotatingFileHandler(path, maxBytes=max_bytes,
+                                  backupCount=backup_count, delay=True)
+    handler.setLevel(logging.DEBUG)
+    handler.setFormatter(logging.Formatter(FORMAT))
+    return handler
+
+
+def setup_logging(console_level=logging.WARNING, path=config.LOG_FILE,
+                  max_bytes=config.LOG_MAX_BYTES,
+                  backup_count=config.LOG_BACKUP_COUNT, stream=None):
+    """ Send records of the root logger through a queue to the log file
+    and the console.
+
+    The queue handler and its listener thread are created on the first
+    call; later calls only change the console level and, if it differs,
+    the log file. Library loggers are set to config.LOG_LIBRARY_LEVELS,
+    so retries of a hanging site do not flood the log.
+
+    The console stream is bound at the first call and never looked up
+    again: the listener thread writes records of every thread, so it must
+    not follow sys.stderr redirected by one of them (e.g. with
+    contextlib.redirect_stderr) into the output of that thread.
+
+    :param console_level: level of records shown on the console
+    :type console_level: int
+    :param path: log file, no file is written if it is empty
+    :type path: str
+    :param max_bytes: size the log file is rotated at, 0 - never
+    :type max_bytes: int
+    :param backup_count: number of rotated files kept
+    :type backup_count: int
+    :param stream: console stream, defaults to the standard error of the
+                   process (sys.__stderr__)
+    """
+
+    file_options = (path, max_bytes, backup_count)
+    with _lock:
+        if not _state:
+            # imported here to keep application startup fast
+            import queue
+            from logging.handlers import QueueListener
+
+            console = logging.StreamHandler(
+                stream or sys.__stderr__ or sys.stderr)
+            console.setFormatter(logging.Formatter(FORMAT))
+            records = queue.SimpleQueue()
+            queue_handler = QueueHandler(records)
+            queue_handler.addFilter(RepeatFilter())
+            listener = QueueListener(records, console,
+                                     respect_handler_level=True)
+            _state.update(console=console, queue_handler=queue_handler,
+                          listener=listener, file=None, file_options=None)
+
+            root_logger = logging.getLogger('')
+            root_logger.setLevel(logging.DEBUG)
+            root_logger.addHandler(queue_handler)
+            for name, level in config.LOG_LIBRARY_LEVELS.items():
+                logging.getLogger(name).setLevel(level)
+            listener.start()
+            atexit.register(stop_logging)
+
+        _state['console'].setLevel(console_level)
+        if _state['file_options'] != file_options:
+            _set_file_handler(_get_file_handler(*file_options))
+            _state['file_options'] = file_options
+
+
+def _set_file_handler(handler):
+    """ Replace the log file handler of the listener.
+    """
+
+    listener = _state['listener']
+    # wait until records queued for the old file are written
+    listener.stop()
+    if _state['file'] is not None:
+        _state['file'].close()
+    _state['file'] = handler
+    listener.handlers = tuple(handler for handler in (
+        _state['console'], handler) if handler is not None)
+    listener.start()
+
+
+def stop_logging():
+    """ Write queued records and stop the listener thread.
+    """
+
+    with _lock:
+        if not _state:
+            return
+        logging.getLogger('').removeHandler(_state['queue_handler'])
+        _state['listener'].stop()
+        if _state['file'] is not None:
+            _state['file'].close()
+        _state.clear()
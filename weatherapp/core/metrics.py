@@ -0,0 +1,180 @@
+""" Counters, gauges, histograms and timing spans of the application.
+"""
+
+import os
+import time
+import bisect
+import threading
+import contextlib
+from collections import deque
+
+from weatherapp.core import config
+
+
+class Metrics:
+    """ Thread-safe registry of named counters, gauges, histograms and
+        timing spans.
+
+    Metrics carry labels, e.g. provider or host name, given as keyword
+    arguments. Duration of every span is also observed in the histogram
+    of the same name. Spans are kept in a bounded buffer, so a
+    long-running process does not grow without limit.
+
+    :param max_spans: number of most recent spans kept
+    :type max_spans: int
+    :param buckets: upper bounds of histogram buckets, in seconds
+    :type buckets: tuple
+    """
+
+    def __init__(self, max_spans=config.METRICS_MAX_SPANS,
+                 buckets=config.METRICS_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._spans = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        """ Increase counter by value.
+        """
+
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def get(self, name, **labels):
+        """ Return value of the counter, summed over all its labels
+        which are not given.
+        """
+
+        wanted = set(labels.items())
+        with self._lock:
+            return sum(value for (counter, counter_labels), value
+                       in self._counters.items()
+                       if counter == name and wanted <= set(counter_labels))
+
+    def counters(self):
+        """ Return dict of counter values by (name, labels) pairs, labels
+        are sorted tuples of (label, value) pairs.
+        """
+
+        with self._lock:
+            return dict(self._counters)
+
+    def add(self, name, value, **labels):
+        """ Change gauge by value, e.g. +1 when a fetch starts and -1 when
+        it ends.
+        """
+
+        key = self._key(name, labels)
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0) + value
+
+    def gauges(self):
+        """ Return dict of gauge values by (name, labels) pairs.
+        """
+
+        with self._lock:
+            return dict(self._gauges)
+
+    def observe(self, name, value, **labels):
+        """ Add value to the histogram.
+        """
+
+        key = self._key(name, labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {
+                    'buckets': [0] * len(self.buckets), 'sum': 0.0,
+                    'count': 0}
+            if index < len(self.buckets):
+                histogram['buckets'][index] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    def histograms(self):
+        """ Return dict of histograms by (name, labels) pairs. Histogram
+        is a dict with number of values in every bucket (not cumulative),
+        their 'sum' and 'count'.
+        """
+
+        with self._lock:
+            return {key: dict(histogram, buckets=list(histogram['buckets']))
+                    for key, histogram in self._histograms.items()}
+
+    @contextlib.contextmanager
+    def span(self, name, **labels):
+        """ Record time spent in the block as a span of given name.
+        """
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_span(name, start, time.perf_counter() - start,
+                          **labels)
+
+    def add_span(self, name, start, duration, **labels):
+        """ Record span which started at start (time.perf_counter value)
+        and lasted duration seconds.
+        """
+
+        with self._lock:
+            self._spans.append((name, labels, start, duration,
+                                threading.get_ident()))
+        self.observe(name, duration, **labels)
+
+    def spans(self):
+        """ Return recorded spans as (name, labels, start, duration,
+        thread id) tuples.
+        """
+
+        with self._lock:
+            return list(self._spans)
+
+    def timings(self, *group_by):
+        """ Return span statistics grouped by span name and given labels.
+
+        Returns dict mapping (name, label values...) to dict with number
+        of 'calls', 'total' and 'max' duration in seconds.
+        """
+
+        timings = {}
+        for name, labels, start, duration, thread in self.spans():
+            key = (name,) + tuple(labels.get(label, '') for label in group_by)
+            stats = timings.setdefault(key, {'calls': 0, 'total': 0.0,
+                                             'max': 0.0})
+            stats['calls'] += 1
+            stats['total'] += duration
+            stats['max'] = max(stats['max'], duration)
+        return timings
+
+    def chrome_trace(self):
+        """ Return spans in Chrome trace event format, to be saved as
+        JSON and opened in chrome://tracing or Perfetto.
+        """
+
+        pid = os.getpid()
+        return {'traceEvents': [
+            {'name': name, 'ph': 'X', 'pid': pid, 'tid': thread,
+             'ts': round(start * 1e6), 'dur': round(duration * 1e6),
+             'args': labels}
+            for name, labels, start, duration, thread in self.spans()],
+            'displayTimeUnit': 'ms'}
+
+    def clear(self):
+        """ Remove all metrics and spans.
+        """
+
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+            self._spans.clear()
@@ -0,0 +1,314 @@
+""" Normalized weather observations.
+"""
+
+import re
+import sys
+import enum
+from array import array
+from collections.abc import Mapping
+
+NUMBER_RE = re.compile(r'[-+\u2212]?\d+(?:[.,]\d+)?')
+
+FAHRENHEIT_RE = re.compile(r'°\s*F|\d\s*F\b')
+
+NAN = float('nan')
+
+# wind speed units and their size in m/s, longest names first
+WIND_UNITS = (('km/h', 1 / 3.6), ('км/ч', 1 / 3.6), ('км/год', 1 / 3.6),
+              ('kmh', 1 / 3.6), ('mph', 0.44704), ('knots', 0.514444),
+              ('kn', 0.514444), ('m/s', 1.0), ('м/с', 1.0))
+
+# fields of the weather_info dict kept as attributes
+FIELDS = ('cond', 'temp', 'feels_like', 'wind')
+
+
+def parse_number(value):
+    """ Return the first number in the field text, e.g. 12.0 for '+12°C',
+    NaN if there is none.
+    """
+
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = NUMBER_RE.search(value or '')
+    if match is None:
+        return NAN
+    return float(match.group().replace('\u2212', '-').replace(',', '.'))
+
+
+def parse_temperature(value):
+    """ Return temperature of the field text in °C, None if there is
+    none. Fahrenheit values ('54°F') are converted.
+    """
+
+    number = parse_number(value)
+    if number != number:
+        return None
+    if isinstance(value, str) and FAHRENHEIT_RE.search(value):
+        number = (number - 32) / 1.8
+    return number
+
+
+def parse_wind(value):
+    """ Return (speed in m/s, direction) of the field text like
+    '3 m/s NW' or '11 km/h', speed is None if there is none.
+    """
+
+    if not isinstance(value, str):
+        number = parse_number(value)
+        return (None if number != number else number), ''
+    number = parse_number(value)
+    rest = NUMBER_RE.sub(' ', value, count=1)
+    lowered = rest.lower()
+    factor = 1.0
+    for unit, size in WIND_UNITS:
+        if unit in lowered:
+            factor = size
+            start = lowered.index(unit)
+            rest = rest[:start] + rest[start + len(unit):]
+            break
+    direction = sys.intern(' '.join(rest.split()))
+    if number != number:
+        return None, direction
+    return number * factor, direction
+
+
+class Condition(enum.IntEnum):
+    """ Normalized weather condition.
+    """
+
+    UNKNOWN = 0
+    CLEAR = 1
+    PARTLY_CLOUDY = 2
+    CLOUDY = 3
+    FOG = 4
+    DRIZZLE = 5
+    RAIN = 6
+    THUNDERSTORM = 7
+    SLEET = 8
+    SNOW = 9
+
+    @classmethod
+    def from_text(cls, text):
+        """ Return condition described by the provider text, in English,
+        Ukrainian or Russian, UNKNOWN if it is not recognized.
+        """
+
+        text = (text or '').lower()
+        for condition, keywords in CONDITION_KEYWORDS:
+            if any(keyword in text for keyword in keywords):
+                return condition
+        return cls.UNKNOWN
+
+
+# keywords of conditions, checked in order, so "partly cloudy" is found
+# before "cloudy" and "thunderstorm with rain" before "rain"
+CONDITION_KEYWORDS = (
+    (Condition.THUNDERSTORM, ('thunder', 'storm', 'гроза', 'грози',
+                              'грозы')),
+    (Condition.SLEET, ('sleet', 'freezing', 'мокрий сніг', 'мокрый снег',
+                       'дощ зі снігом', 'дождь со снегом')),
+    (Condition.SNOW, ('snow', 'flurr', 'сніг', 'снег')),
+    (Condition.DRIZZLE, ('drizzle', 'мряка', 'морось')),
+    (Condition.RAIN, ('rain', 'shower', 'дощ', 'злива', 'дожд', 'ливень')),
+    (Condition.FOG, ('fog', 'mist', 'haze', 'туман', 'імла', 'дымка')),
+    (Condition.PARTLY_CLOUDY, ('partly', 'mostly sunny', 'intermittent',
+                               'мінлива', 'невелика хмарність',
+                               'переменная', 'малооблачно',
+                               'небольшая облачность')),
+    (Condition.CLOUDY, ('cloud', 'overcast', 'хмарн', 'похмуро',
+                        'облачно', 'пасмурно')),
+    (Condition.CLEAR, ('sunny', 'clear', 'fair', 'ясно', 'сонячно',
+                       'солнечно')),
+)
+
+
+class Observation(Mapping):
+    """ Weather of one location at one time with numeric fields.
+
+    Temperatures are kept in °C and wind speed in m/s, whatever units
+    the provider page used; fields which are not known are None. The
+    provider text of the condition is kept next to its normalized
+    Condition, interned so equal texts are stored once.
+
+    An observation is also a read-only mapping of the classic
+    weather_info fields ('cond', 'temp', 'feels_like', 'wind' and any
+    other text fields of the provider) formatted as text, so it can be
+    passed wherever a weather_info dict is read.
+
+    :param cond: condition text of the provider
+    :type cond: str
+    :param temp: temperature, °C
+    :type temp: float
+    :param feels_like: feels like temperature, °C
+    :type feels_like: float
+    :param wind: wind speed, m/s
+    :type wind: float
+    :param wind_direction: wind direction text, e.g. 'NW'
+    :type wind_direction: str
+    :param condition: normalized condition, derived from cond by default
+    :type condition: Condition
+    :param extra: other text fields of the provider
+    :type extra: dict
+    """
+
+    __slots__ = ('cond', 'condition', 'temp', 'feels_like', 'wind',
+                 'wind_direction', 'extra')
+
+    TEMPERATURE_UNIT = '°C'
+    WIND_UNIT = 'm/s'
+
+    def __init__(self, cond='', temp=None, feels_like=None, wind=None,
+                 wind_direction='', condition=None, extra=None):
+        self.cond = sys.intern(cond) if cond else ''
+        self.condition = Condition.from_text(cond) if condition is None \
+            else Condition(condition)
+        self.temp = temp
+        self.feels_like = feels_like
+        self.wind = wind
+        self.wind_direction = wind_direction
+        self.extra = extra or None
+
+    @classmethod
+    def from_weather_info(cls, weather_info):
+        """ Return observation parsed from a weather_info dict of
+        provider texts, e.g. {'cond': 'Sunny', 'temp': '+12°C'}.
+        """
+
+        if isinstance(weather_info, cls):
+            return weather_info
+        wind, direction = parse_wind(weather_info.get('wind'))
+        extra = {key: value for key, value in weather_info.items()
+                 if key not in FIELDS}
+        return cls(cond=' '.join((weather_info.get('cond') or '').split()),
+                   temp=parse_temperature(weather_info.get('temp')),
+                   feels_like=parse_temperature(
+                       weather_info.get('feels_like')),
+                   wind=wind, wind_direction=direction, extra=extra)
+
+    @staticmethod
+    def format_number(value):
+        return '{:.1f}'.format(value).rstrip('0').rstrip('.')
+
+    def to_weather_info(self):
+        """ Return fields formatted as text, in the weather_info format.
+        """
+
+        weather_info = {}
+        if self.cond:
+            weather_info['cond'] = self.cond
+        for name in ('temp', 'feels_like'):
+            value = getattr(self, name)
+            if value is not None:
+                weather_info[name] = self.format_number(value) + \
+                    self.TEMPERATURE_UNIT
+        if self.wind is not None:
+            weather_info['wind'] = ' '.join(filter(None, (
+                self.format_number(self.wind), self.WIND_UNIT,
+                self.wind_direction)))
+        if self.extra:
+            weather_info.update(self.extra)
+        return weather_info
+
+    def __bool__(self):
+        # cheaper than the length of the formatted fields
+        return bool(self.cond or self.temp is not None or
+                    self.feels_like is not None or self.wind is not None or
+                    self.extra)
+
+    def __getitem__(self, key):
+        return self.to_weather_info()[key]
+
+    def __iter__(self):
+        return iter(self.to_weather_info())
+
+    def __len__(self):
+        return len(self.to_weather_info())
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, ', '.join(
+            '{}={!r}'.format(name, getattr(self, name))
+            for name in self.__slots__))
+
+
+class ObservationTable:
+    """ Many observations stored in typed arrays, one array per field.
+
+    Keeps about a dozen bytes per observation, an order of magnitude
+    less than weather_info dicts or even Observation objects, e.g. for
+    many locations and days held in memory. Texts (conditions, wind
+    directions) are stored once and referenced by index.
+    """
+
+    NUMBERS = ('temp', 'feels_like', 'wind')
+
+    def __init__(self, observations=()):
+        self.columns = {name: array('f') for name in self.NUMBERS}
+        self.conditions = array('B')
+        self.texts = array('H')
+        self.directions = array('H')
+        self.strings = []
+        self._string_ids = {}
+        self.extra = {}
+        self.extend(observations)
+
+    def _string_id(self, text):
+        string_id = self._string_ids.get(text)
+        if string_id is None:
+            string_id = self._string_ids[text] = len(self.strings)
+            self.strings.append(text)
+        return string_id
+
+    def append(self, observation):
+        """ Add observation, or weather_info dict, to the table.
+        """
+
+        observation = Observation.from_weather_info(observation)
+        for name, column in self.columns.items():
+            value = getattr(observation, name)
+            column.append(NAN if value is None else value)
+        self.conditions.append(observation.condition)
+        self.texts.append(self._string_id(observation.cond))
+        self.directions.append(self._string_id(observation.wind_direction))
+        if observation.extra:
+            self.extra[len(self) - 1] = observation.extra
+
+    def extend(self, observations):
+        for observation in observations:
+            self.append(observation)
+
+    def column(self, name):
+        """ Return array of the numeric field, NaN for missing values.
+        """
+
+        return self.columns[name]
+
+    def __len__(self):
+        return len(self.conditions)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('observation index out of range')
+        numbers = {name: column[index]
+                   for name, column in self.columns.items()}
+        return Observation(
+            cond=self.strings[self.texts[index]],
+            condition=self.conditions[index],
+            wind_direction=self.strings[self.directions[index]],
+            extra=self.extra.get(index),
+            **{name: value if value == value else None
+               for name, value in numbers.items()})
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    @property
+    def nbytes(self):
+        """ Size of the arrays in bytes.
+        """
+
+        return sum(column.itemsize * len(column) for column in
+                   list(self.columns.values()) + [
+                       self.conditions, self.texts, self.directions])
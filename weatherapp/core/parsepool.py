@@ -0,0 +1,144 @@
+""" Parsing of provider pages in worker processes.
+"""
+
+import math
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from weatherapp.core import config
+
+# application and providers of the worker process, see init_worker
+_worker_app = None
+_worker_providers = {}
+
+
+def init_worker():
+    """ Create the application providers of a worker process run on.
+    """
+
+    global _worker_app
+    # imported here, the application module imports this one
+    from weatherapp.core.app import App
+
+    _worker_app = App()
+    _worker_app.options = _worker_app.arg_parser.parse_args([])
+
+
+def parse_chunk(provider_class, options, pages):
+    """ Return weather_info parsed from every page by get_weather_info of
+    the provider, None for pages it failed to parse.
+
+    :param provider_class: WeatherProvider subclass, importable by name
+    :param options: application options the parsing depends on, see
+                    WeatherProvider.get_parse_arguments
+    :type options: dict
+    :param pages: raw pages
+    :type pages: list
+    """
+
+    vars(_worker_app.options).update(options)
+    provider = _worker_providers.get(provider_class)
+    if provider is None:
+        provider = _worker_providers[provider_class] = \
+            provider_class(_worker_app)
+
+    results = []
+    for page in pages:
+        try:
+            results.append(provider.get_weather_info(page.decode('utf-8')))
+        except Exception:
+            # parsed again in the main process, which reports the error
+            results.append(None)
+    return results
+
+
+class ParsePool:
+    """ Parses pages of a provider in worker processes, so a run over
+    many cached pages is not limited to the one core the GIL leaves to
+    the html parser.
+
+    Pages are sent as raw bytes in chunks of chunk_size to amortize the
+    cost of inter-process calls and only the parsed weather_info comes
+    back. Worker processes are started on the first parse and kept
+    until shutdown.
+
+    :param processes: number of worker processes
+    :type processes: int
+    :param chunk_size: maximum number of pages sent to a worker at once
+    :type chunk_size: int
+    """
+
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, processes=config.PARSE_PROCESSES,
+                 chunk_size=config.PARSE_CHUNK_SIZE):
+        self.processes = processes
+        self.chunk_size = chunk_size
+        self.failed = 0
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def is_enabled(self, count):
+        """ Return True if count pages are worth parsing in workers.
+        """
+
+        return self.processes > 1 and count >= config.PARSE_POOL_MIN_PAGES
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context(
+                        config.PARSE_POOL_START_METHOD),
+                    initializer=init_worker)
+            return self._executor
+
+    def get_chunks(self, pages):
+        """ Split pages into chunks, small enough for every worker to get
+        one.
+        """
+
+        size = max(1, min(self.chunk_size,
+                          math.ceil(len(pages) / self.processes)))
+        return [pages[start:start + size]
+                for start in range(0, len(pages), size)]
+
+    def parse(self, provider, pages):
+        """ Return weather_info parsed from every page by the provider,
+        None for pages which could not be parsed in a worker.
+
+        :param provider: provider whose get_weather_info parses pages
+        :type provider: WeatherProvider
+        :param pages: raw pages
+        :type pages: list
+        """
+
+        chunks = self.get_chunks(pages)
+        options = provider.get_parse_arguments()
+        executor = self._get_executor()
+        futures = [executor.submit(parse_chunk, type(provider), options,
+                                   chunk) for chunk in chunks]
+        results = []
+        for future, chunk in zip(futures, chunks):
+            try:
+                results.extend(future.result())
+            except Exception:
+                # broken pool or provider which can not be sent to workers
+                self.logger.warning('Parsing in worker processes failed',
+                                    exc_info=True)
+                with self._lock:
+                    self.failed += len(chunk)
+                results.extend([None] * len(chunk))
+        return results
+
+    def shutdown(self, wait=True):
+        """ Stop worker processes.
+        """
+
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
@@ -0,0 +1,30 @@
+""" Module container for html parser backends.
+"""
+
+
+import logging
+
+from weatherapp.core import commandmanager
+from weatherapp.core.parsers import (SoupParser, LxmlParser, RegexParser,
+                                     StreamParser)
+
+
+class ParserManager(commandmanager.CommandManager):
+    """ Registry of html parser backends providers can run on.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    def _load_commands(self):
+        """ Loads all existing parser backends.
+        """
+
+        for parser in [SoupParser, LxmlParser, RegexParser, StreamParser]:
+            self.add(parser.name, parser)
+
+    def available(self):
+        """ Return names of backends whose libraries are installed.
+        """
+
+        return [name for name in self.names()
+                if self.get(name).is_available()]
@@ -0,0 +1,4 @@
+from weatherapp.core.parsers.soup import SoupParser
+from weatherapp.core.parsers.lxmltree import LxmlParser
+from weatherapp.core.parsers.regex import RegexParser
+from weatherapp.core.parsers.stream import StreamParser
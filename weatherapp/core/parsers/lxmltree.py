@@ -0,0 +1,57 @@
+""" Parser backend built on lxml.
+"""
+
+from weatherapp.core.abstract import Parser
+
+
+class LxmlParser(Parser):
+    """ Builds the document tree with the C-backed lxml parser and finds
+        fields with precompiled XPath expressions. Requires lxml
+        (pip install weatherapp.core[lxml]).
+    """
+
+    name = 'lxml'
+
+    def __init__(self):
+        self._xpaths = {}
+
+    @classmethod
+    def is_available(cls):
+        try:
+            import lxml.html  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    @staticmethod
+    def get_xpath(field):
+        """ Return XPath expression of the first element of the field.
+        """
+
+        conditions = []
+        for attr, value in sorted(field.attrs.items()):
+            if attr == 'class':
+                conditions.append(
+                    'contains(concat(" ", normalize-space(@class), " "), '
+                    '" {} ")'.format(value))
+            else:
+                conditions.append('@{}="{}"'.format(attr, value))
+        condition = '[{}]'.format(' and '.join(conditions)) if conditions \
+            else ''
+        return '(//{}{})[1]'.format(field.tag, condition)
+
+    def extract(self, page, fields):
+        import lxml.html
+        from lxml import etree
+
+        tree = lxml.html.fromstring(page)
+        result = {}
+        for name, field in fields.items():
+            expression = self.get_xpath(field)
+            xpath = self._xpaths.get(expression)
+            if xpath is None:
+                xpath = self._xpaths[expression] = etree.XPath(expression)
+            elements = xpath(tree)
+            result[name] = (self.clean(elements[0].text_content())
+                            if elements else None)
+        return result
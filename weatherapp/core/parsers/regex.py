@@ -0,0 +1,60 @@
+""" Parser backend extracting fields with regular expressions.
+"""
+
+import re
+import html
+
+from weatherapp.core.abstract import Parser
+
+
+class RegexParser(Parser):
+    """ Extracts fields without building a document tree.
+
+    A field is matched with its own pattern, or with a pattern derived
+    from its tag and attributes which captures the element content up to
+    the first closing tag, so elements nested in a same-named element
+    need an explicit pattern. Tags inside the captured content are
+    removed, like tree parsers join text of nested elements.
+    """
+
+    name = 'regex'
+
+    TAG = re.compile(r'<[^>]+>')
+
+    def __init__(self):
+        self._patterns = {}
+
+    @staticmethod
+    def get_pattern(field):
+        """ Return regular expression of the field.
+        """
+
+        if field.pattern:
+            return field.pattern
+
+        attrs = ''
+        for attr, value in sorted(field.attrs.items()):
+            if attr == 'class':
+                value = r'(?:[^"\']*\s)?{}(?:\s[^"\']*)?'.format(
+                    re.escape(value))
+            else:
+                value = re.escape(value)
+            attrs += r'(?=[^>]*\s{}=["\']{}["\'])'.format(
+                re.escape(attr), value)
+        return r'<{tag}\b{attrs}[^>]*>(.*?)</{tag}\s*>'.format(
+            tag=re.escape(field.tag), attrs=attrs)
+
+    def extract(self, page, fields):
+        result = {}
+        for name, field in fields.items():
+            key = (field.tag, tuple(sorted(field.attrs.items())),
+                   field.pattern)
+            pattern = self._patterns.get(key)
+            if pattern is None:
+                pattern = self._patterns[key] = re.compile(
+                    self.get_pattern(field), re.S | re.I)
+            match = pattern.search(page)
+            result[name] = (
+                self.clean(html.unescape(self.TAG.sub('', match.group(1))))
+                if match else None)
+        return result
@@ -0,0 +1,24 @@
+""" Parser backend built on BeautifulSoup with the stdlib html.parser.
+"""
+
+from weatherapp.core.abstract import Parser
+
+
+class SoupParser(Parser):
+    """ Builds the whole document tree with BeautifulSoup. Slowest, but
+        the most tolerant to broken markup.
+    """
+
+    name = 'html.parser'
+
+    def extract(self, page, fields):
+        # imported here to keep application startup fast
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(page, 'html.parser')
+        result = {}
+        for name, field in fields.items():
+            element = soup.find(field.tag, attrs=field.attrs)
+            result[name] = (self.clean(element.get_text())
+                            if element is not None else None)
+        return result
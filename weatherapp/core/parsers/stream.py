@@ -0,0 +1,101 @@
+""" Incremental parser backend built on the stdlib html.parser.
+"""
+
+from html.parser import HTMLParser
+
+from weatherapp.core.abstract import Parser
+
+
+class FieldCollector(HTMLParser):
+    """ Collects text of fields from html fed in chunks.
+
+    The page does not have to be complete: 'done' becomes true as soon as
+    every field is closed, so the rest of the page need not be read.
+
+    :param fields: Field objects by field name
+    :type fields: dict
+    """
+
+    def __init__(self, fields):
+        super().__init__(convert_charrefs=True)
+        self.fields = fields
+        self.result = dict.fromkeys(fields)
+        self._pending = set(fields)
+        # [field name, tag, nesting depth, text parts] of open fields
+        self._open = []
+
+    @property
+    def done(self):
+        return not self._pending and not self._open
+
+    @staticmethod
+    def matches(wanted, attrs):
+        """ Check that element attributes contain wanted ones.
+        """
+
+        for attr, value in wanted.items():
+            actual = attrs.get(attr) or ''
+            if attr == 'class':
+                if value not in actual.split():
+                    return False
+            elif actual != value:
+                return False
+        return True
+
+    def handle_starttag(self, tag, attrs):
+        for entry in self._open:
+            if entry[1] == tag:
+                entry[2] += 1
+        if not self._pending:
+            return
+        attrs = dict(attrs)
+        for name in [name for name in self._pending
+                     if self.fields[name].tag == tag]:
+            if self.matches(self.fields[name].attrs, attrs):
+                self._pending.discard(name)
+                self._open.append([name, tag, 1, []])
+
+    def handle_startendtag(self, tag, attrs):
+        pass
+
+    def handle_endtag(self, tag):
+        for entry in list(self._open):
+            if entry[1] == tag:
+                entry[2] -= 1
+                if not entry[2]:
+                    self._finish(entry)
+
+    def handle_data(self, data):
+        for entry in self._open:
+            entry[3].append(data)
+
+    def _finish(self, entry):
+        self._open.remove(entry)
+        self.result[entry[0]] = Parser.clean(''.join(entry[3]))
+
+    def close(self):
+        super().close()
+        for entry in list(self._open):
+            self._finish(entry)
+
+
+class StreamParser(Parser):
+    """ Extracts fields in a single pass without building a document
+        tree; also used to parse pages while they are downloaded (see
+        --stream).
+    """
+
+    name = 'stream'
+
+    @staticmethod
+    def collector(fields):
+        """ Return FieldCollector to feed page chunks into.
+        """
+
+        return FieldCollector(fields)
+
+    def extract(self, page, fields):
+        collector = self.collector(fields)
+        collector.feed(page)
+        collector.close()
+        return collector.result
@@ -0,0 +1,124 @@
+""" Export of application metrics in Prometheus text format.
+"""
+
+import os
+import tempfile
+
+from weatherapp.core import config
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def format_labels(labels, **extra):
+    """ Return labels in Prometheus notation, e.g. {provider="accu"}.
+    """
+
+    labels = list(labels) + sorted(extra.items())
+    if not labels:
+        return ''
+    return '{{{}}}'.format(','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', r'\\')
+                         .replace('"', r'\"').replace('\n', r'\n'))
+        for name, value in labels))
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def group(metrics):
+    """ Return (name, [(labels, value), ...]) pairs sorted by name.
+    """
+
+    grouped = {}
+    for (name, labels), value in metrics.items():
+        grouped.setdefault(name, []).append((labels, value))
+    return sorted((name, sorted(values)) for name, values in grouped.items())
+
+
+def cache_hit_ratio(counters):
+    """ Return cache hit ratio per provider computed from 'cache_hits' and
+    'cache_misses' counters.
+    """
+
+    totals = {}
+    for (name, labels), value in counters.items():
+        if name in ('cache_hits', 'cache_misses'):
+            provider = dict(labels).get('provider', '')
+            hits, lookups = totals.get(provider, (0, 0))
+            totals[provider] = (hits + (value if name == 'cache_hits' else 0),
+                                lookups + value)
+    return {('cache_hit_ratio', (('provider', provider),)): hits / lookups
+            for provider, (hits, lookups) in totals.items() if lookups}
+
+
+def render(metrics, namespace=config.METRICS_NAMESPACE):
+    """ Return all metrics of the registry in Prometheus text format.
+
+    Counters get the '_total' suffix, histograms of span durations the
+    '_seconds' suffix; the cache hit ratio gauge is computed from the
+    cache counters.
+
+    :param metrics: metrics registry
+    :type metrics: metrics.Metrics
+    :param namespace: prefix of metric names
+    :type namespace: str
+    """
+
+    lines = []
+    counters = metrics.counters()
+    for name, values in group(counters):
+        full_name = '{}_{}_total'.format(namespace, name)
+        lines.append('# TYPE {} counter'.format(full_name))
+        lines.extend('{}{} {}'.format(full_name, format_labels(labels),
+                                      format_value(value))
+                     for labels, value in values)
+
+    gauges = dict(metrics.gauges())
+    gauges.update(cache_hit_ratio(counters))
+    for name, values in group(gauges):
+        full_name = '{}_{}'.format(namespace, name)
+        lines.append('# TYPE {} gauge'.format(full_name))
+        lines.extend('{}{} {}'.format(full_name, format_labels(labels),
+                                      format_value(value))
+                     for labels, value in values)
+
+    for name, values in group(metrics.histograms()):
+        full_name = '{}_{}_seconds'.format(namespace, name)
+        lines.append('# TYPE {} histogram'.format(full_name))
+        for labels, histogram in values:
+            cumulative = 0
+            buckets = list(zip(metrics.buckets, histogram['buckets']))
+            # values above the largest bound are counted only in +Inf
+            buckets.append((float('inf'),
+                            histogram['count'] - sum(histogram['buckets'])))
+            for bound, count in buckets:
+                cumulative += count
+                lines.append('{}_bucket{} {}'.format(
+                    full_name, format_labels(labels, le=format_value(bound)),
+                    cumulative))
+            lines.append('{}_sum{} {}'.format(full_name,
+                                              format_labels(labels),
+                                              format_value(histogram['sum'])))
+            lines.append('{}_count{} {}'.format(full_name,
+                                                format_labels(labels),
+                                                histogram['count']))
+    return '\n'.join(lines) + '\n'
+
+
+def write_textfile(metrics, path):
+    """ Atomically write metrics to the file, e.g. for the node exporter
+    textfile collector.
+    """
+
+    directory = os.path.dirname(os.path.abspath(path))
+    descriptor, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'w') as temp_file:
+            temp_file.write(render(metrics))
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
@@ -3,23 +3,69 @@
 
 
 import logging
-import pkg_resources
+from importlib import metadata
 from weatherapp.core import config
 from weatherapp.core import commandmanager
 
 
 class ProviderManager(commandmanager.CommandManager):
     """ Discovers registered providers and loads them.
+
+    Providers are discovered by entry point names only; a provider
+    module is imported when the provider is used for the first time.
     """
 
     logger = logging.getLogger(__name__)
 
+    @staticmethod
+    def _get_entry_points():
+        """ Return entry points registered for providers.
+        """
+
+        try:
+            entry_points = metadata.entry_points(
+                group=config.PROVIDER_EP_NAMESPACE)
+        except TypeError:
+            # python < 3.10
+            entry_points = metadata.entry_points().get(
+                config.PROVIDER_EP_NAMESPACE, [])
+        return sorted(entry_points, key=lambda entry_point: entry_point.name)
+
     def _load_commands(self):
-        """ Loads all existing providers.
+        """ Discovers all existing providers.
+        """
+
+        for entry_point in self._get_entry_points():
+            if entry_point.name not in self._commands:
+                self.logger.debug('found provider %r', entry_point.name)
+                self._commands[entry_point.name] = entry_point
+
+    def _load(self, name):
+        """ Import provider registered under the name, if it is not
+            imported yet.
         """
 
-        entry_points = pkg_resources.iter_entry_points(
-            config.PROVIDER_EP_NAMESPACE)
-        for entry_point in entry_points:
-            self.logger.debug('found provider %r', entry_point.name)
-            self._commands[entry_point.name] = entry_point.load()
+        provider = self._commands[name]
+        if isinstance(provider, metadata.EntryPoint):
+            self.logger.debug('load provider %r', name)
+            provider = self._commands[name] = provider.load()
+        return provider
+
+    def get(self, name):
+        """ Gets provider from provider registry.
+        Returns none if there is no such provider registered.
+
+        :param name: provider name from argv
+        :type name: str
+        """
+
+        if name in self._commands:
+            return self._load(name)
+        return None
+
+    def __getitem__(self, name):
+        return self._load(name)
+
+    def __iter__(self):
+        for name in list(self._commands):
+            yield (name, self._load(name))
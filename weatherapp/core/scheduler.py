@@ -0,0 +1,174 @@
+""" Background refresh of cached pages before they expire.
+"""
+
+import time
+import heapq
+import random
+import logging
+import itertools
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from weatherapp.core import config
+
+
+class PrefetchScheduler:
+    """ Keeps cached pages of tracked urls warm.
+
+    Every tracked url is refreshed lead_time seconds (minus a random
+    jitter, so refreshes of many urls do not line up) before its cache
+    entry expires. At most 'workers' refreshes run at the same time, so
+    the scheduler never floods provider sites.
+
+    :param app: application instance
+    :type app: app.App
+    :param workers: maximum number of concurrent refreshes
+    :type workers: int
+    :param lead_time: seconds before expiry the page is refreshed
+    :type lead_time: float
+    :param jitter: maximum random shift of refresh time, in seconds
+    :type jitter: float
+    """
+
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, app, workers=config.PREFETCH_WORKERS,
+                 lead_time=config.PREFETCH_LEAD_TIME,
+                 jitter=config.PREFETCH_JITTER,
+                 retry_interval=config.PREFETCH_RETRY_INTERVAL):
+        self.app = app
+        self.workers = workers
+        self.lead_time = lead_time
+        self.jitter = jitter
+        self.retry_interval = retry_interval
+        self.refreshed = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.last_lag = 0.0
+        self._queue = []
+        self._tracked = set()
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._slots = threading.Semaphore(workers)
+        self._stopped = threading.Event()
+        self._executor = None
+        self._thread = None
+
+    def track(self, provider, url):
+        """ Start refreshing given url of the provider.
+        """
+
+        with self._condition:
+            if url in self._tracked:
+                return
+            self._tracked.add(url)
+        ttl = provider.get_cache_ttl(url)
+        self._schedule(provider, url, self.get_delay(ttl or 0))
+
+    def track_providers(self):
+        """ Track urls of every configured location of all providers,
+            a url shared by several locations is refreshed once.
+        """
+
+        for name in self.app.providermanager.names():
+            provider = self.app.get_provider(name)
+            for url in OrderedDict.fromkeys(
+                    url for location, url in provider.locations):
+                self.track(provider, url)
+
+    def get_delay(self, ttl):
+        """ Return seconds to wait before refreshing a page which stays
+            fresh for ttl seconds.
+        """
+
+        return max(ttl - self.lead_time - random.uniform(0, self.jitter), 0)
+
+    def _schedule(self, provider, url, delay):
+        with self._condition:
+            heapq.heappush(self._queue, (time.monotonic() + delay,
+                                         next(self._counter), provider, url))
+            self._condition.notify()
+
+    def start(self):
+        """ Start scheduler thread.
+        """
+
+        self._stopped.clear()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers)
+        self._thread = threading.Thread(target=self._loop, daemon=True,
+                                        name='prefetch-scheduler')
+        self._thread.start()
+
+    def stop(self):
+        """ Stop scheduler, refreshes already running are not waited for.
+        """
+
+        self._stopped.set()
+        with self._condition:
+            self._condition.notify_all()
+        if self._executor:
+            self._executor.shutdown(wait=False)
+
+    def _loop(self):
+        while not self._stopped.is_set():
+            with self._condition:
+                if not self._queue:
+                    self._condition.wait(1)
+                    continue
+                delay = self._queue[0][0] - time.monotonic()
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+            # wait for a free slot while the entry is still counted
+            # in the queue depth
+            if not self._slots.acquire(timeout=1):
+                continue
+            with self._condition:
+                due, _, provider, url = heapq.heappop(self._queue)
+                self.in_flight += 1
+            self.last_lag = time.monotonic() - due
+            try:
+                self._executor.submit(self._refresh, provider, url)
+            except RuntimeError:
+                # executor is shut down
+                self._slots.release()
+                return
+
+    def _refresh(self, provider, url):
+        try:
+            provider.fetch_page(url)
+        except Exception:
+            self.logger.exception('Prefetch of %s failed', url)
+            # refreshes run in several worker threads
+            with self._condition:
+                self.failed += 1
+            delay = self.retry_interval + random.uniform(0, self.jitter)
+        else:
+            with self._condition:
+                self.refreshed += 1
+            delay = self.get_delay(provider.get_cache_ttl(url) or 0)
+        finally:
+            with self._condition:
+                self.in_flight -= 1
+            self._slots.release()
+        self._schedule(provider, url, delay)
+
+    def stats(self):
+        """ Return scheduler statistics.
+
+        'queue_depth' is the number of refreshes which are due but not
+        started yet, 'lag' is how late (in seconds) the most overdue of
+        them is and 'last_lag' is how late the last started refresh was.
+        """
+
+        now = time.monotonic()
+        with self._condition:
+            overdue = [due for due, _, _, _ in self._queue if due <= now]
+            return {'tracked': len(self._tracked),
+                    'queue_depth': len(overdue),
+                    'in_flight': self.in_flight,
+                    'lag': now - min(overdue) if overdue else 0.0,
+                    'last_lag': self.last_lag,
+                    'refreshed': self.refreshed,
+                    'failed': self.failed}
@@ -0,0 +1,95 @@
+import json
+import unittest
+import threading
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+
+from weatherapp.core import client
+from weatherapp.core.app import App
+from weatherapp.core.daemon import DaemonServer
+
+
+class DaemonTestCase(unittest.TestCase):
+
+    """ Test case for daemon mode and thin client.
+    """
+
+    def setUp(self):
+        self.app = App()
+        self.server = DaemonServer(self.app, ('127.0.0.1', 0))
+        threading.Thread(target=self.server.serve_forever,
+                         daemon=True).start()
+        self.host, self.port = self.server.server_address
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_query(self):
+        """ Query output is sent back to the client.
+        """
+
+        expected = ''.join('{} \n'.format(name)
+                           for name in self.app.providermanager.names())
+        for _ in range(2):
+            self.assertEqual(client.query(['providers'], self.host,
+                                          self.port), expected)
+
+    def test_concurrent_queries(self):
+        """ Concurrent queries get their own output.
+        """
+
+        expected = ''.join('{} \n'.format(name)
+                           for name in self.app.providermanager.names())
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            outputs = list(executor.map(
+                lambda _: client.query(['providers'], self.host, self.port),
+                range(8)))
+        self.assertEqual(outputs, [expected] * 8)
+
+    def test_refused_queries(self):
+        """ Long-running commands and whole-run options are refused, so
+        the client runs them locally.
+        """
+
+        for argv in (['prefetch'], ['serve'], ['providers', '--timings'],
+                     ['--profile', 'run.prof'], ['--trace', 'run.json'],
+                     ['--metrics_file', 'run.prom']):
+            with self.assertRaises(OSError):
+                client.query(argv, self.host, self.port)
+
+    def test_bad_arguments(self):
+        """ Argument errors do not stop the server.
+        """
+
+        with self.assertRaises(OSError):
+            client.query(['--workers', 'many'], self.host, self.port)
+        self.assertEqual(client.query(['clear_cache'], self.host, self.port),
+                         'Deletion completed! \n')
+
+    def test_stats(self):
+        """ Stats endpoint returns warm state counters.
+        """
+
+        connection = http.client.HTTPConnection(self.host, self.port)
+        connection.request('GET', '/stats')
+        stats = json.loads(connection.getresponse().read().decode('utf-8'))
+        connection.close()
+        self.assertIn('memorycache', stats)
+        self.assertIn('sessions', stats)
+
+    def test_metrics(self):
+        """ Metrics endpoint returns Prometheus text format.
+        """
+
+        client.query(['providers'], self.host, self.port)
+        connection = http.client.HTTPConnection(self.host, self.port)
+        connection.request('GET', '/metrics')
+        response = connection.getresponse()
+        text = response.read().decode('utf-8')
+        connection.close()
+        self.assertTrue(response.getheader('Content-Type').startswith(
+            'text/plain; version=0.0.4'))
+        self.assertIn('# TYPE weatherapp_command_seconds histogram', text)
+        self.assertIn('weatherapp_command_seconds_count'
+                      '{command="providers"} 1', text)
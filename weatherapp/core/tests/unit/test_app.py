@@ -1,11 +1,73 @@
+import io
+import os
+import json
+import time
+import tempfile
 import unittest
 import argparse
 import logging
+from unittest import mock
 
+from weatherapp.core import config
 from weatherapp.core.app import App
 from weatherapp.core.formatters import TableFormatter, CsvFormatter
 
 
+class SleepyProvider:
+    """ Provider stub which sleeps instead of fetching a page.
+    """
+
+    def __init__(self, name, delay):
+        self.name = name
+        self.delay = delay
+
+    def get_name(self):
+        return self.name
+
+    def run_locations(self, argv):
+        time.sleep(self.delay)
+        return [(self.name, {'temp': self.name})]
+
+
+class ThrottledProvider(SleepyProvider):
+    """ Provider stub whose locations are all on one host and wait for
+        its rate limiter instead of fetching pages.
+    """
+
+    def __init__(self, name, app, count):
+        super().__init__(name, 0)
+        self.app = app
+        self.locations = [(str(index), 'http://example.com/{}'.format(index))
+                          for index in range(count)]
+
+    def run_locations(self, argv):
+        sessionmanager = self.app.sessionmanager
+        for name, url in self.locations:
+            bucket, breaker = sessionmanager.guards(
+                sessionmanager.get_host(url))
+            bucket.acquire()
+        return [(name, {'temp': name}) for name, url in self.locations]
+
+
+class ProfiledProvider(SleepyProvider):
+    """ Provider stub which fetches and parses a page in its run.
+    """
+
+    title = 'Profiled'
+
+    def __init__(self, name):
+        super().__init__(name, 0)
+
+    def fetch_page(self):
+        return self.name
+
+    def get_weather_info(self, page):
+        return {'temp': page}
+
+    def run_locations(self, argv):
+        return [(self.name, self.get_weather_info(self.fetch_page()))]
+
+
 class AppTestCase(unittest.TestCase):
 
     """ Test application class methods.
@@ -60,3 +122,135 @@ class AppTestCase(unittest.TestCase):
         # Checks to see if this logger has any handlers configured.
         # Returns True if a handler was found, else False.
         self.assertTrue(logger.hasHandlers())
+
+
+class RunConcurrentlyTestCase(unittest.TestCase):
+
+    """ Test concurrent provider fan-out.
+    """
+
+    def setUp(self):
+        self.app = App()
+
+    def test_stable_order(self):
+        """ Results are yielded in provider order, not completion order.
+        """
+
+        self.app.options = self.app.arg_parser.parse_args(['--workers', '3'])
+        providers = [SleepyProvider('slow', 0.2), SleepyProvider('fast', 0),
+                     SleepyProvider('medium', 0.1)]
+        names = [provider.get_name() for provider, info in
+                 self.app.run_concurrently(providers, [])]
+        self.assertEqual(names, ['slow', 'fast', 'medium'])
+
+    def test_wall_clock(self):
+        """ Wall-clock time is close to the slowest single provider.
+        """
+
+        self.app.options = self.app.arg_parser.parse_args(['--workers', '4'])
+        providers = [SleepyProvider(str(i), 0.2) for i in range(4)]
+        start = time.monotonic()
+        results = list(self.app.run_concurrently(providers, []))
+        self.assertEqual(len(results), 4)
+        self.assertLess(time.monotonic() - start, 0.6)
+
+    def test_deadline(self):
+        """ Providers exceeding the deadline are skipped.
+        """
+
+        self.app.options = self.app.arg_parser.parse_args(
+            ['--workers', '2', '--deadline', '0.1'])
+        providers = [SleepyProvider('slow', 0.5), SleepyProvider('fast', 0)]
+        names = [provider.get_name() for provider, info in
+                 self.app.run_concurrently(providers, [])]
+        self.assertEqual(names, ['fast'])
+
+    def test_deadline_many_locations(self):
+        """ Time locations wait for the rate limiter extends the deadline.
+        """
+
+        # default limits and deadline, 20 times faster
+        speedup = 20
+        self.app.options = self.app.arg_parser.parse_args([])
+        self.app.options.deadline /= speedup
+        limits = {'example.com': (config.HTTP_RATE_LIMIT * speedup,
+                                  config.HTTP_RATE_BURST)}
+        provider = ThrottledProvider('many', self.app, 70)
+
+        with mock.patch.dict(config.HTTP_HOST_RATE_LIMITS, limits):
+            self.assertGreater(self.app.get_deadline(provider),
+                               self.app.options.deadline)
+            results = dict(self.app.run_concurrently(
+                [provider, SleepyProvider('fast', 0)], []))
+
+        self.assertEqual(len(results[provider]), 70)
+
+
+class OutputLocationsTestCase(unittest.TestCase):
+
+    """ Test combined output for many locations.
+    """
+
+    def test_plain_output(self):
+        """ Every location is written on its own line.
+        """
+
+        stdout = io.StringIO()
+        app = App(stdout=stdout)
+        app.options = app.arg_parser.parse_args(['-f'])
+        app.output_locations('Dummy', [('Kyiv', {'temp': '1'}),
+                                       ('Lviv', {'temp': '2', 'wind': 'N'})])
+
+        lines = stdout.getvalue().splitlines()
+        self.assertEqual(lines[2], 'location: Kyiv; temp: 1; wind: ')
+        self.assertEqual(lines[3], 'location: Lviv; temp: 2; wind: N')
+
+
+class MetricsOutputTestCase(unittest.TestCase):
+
+    """ Test stage timings and trace output.
+    """
+
+    def test_timings_and_trace(self):
+        """ Provider runs are shown per provider and saved as trace.
+        """
+
+        descriptor, trace = tempfile.mkstemp(suffix='.json')
+        os.close(descriptor)
+        self.addCleanup(os.unlink, trace)
+        app = App(stderr=io.StringIO())
+        app.options = app.arg_parser.parse_args(
+            ['--workers', '2', '--timings', '--trace', trace])
+        list(app.run_concurrently([SleepyProvider('slow', 0.05),
+                                   SleepyProvider('fast', 0)], []))
+        app.output_metrics()
+
+        lines = app.stderr.getvalue().splitlines()
+        self.assertEqual(lines[0].split(), ['stage', 'provider', 'calls',
+                                            'total', 'ms', 'max', 'ms'])
+        self.assertEqual(lines[1].split()[:3], ['run', 'slow', '1'])
+        with open(trace) as trace_file:
+            events = json.load(trace_file)['traceEvents']
+        self.assertIn(('run', {'provider': 'fast'}),
+                      [(event['name'], event['args']) for event in events])
+
+    def test_profile(self):
+        """ Profile of the run includes work of every provider.
+        """
+
+        descriptor, profile = tempfile.mkstemp(suffix='.prof')
+        os.close(descriptor)
+        self.addCleanup(os.unlink, profile)
+        app = App(stdout=io.StringIO())
+        app.providers = {name: ProfiledProvider(name)
+                         for name in ('first', 'second')}
+        with mock.patch.object(app.providermanager, 'names',
+                               return_value=list(app.providers)):
+            app.run(['--workers', '2', '--profile', profile, '--no_history',
+                     '--log_file', ''])
+
+        import pstats
+        functions = {name for filename, line, name in
+                     pstats.Stats(profile).stats}
+        self.assertTrue({'fetch_page', 'get_weather_info'} <= functions)
+        self.assertEqual(app.stdout.getvalue().count('Profiled'), 2)
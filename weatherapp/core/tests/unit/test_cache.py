@@ -0,0 +1,185 @@
+import time
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from weatherapp.core.cache import MemoryCache, FileCache, SqliteCache
+
+
+class MemoryCacheTestCase(unittest.TestCase):
+
+    """ Unit test case for in-process LRU cache.
+    """
+
+    def test_get_set(self):
+        """ Stored value is returned and counted as hit.
+        """
+
+        cache = MemoryCache()
+        cache.set('key', b'value')
+
+        self.assertEqual(cache.get('key'), b'value')
+        self.assertIsNone(cache.get('other'))
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 1)
+
+    def test_ttl(self):
+        """ Expired entries are not returned.
+        """
+
+        cache = MemoryCache()
+        cache.set('key', b'value', ttl=0.01)
+        time.sleep(0.02)
+
+        self.assertIsNone(cache.get('key'))
+        self.assertEqual(len(cache), 0)
+
+    def test_entry_budget(self):
+        """ Least recently used entry is evicted first.
+        """
+
+        cache = MemoryCache(max_entries=2)
+        cache.set('a', b'1')
+        cache.set('b', b'2')
+        cache.get('a')
+        cache.set('c', b'3')
+
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_byte_budget(self):
+        """ Total size of values is kept within the byte budget.
+        """
+
+        cache = MemoryCache(max_bytes=10)
+        cache.set('a', b'x' * 6)
+        cache.set('b', b'x' * 6)
+        cache.set('c', b'x' * 11)
+
+        self.assertNotIn('a', cache)
+        self.assertIn('b', cache)
+        self.assertNotIn('c', cache)
+        self.assertEqual(cache.stats()['bytes'], 6)
+
+
+class FileCacheTestCase(unittest.TestCase):
+
+    """ Unit test case for one-file-per-page cache backend.
+    """
+
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        self.cache = self.create_cache()
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def create_cache(self):
+        return FileCache(self.directory / 'cache')
+
+    def test_set_get(self):
+        """ Page is stored with its validators and update time.
+        """
+
+        self.assertIsNone(self.cache.get('key'))
+        self.cache.set('key', b'page', {'etag': '"v1"'})
+
+        page, meta, updated = self.cache.get('key')
+        self.assertEqual(page, b'page')
+        self.assertEqual(meta, {'etag': '"v1"'})
+        self.assertAlmostEqual(updated, time.time(), delta=5)
+        self.assertEqual(self.cache.get_meta('key'), (meta, updated))
+
+    def test_touch(self):
+        """ Touch replaces validators and keeps the page.
+        """
+
+        self.cache.set('key', b'page', {'etag': '"v1"'})
+        self.assertTrue(self.cache.touch('key', {'etag': '"v2"'}))
+
+        self.assertEqual(self.cache.get('key')[:2],
+                         (b'page', {'etag': '"v2"'}))
+        self.assertFalse(self.cache.touch('other', {'etag': '"v2"'}))
+        self.assertIsNone(self.cache.get('other'))
+
+    def test_page_without_meta(self):
+        """ Page whose meta is missing or belongs to another page is not
+            returned.
+        """
+
+        if not isinstance(self.cache, FileCache):
+            self.skipTest('page and meta are stored in one row')
+        self.cache.set('key', b'page', {'etag': '"v1"'})
+        # interrupted between the renames of the page and its meta
+        (self.cache.directory / 'key').write_bytes(b'new page')
+        self.assertIsNone(self.cache.get('key'))
+        self.assertIsNone(self.cache.get_meta('key'))
+
+        self.cache.set('key', b'new page', {'etag': '"v2"'})
+        self.cache._meta_path('key').unlink()
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_delete_clear(self):
+        """ Entries are removed one by one or all at once.
+        """
+
+        self.cache.set('a', b'1', {})
+        self.cache.set('b', b'2', {})
+        self.cache.delete('a')
+        self.assertIsNone(self.cache.get('a'))
+        self.cache.clear()
+        self.assertIsNone(self.cache.get('b'))
+
+    def test_compact(self):
+        """ Compaction removes outdated entries only.
+        """
+
+        self.cache.set('old', b'1', {})
+        time.sleep(0.05)
+        self.cache.set('new', b'2', {})
+        self.cache.compact(max_age=0.03)
+
+        self.assertIsNone(self.cache.get('old'))
+        self.assertIsNotNone(self.cache.get('new'))
+
+
+class SqliteCacheTestCase(FileCacheTestCase):
+
+    """ Unit test case for single-file SQLite cache backend.
+    """
+
+    def create_cache(self):
+        return SqliteCache(self.directory / 'cache.sqlite', compression=6,
+                           max_size=0)
+
+    def test_compression(self):
+        """ Compressed pages take less space and read back unchanged.
+        """
+
+        page = b'<html>' + b'weather ' * 1000 + b'</html>'
+        self.cache.set('key', page, {})
+
+        size = self.cache.connection.execute(
+            'SELECT size FROM pages').fetchone()[0]
+        self.assertLess(size, len(page) / 10)
+        self.assertEqual(self.cache.get('key')[0], page)
+
+    def test_eviction(self):
+        """ Oldest entries are evicted when size limit is exceeded.
+        """
+
+        cache = SqliteCache(self.directory / 'small.sqlite', max_size=25)
+        for key in 'abc':
+            cache.set(key, b'x' * 10, {})
+
+        self.assertIsNone(cache.get('a'))
+        self.assertIsNotNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('c'))
+        cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
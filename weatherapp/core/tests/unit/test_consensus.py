@@ -0,0 +1,121 @@
+import io
+import sys
+import math
+import unittest
+import subprocess
+
+from weatherapp.core.app import App
+from weatherapp.core import consensus
+from weatherapp.core.consensus import Consensus
+from weatherapp.core.observation import Condition
+
+RESULTS = [
+    ('accu', 'Kyiv', {'cond': 'Sunny', 'temp': '10', 'wind': '2 m/s'}),
+    ('rp5', 'Kyiv', {'cond': 'Clear', 'temp': '11', 'wind': '3 m/s'}),
+    ('sinoptik', 'Kyiv', {'cond': 'Rain', 'temp': '25', 'wind': '4 m/s'}),
+    ('extra', 'Kyiv', {'cond': 'Sunny', 'temp': '12'}),
+    ('accu', 'Lviv', {'cond': 'Rain', 'temp': '5'}),
+    ('rp5', 'Lviv', {'temp': '8'}),
+    ('sinoptik', 'Lviv', {}),
+]
+
+
+class ConsensusTestCase(unittest.TestCase):
+
+    """ Unit test case for consensus of providers, computed with plain
+        Python.
+    """
+
+    use_numpy = False
+
+    def compute(self, results=RESULTS, **options):
+        return Consensus(use_numpy=self.use_numpy, **options).compute(results)
+
+    def test_statistics(self):
+        """ Mean, median and spread are computed per location.
+        """
+
+        result = self.compute()
+        temp = result.stats['temp']
+
+        self.assertEqual(result.locations, ['Kyiv', 'Lviv'])
+        self.assertEqual(list(temp['count']), [4, 2])
+        self.assertEqual(list(temp['mean']), [14.5, 6.5])
+        self.assertEqual(list(temp['median']), [11.5, 6.5])
+        self.assertEqual(list(temp['spread']), [15.0, 3.0])
+        self.assertEqual(list(result.stats['wind']['median'])[0], 3.0)
+        self.assertTrue(math.isnan(result.stats['wind']['mean'][1]))
+
+    def test_outliers(self):
+        """ Values far from the median are flagged, at least three
+            values are needed.
+        """
+
+        result = self.compute()
+
+        self.assertEqual([bool(flag) for flag in result.outliers['temp']],
+                         [False, False, True, False, False, False])
+        self.assertEqual(result.get_outliers(),
+                         {'Kyiv': [('sinoptik', 'temp')]})
+        self.assertEqual(self.compute(min_deviation=20).get_outliers(), {})
+
+    def test_conditions(self):
+        """ Most frequent known condition wins.
+        """
+
+        result = self.compute()
+        self.assertEqual([Condition(mode) for mode in result.conditions],
+                         [Condition.CLEAR, Condition.RAIN])
+
+    def test_summary(self):
+        """ Summary is displayed as one row per location.
+        """
+
+        stdout = io.StringIO()
+        app = App(stdout=stdout)
+        app.options = app.arg_parser.parse_args(['-f'])
+        app.output_consensus(self.compute())
+
+        lines = stdout.getvalue().splitlines()
+        self.assertEqual(lines[0], 'Consensus:')
+        self.assertTrue(lines[2].startswith(
+            'location: Kyiv; providers: 4; cond: clear; temp: 14.5; '
+            'temp median: 11.5; temp spread: 15.0;'))
+        self.assertTrue(lines[2].endswith('outliers: sinoptik (temp)'))
+
+    def test_empty(self):
+        """ No results give no locations.
+        """
+
+        result = self.compute([('accu', 'Kyiv', None)])
+        self.assertEqual(result.locations, [])
+        self.assertEqual(result.summary(), [])
+
+
+@unittest.skipIf(consensus.get_numpy() is None, 'numpy is not installed')
+class NumpyConsensusTestCase(ConsensusTestCase):
+
+    """ Unit test case for consensus of providers, computed with numpy.
+    """
+
+    use_numpy = True
+
+
+class ConsensusImportTestCase(unittest.TestCase):
+
+    """ Unit test case for the cost of consensus at startup.
+    """
+
+    def test_numpy_not_imported(self):
+        """ numpy is imported by the consensus only, not at startup.
+        """
+
+        output = subprocess.check_output([
+            sys.executable, '-c',
+            'import sys, weatherapp.core.app; '
+            'print("numpy" in sys.modules)'])
+        self.assertEqual(output.strip(), b'False')
+
+
+if __name__ == '__main__':
+    unittest.main()
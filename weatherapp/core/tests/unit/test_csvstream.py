@@ -0,0 +1,60 @@
+import io
+import gzip
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from weatherapp.core.csvstream import CsvStreamWriter
+
+
+class CsvStreamWriterTestCase(unittest.TestCase):
+
+    """ Unit test case for streaming csv writer.
+    """
+
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_file_object(self):
+        """ Rows follow the fixed schema.
+        """
+
+        stream = io.StringIO()
+        with CsvStreamWriter(stream, ['location', 'temp']) as writer:
+            writer.write({'location': 'Kyiv', 'temp': '10', 'extra': 'x'})
+            writer.write({'location': 'Lviv'})
+
+        self.assertEqual(stream.getvalue().splitlines(),
+                         ['location,temp', 'Kyiv,10', 'Lviv,'])
+        self.assertEqual(writer.rows, 2)
+
+    def test_append(self):
+        """ Header is written only once when appending.
+        """
+
+        path = self.directory / 'data.csv'
+        for temp in ('10', '11'):
+            with CsvStreamWriter(path, ['temp'], append=True) as writer:
+                writer.write({'temp': temp})
+
+        self.assertEqual(path.read_text().splitlines(), ['temp', '10', '11'])
+
+    def test_gzip(self):
+        """ Files with .gz suffix are compressed.
+        """
+
+        path = self.directory / 'data.csv.gz'
+        for temp in ('10', '11'):
+            with CsvStreamWriter(path, ['temp'], append=True) as writer:
+                writer.write({'temp': temp})
+
+        with gzip.open(path, 'rt') as data:
+            self.assertEqual(data.read().splitlines(), ['temp', '10', '11'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import io
+import unittest
+
+from weatherapp.core.app import App
+from weatherapp.core.formatters import TableFormatter, CsvFormatter
+
+
+class TableFormatterTestCase(unittest.TestCase):
+
+    """ Unit test case for table formatter.
+    """
+
+    def setUp(self):
+        self.stdout = io.StringIO()
+
+    def test_emit(self):
+        """ Table is written to the given stream.
+        """
+
+        TableFormatter({}, self.stdout).emit(['Kyiv', 'today'],
+                                             {'temp': '10'})
+
+        output = self.stdout.getvalue()
+        self.assertIn('Kyiv', output)
+        self.assertIn('| temp |', output)
+
+    def test_options(self):
+        """ Render options are applied to the table.
+        """
+
+        TableFormatter({'align': 'l', 'vertical_char': '#',
+                        'horizontal_char': '='},
+                       self.stdout).emit_rows(['location', 'temp'],
+                                              [['Kyiv', '10']])
+
+        output = self.stdout.getvalue()
+        self.assertIn('# Kyiv', output)
+        self.assertIn('====', output)
+
+    def test_app_options(self):
+        """ Application passes its parsed options to the formatter.
+        """
+
+        app = App(stdout=self.stdout)
+        app.options = app.arg_parser.parse_args(['-v_char', '#'])
+        self.assertEqual(app.get_formatter_options()['vertical_char'], '#')
+
+        app.output_weather_info('Dummy', 'Kyiv', {'temp': '10'})
+        self.assertIn('# temp', self.stdout.getvalue())
+
+
+class CsvFormatterTestCase(unittest.TestCase):
+
+    """ Unit test case for csv table formatter.
+    """
+
+    def test_emit(self):
+        """ Table is written to the given stream without temporary files.
+        """
+
+        stdout = io.StringIO()
+        CsvFormatter({}, stdout).emit(['Kyiv', 'today'], {'temp': '10'})
+
+        self.assertEqual(stdout.getvalue().splitlines()[1], '| Kyiv|temp|')
+        self.assertEqual(stdout.getvalue().splitlines()[3], '|today| 10 |')
+
+
+if __name__ == '__main__':
+    unittest.main()
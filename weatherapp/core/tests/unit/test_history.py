@@ -0,0 +1,221 @@
+import io
+import time
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from weatherapp.core.app import App
+from weatherapp.core.history import HistoryStore, get_day
+from weatherapp.core.commands.history import parse_duration, parse_time
+
+# noon of 2020-01-31 UTC
+NOON = 1580472000.0
+
+
+class HistoryStoreTestCase(unittest.TestCase):
+
+    """ Unit test case for the observation history store.
+    """
+
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        self.history = HistoryStore(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_append_and_query(self):
+        """ Observations are read back per series in time order.
+        """
+
+        self.history.append('accu', 'Kyiv', {'cond': 'Sunny', 'temp': '+12',
+                                             'wind': '3 m/s'}, NOON)
+        self.history.append('accu', 'Lviv', {'cond': 'Rain', 'temp': '8'},
+                            NOON + 10)
+        self.history.append('accu', 'Kyiv', {'cond': 'Cloudy',
+                                             'temp': '11'}, NOON + 60)
+
+        rows = list(self.history.query())
+        self.assertEqual([(row['location'], row['cond'], row['temp'])
+                          for row in rows],
+                         [('Kyiv', 'Sunny', 12.0), ('Kyiv', 'Cloudy', 11.0),
+                          ('Lviv', 'Rain', 8.0)])
+        self.assertIsNone(rows[0]['feels_like'])
+        self.assertEqual(rows[0]['wind'], 3.0)
+        self.assertEqual(self.history.series()[
+            HistoryStore.get_series_id('accu', 'Lviv')], ('accu', 'Lviv'))
+
+    def test_range(self):
+        """ Range queries read only matching days and rows.
+        """
+
+        for hour in range(48):
+            self.history.append('accu', 'Kyiv', {'temp': str(hour)},
+                                NOON + hour * 3600)
+
+        self.assertEqual(len(self.history.days()), 3)
+        self.assertEqual(self.history.days(NOON + 24 * 3600),
+                         [get_day(NOON + 24 * 3600),
+                          get_day(NOON + 47 * 3600)])
+        rows = list(self.history.query(NOON + 10 * 3600, NOON + 14 * 3600))
+        self.assertEqual([row['temp'] for row in rows], [10, 11, 12, 13])
+        self.assertEqual(self.history.count(NOON + 10 * 3600), 38)
+        self.assertEqual(self.history.count(location='Lviv'), 0)
+
+    def test_downsample(self):
+        """ Observations are averaged over aligned intervals.
+        """
+
+        for minute, temp in enumerate([10, 12, 14, 20]):
+            self.history.append('accu', 'Kyiv', {'cond': 'Sunny',
+                                                 'temp': str(temp)},
+                                NOON + minute * 20 * 60)
+
+        buckets = self.history.downsample(3600)
+        self.assertEqual([(bucket['time'], bucket['count'], bucket['temp'],
+                           bucket['temp_min'], bucket['temp_max'])
+                          for bucket in buckets],
+                         [(NOON, 3, 12.0, 10.0, 14.0),
+                          (NOON + 3600, 1, 20.0, 20.0, 20.0)])
+        self.assertEqual(buckets[0]['cond'], 'Sunny')
+        self.assertIsNone(buckets[0]['wind'])
+
+    def test_time_never_goes_back(self):
+        """ Late observation keeps the time column sorted.
+        """
+
+        self.history.append('accu', 'Kyiv', {'temp': '1'}, NOON + 60)
+        self.history.append('accu', 'Kyiv', {'temp': '2'}, NOON)
+
+        self.assertEqual([row['time'] for row in self.history.query()],
+                         [NOON + 60, NOON + 60])
+
+    def test_incomplete_row(self):
+        """ Row of an interrupted write is ignored and then cut off.
+        """
+
+        self.history.append('accu', 'Kyiv', {'temp': '1'}, NOON)
+        series_id = HistoryStore.get_series_id('accu', 'Kyiv')
+        with (self.directory / get_day(NOON) /
+              (series_id + '.time')).open('ab') as times:
+            times.write(b'\0' * 8)
+
+        self.assertEqual(self.history.count(), 1)
+        self.history.append('accu', 'Kyiv', {'temp': '2'}, NOON + 1)
+        self.assertEqual([row['temp'] for row in self.history.query()],
+                         [1, 2])
+
+    def test_page_stored_once(self):
+        """ Weather of one page is stored once per series.
+        """
+
+        self.assertTrue(self.history.append('accu', 'Kyiv', {'temp': '1'},
+                                            NOON, digest='a'))
+        self.assertFalse(self.history.append('accu', 'Kyiv', {'temp': '1'},
+                                             NOON + 60, digest='a'))
+        self.assertTrue(self.history.append('accu', 'Lviv', {'temp': '1'},
+                                            NOON + 60, digest='a'))
+        self.assertTrue(self.history.append('accu', 'Kyiv', {'temp': '2'},
+                                            NOON + 120, digest='b'))
+
+        self.assertEqual(self.history.count(location='Kyiv'), 2)
+
+    def test_prune(self):
+        """ Days older than given time are removed.
+        """
+
+        self.history.append('accu', 'Kyiv', {'temp': '1'}, NOON)
+        self.history.append('accu', 'Kyiv', {'temp': '2'}, NOON + 86400)
+
+        self.assertEqual(self.history.prune(NOON + 86400), 1)
+        self.assertEqual([row['temp'] for row in self.history.query()], [2])
+
+
+class HistoryCommandTestCase(unittest.TestCase):
+
+    """ Unit test case for the history command.
+    """
+
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        self.app = App(stdout=io.StringIO())
+        self.app.history = HistoryStore(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def run_command(self, argv):
+        self.app.options, remaining_args = \
+            self.app.arg_parser.parse_known_args(['history', '-f'] + argv)
+        self.app.run_command('history', remaining_args)
+        return self.app.stdout.getvalue().splitlines()
+
+    def test_parse_time(self):
+        """ Ranges are given as local times or durations before now.
+        """
+
+        self.assertEqual(parse_duration('90'), 90)
+        self.assertEqual(parse_duration('1.5h'), 5400)
+        self.assertEqual(parse_time('7d', now=NOON), NOON - 7 * 86400)
+        self.assertEqual(parse_time('2020-01-31 12:00'),
+                         time.mktime((2020, 1, 31, 12, 0, 0, 0, 0, -1)))
+        with self.assertRaises(ValueError):
+            parse_duration('soon')
+
+    def test_record_and_show(self):
+        """ Provider results are stored and shown per location.
+        """
+
+        class Provider:
+            def get_name(self):
+                return 'accu'
+
+        self.app.options = self.app.arg_parser.parse_args([])
+        self.app.record_history(Provider(), [
+            ('Kyiv', {'cond': 'Sunny', 'temp': '+12°C'}),
+            ('Lviv', {'temp': '8', 'age': '2.0 h'}),
+            ('Odesa', {})])
+
+        lines = self.run_command(['--since', '1h'])
+        self.assertEqual(len(lines), 1)
+        self.assertIn('provider: accu; location: Kyiv; cond: Sunny; '
+                      'temp: 12; feels_like: ; wind: ', lines[0])
+
+    def test_record_cached_page_once(self):
+        """ Results of a cached page are stored once, at its fetch time.
+        """
+
+        class Provider:
+            locations = [('Kyiv', 'http://example.com/kyiv')]
+
+            def get_name(self):
+                return 'accu'
+
+            def get_page_info(self, url):
+                return 'digest', NOON
+
+        self.app.options = self.app.arg_parser.parse_args([])
+        self.app.cache = object()
+        for _ in range(3):
+            self.app.record_history(Provider(), [
+                ('Kyiv', {'cond': 'Sunny', 'temp': '+12°C'})])
+
+        self.assertEqual([row['time'] for row in self.app.history.query()],
+                         [NOON])
+
+    def test_downsample(self):
+        """ --every averages observations per location.
+        """
+
+        for temp in ('10', '13'):
+            self.app.history.append('accu', 'Kyiv', {'temp': temp}, NOON)
+
+        lines = self.run_command(['--every', '1d', '--limit', '1'])
+        self.assertIn('location: Kyiv; count: 2; cond: ; temp: 11.5',
+                      lines[0])
+        self.assertEqual(self.run_command(['--count'])[-1], '2 ')
+
+
+if __name__ == '__main__':
+    unittest.main()
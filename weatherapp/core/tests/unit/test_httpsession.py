@@ -0,0 +1,93 @@
+import socket
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from weatherapp.core.httpsession import SessionManager
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = b'<html>weather</html>'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class SessionManagerTestCase(unittest.TestCase):
+
+    """ Unit test case for pooled http sessions.
+    """
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), PageHandler)
+        threading.Thread(target=self.server.serve_forever,
+                         daemon=True).start()
+        self.url = 'http://127.0.0.1:{}/'.format(self.server.server_port)
+        self.manager = SessionManager()
+
+    def tearDown(self):
+        self.manager.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_session_per_host(self):
+        """ The same session is returned for urls of one host.
+        """
+
+        self.assertIs(self.manager.session(self.url),
+                      self.manager.session(self.url + 'other'))
+
+    def test_connection_reuse(self):
+        """ Sequential requests reuse one keep-alive connection.
+        """
+
+        for _ in range(3):
+            self.assertEqual(self.manager.get(self.url).content,
+                             b'<html>weather</html>')
+
+        stats = self.manager.stats()[SessionManager.get_host(self.url)]
+        self.assertEqual(stats, {'requests': 3, 'connections': 1,
+                                 'reused': 2})
+
+    def test_circuit_breaker(self):
+        """ Requests to a failing host fail without connecting.
+        """
+
+        with socket.socket() as free:
+            free.bind(('127.0.0.1', 0))
+            url = 'http://127.0.0.1:{}/'.format(free.getsockname()[1])
+        manager = SessionManager(retries=0, circuit_failures=2)
+
+        for _ in range(3):
+            with self.assertRaises(requests.ConnectionError):
+                manager.get(url)
+
+        stats = manager.host_stats()[SessionManager.get_host(url)]
+        self.assertEqual(stats['state'], 'open')
+        self.assertEqual(stats['rejected'], 1)
+
+    def test_queue_time(self):
+        """ Requests over the burst wait for the limiter of their host.
+        """
+
+        manager = SessionManager(rate_limit=5, rate_burst=10)
+        urls = ['http://a.example/{}'.format(index) for index in range(30)]
+        urls += ['http://b.example/{}'.format(index) for index in range(15)]
+
+        self.assertEqual(manager.get_queue_time(urls), 4.0)
+        self.assertEqual(manager.get_queue_time(urls[:10]), 0.0)
+        self.assertEqual(SessionManager(rate_limit=0).get_queue_time(urls),
+                         0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
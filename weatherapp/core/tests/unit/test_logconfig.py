@@ -0,0 +1,128 @@
+import io
+import sys
+import shutil
+import logging
+import tempfile
+import unittest
+from pathlib import Path
+
+from weatherapp.core import logconfig
+from weatherapp.core.app import App
+
+
+def make_record(message, created, repeat_key=None):
+    record = logging.LogRecord('test', logging.ERROR, __file__, 1,
+                               message, (), None)
+    record.created = created
+    if repeat_key is not None:
+        record.repeat_key = repeat_key
+    return record
+
+
+class RepeatFilterTestCase(unittest.TestCase):
+
+    """ Unit test case for suppression of repeated log records.
+    """
+
+    def test_repeats(self):
+        """ Records with a repeat key are passed once per interval.
+        """
+
+        repeat_filter = logconfig.RepeatFilter(interval=60)
+        passed = [repeat_filter.filter(make_record('down', created, 'host'))
+                  for created in (0, 1, 2, 30)]
+        self.assertEqual(passed, [True, False, False, False])
+
+        record = make_record('down', 61, 'host')
+        self.assertTrue(repeat_filter.filter(record))
+        self.assertEqual(record.getMessage(),
+                         'down (3 similar messages suppressed)')
+        self.assertTrue(repeat_filter.filter(make_record('up', 62, 'other')))
+        self.assertTrue(repeat_filter.filter(make_record('plain', 62)))
+        self.assertTrue(repeat_filter.filter(make_record('plain', 62)))
+
+
+class SetupLoggingTestCase(unittest.TestCase):
+
+    """ Unit test case for logging through the queue.
+    """
+
+    def setUp(self):
+        logconfig.stop_logging()
+        self.directory = Path(tempfile.mkdtemp())
+        self.path = self.directory / 'weatherapp.log'
+        self.root_logger = logging.getLogger('')
+        self.handlers = list(self.root_logger.handlers)
+
+    def tearDown(self):
+        logconfig.stop_logging()
+        shutil.rmtree(self.directory)
+
+    def test_setup_once(self):
+        """ Runs of the application do not add handlers.
+        """
+
+        app = App()
+        for verbose in ([], ['-v']):
+            app.options = app.arg_parser.parse_args(
+                verbose + ['--log_file', str(self.path)])
+            app.configurate_logging()
+
+        self.assertEqual(len(self.root_logger.handlers),
+                         len(self.handlers) + 1)
+        self.assertEqual(logconfig._state['console'].level, logging.INFO)
+        logging.getLogger('test').debug('written once')
+        logconfig.stop_logging()
+
+        self.assertEqual(self.path.read_text().count('written once'), 1)
+        self.assertEqual(self.root_logger.handlers, self.handlers)
+
+    def test_console_stream(self):
+        """ Console keeps its stream when sys.stderr is redirected.
+        """
+
+        console = io.StringIO()
+        logconfig.setup_logging(path='', stream=console)
+        stderr, sys.stderr = sys.stderr, io.StringIO()
+        try:
+            logging.getLogger('test').warning('from a background thread')
+            logconfig.stop_logging()
+        finally:
+            redirected, sys.stderr = sys.stderr, stderr
+
+        self.assertIn('from a background thread', console.getvalue())
+        self.assertEqual(redirected.getvalue(), '')
+
+    def test_library_levels(self):
+        """ Warnings of urllib3 retries are not logged.
+        """
+
+        console = io.StringIO()
+        logconfig.setup_logging(path='', stream=console)
+        logger = logging.getLogger('urllib3.connectionpool')
+        logger.warning('Retrying after connection broken')
+        logger.error('Can not reach the host')
+        logconfig.stop_logging()
+
+        self.assertNotIn('Retrying', console.getvalue())
+        self.assertIn('Can not reach the host', console.getvalue())
+
+    def test_rotation(self):
+        """ Log file is rotated when it grows over the limit.
+        """
+
+        logconfig.setup_logging(path=str(self.path), max_bytes=200,
+                                backup_count=1)
+        for index in range(10):
+            logging.getLogger('test').debug('record %d', index)
+        logconfig.stop_logging()
+
+        self.assertTrue(self.path.exists())
+        self.assertEqual(sorted(path.name
+                                for path in self.directory.iterdir()),
+                         ['weatherapp.log', 'weatherapp.log.1'])
+        self.assertIn('record 9', self.path.read_text())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import time
+import unittest
+
+from weatherapp.core.metrics import Metrics
+
+
+class MetricsTestCase(unittest.TestCase):
+
+    """ Unit test case for metrics registry.
+    """
+
+    def setUp(self):
+        self.metrics = Metrics(max_spans=3)
+
+    def test_counters(self):
+        """ Counters are summed over labels which are not asked for.
+        """
+
+        self.metrics.inc('cache_hits', provider='accu', tier='memory')
+        self.metrics.inc('cache_hits', 2, provider='accu', tier='files')
+        self.metrics.inc('cache_hits', provider='rp5', tier='files')
+
+        self.assertEqual(self.metrics.get('cache_hits'), 4)
+        self.assertEqual(self.metrics.get('cache_hits', provider='accu'), 3)
+        self.assertEqual(self.metrics.get('cache_hits', tier='files'), 3)
+        self.assertEqual(self.metrics.get('cache_misses'), 0)
+
+    def test_timings(self):
+        """ Spans are grouped by name and labels.
+        """
+
+        for provider in ('accu', 'accu', 'rp5'):
+            with self.metrics.span('fetch', provider=provider):
+                time.sleep(0.01)
+
+        timings = self.metrics.timings('provider')
+        self.assertEqual(sorted(timings), [('fetch', 'accu'),
+                                           ('fetch', 'rp5')])
+        self.assertEqual(timings['fetch', 'accu']['calls'], 2)
+        self.assertGreaterEqual(timings['fetch', 'accu']['total'], 0.02)
+
+    def test_span_limit(self):
+        """ Only most recent spans are kept.
+        """
+
+        for index in range(5):
+            self.metrics.add_span('stage', index, 1, index=index)
+        self.assertEqual([labels['index'] for name, labels, *rest
+                          in self.metrics.spans()], [2, 3, 4])
+
+    def test_chrome_trace(self):
+        """ Spans are exported as complete trace events in microseconds.
+        """
+
+        self.metrics.add_span('parse', 1.5, 0.25, provider='accu')
+        event, = self.metrics.chrome_trace()['traceEvents']
+        self.assertEqual((event['name'], event['ph'], event['ts'],
+                          event['dur'], event['args']),
+                         ('parse', 'X', 1500000, 250000,
+                          {'provider': 'accu'}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import io
+import unittest
+
+from weatherapp.core.formatters import TableFormatter
+from weatherapp.core.observation import (Observation, ObservationTable,
+                                         Condition, parse_number,
+                                         parse_temperature, parse_wind)
+
+
+class ObservationTestCase(unittest.TestCase):
+
+    """ Unit test case for normalized observations.
+    """
+
+    def test_parse_fields(self):
+        """ Numbers are read from provider texts and converted to °C and
+            m/s.
+        """
+
+        self.assertEqual(parse_number('+12°C'), 12.0)
+        self.assertEqual(parse_number('−3,5'), -3.5)
+        self.assertNotEqual(parse_number('calm'), parse_number('calm'))
+        self.assertEqual(parse_temperature('-4°'), -4.0)
+        self.assertEqual(parse_temperature('50°F'), 10.0)
+        self.assertIsNone(parse_temperature(''))
+        self.assertEqual(parse_wind('3 m/s NW'), (3.0, 'NW'))
+        self.assertEqual(parse_wind('18 km/h'), (5.0, ''))
+        self.assertEqual(parse_wind('Пн-З, 4 м/с'), (4.0, 'Пн-З,'))
+        self.assertEqual(parse_wind('Штиль'), (None, 'Штиль'))
+
+    def test_condition(self):
+        """ Condition texts of the providers are normalized.
+        """
+
+        self.assertEqual(Condition.from_text('Partly sunny'),
+                         Condition.PARTLY_CLOUDY)
+        self.assertEqual(Condition.from_text('Mostly cloudy'),
+                         Condition.CLOUDY)
+        self.assertEqual(Condition.from_text('Thunderstorms with rain'),
+                         Condition.THUNDERSTORM)
+        self.assertEqual(Condition.from_text('Мокрий сніг'), Condition.SLEET)
+        self.assertEqual(Condition.from_text('Малооблачно'),
+                         Condition.PARTLY_CLOUDY)
+        self.assertEqual(Condition.from_text('Ясно'), Condition.CLEAR)
+        self.assertEqual(Condition.from_text(''), Condition.UNKNOWN)
+
+    def test_weather_info(self):
+        """ Observation reads and writes weather_info dicts.
+        """
+
+        observation = Observation.from_weather_info(
+            {'cond': 'Light rain', 'temp': '+12°C', 'feels_like': '10°',
+             'wind': '3 m/s NW', 'age': '6 min'})
+
+        self.assertEqual(observation.condition, Condition.RAIN)
+        self.assertEqual((observation.temp, observation.feels_like,
+                          observation.wind), (12.0, 10.0, 3.0))
+        self.assertEqual(dict(observation),
+                         {'cond': 'Light rain', 'temp': '12°C',
+                          'feels_like': '10°C', 'wind': '3 m/s NW',
+                          'age': '6 min'})
+        self.assertEqual(observation.get('humidity'), None)
+        self.assertFalse(hasattr(observation, '__dict__'))
+
+    def test_formatter(self):
+        """ Formatters accept observations in place of dicts.
+        """
+
+        stdout = io.StringIO()
+        TableFormatter({}, stdout).emit(
+            ['Kyiv', 'today'],
+            Observation.from_weather_info({'cond': 'Sunny', 'temp': '5'}))
+
+        self.assertIn('| temp |  5°C  |', stdout.getvalue())
+
+
+class ObservationTableTestCase(unittest.TestCase):
+
+    """ Unit test case for array-backed observations.
+    """
+
+    def test_round_trip(self):
+        """ Stored observations are read back, texts are kept once.
+        """
+
+        table = ObservationTable([
+            {'cond': 'Sunny', 'temp': '12', 'wind': '3 m/s N'},
+            {'cond': 'Sunny', 'temp': '14', 'age': '2.0 h'},
+            {}])
+
+        self.assertEqual(len(table), 3)
+        self.assertEqual(table.strings, ['Sunny', 'N', ''])
+        self.assertEqual(list(table.column('temp'))[:2], [12.0, 14.0])
+        self.assertEqual(dict(table[1]), {'cond': 'Sunny', 'temp': '14°C',
+                                          'age': '2.0 h'})
+        self.assertEqual(table[0].wind_direction, 'N')
+        self.assertEqual(table[-1].condition, Condition.UNKNOWN)
+        self.assertIsNone(table[2].temp)
+        with self.assertRaises(IndexError):
+            table[3]
+
+    def test_size(self):
+        """ Observation takes a few bytes in the table.
+        """
+
+        table = ObservationTable({'cond': 'Sunny', 'temp': str(temp)}
+                                 for temp in range(1000))
+
+        self.assertLessEqual(table.nbytes / len(table), 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
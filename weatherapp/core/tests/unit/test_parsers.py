@@ -0,0 +1,92 @@
+import unittest
+
+from weatherapp.core.abstract import Field
+from weatherapp.core.parsermanager import ParserManager
+
+PAGE = '''<html><body>
+<div class="current">
+  <span class="cond">Partly&nbsp;sunny</span>
+  <span class="temp  large">12<sup>&deg;C</sup></span>
+  <span class="temp-feels">10&deg;C</span>
+  <div id="wind" data-unit="m/s">3 m/s
+     NW</div>
+</div>
+</body></html>'''
+
+FIELDS = {
+    'cond': Field('span', {'class': 'cond'}),
+    'temp': Field('span', {'class': 'large'}),
+    'feels_like': Field('span', {'class': 'temp-feels'}),
+    'wind': Field('div', {'id': 'wind'}),
+    'pressure': Field('span', {'class': 'pressure'}),
+}
+
+EXPECTED = {'cond': 'Partly sunny', 'temp': '12°C',
+            'feels_like': '10°C', 'wind': '3 m/s NW', 'pressure': None}
+
+
+class ParsersTestCase(unittest.TestCase):
+
+    """ Unit test case for html parser backends.
+    """
+
+    def setUp(self):
+        self.manager = ParserManager()
+
+    def check(self, name):
+        parser = self.manager.get(name)
+        if not parser.is_available():
+            self.skipTest('{} is not installed'.format(name))
+        result = parser().extract(PAGE, FIELDS)
+        self.assertEqual(result, EXPECTED)
+
+    def test_soup(self):
+        self.check('html.parser')
+
+    def test_lxml(self):
+        self.check('lxml')
+
+    def test_regex(self):
+        self.check('regex')
+
+    def test_stream(self):
+        self.check('stream')
+
+    def test_stream_chunks(self):
+        """ Fields are collected from chunks, collector is done once
+            every field is closed.
+        """
+
+        fields = dict(FIELDS)
+        del fields['pressure']
+        collector = self.manager.get('stream').collector(fields)
+        end = PAGE.index('</div>\n</div>') + len('</div>')
+        for start in range(0, end, 7):
+            self.assertFalse(collector.done)
+            collector.feed(PAGE[start:min(start + 7, end)])
+        collector.feed('\n')
+
+        self.assertTrue(collector.done)
+        expected = dict(EXPECTED)
+        del expected['pressure']
+        self.assertEqual(collector.result, expected)
+
+    def test_regex_pattern(self):
+        """ Explicit field pattern is used by the regex parser.
+        """
+
+        parser = self.manager.get('regex')()
+        result = parser.extract(PAGE, {'unit': Field(
+            'div', pattern=r'data-unit="([^"]+)"')})
+        self.assertEqual(result, {'unit': 'm/s'})
+
+    def test_available(self):
+        """ Parsers without installed libraries are not available.
+        """
+
+        self.assertIn('html.parser', self.manager.available())
+        self.assertIn('regex', self.manager.available())
+
+
+if __name__ == '__main__':
+    unittest.main()
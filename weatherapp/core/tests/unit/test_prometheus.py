@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from weatherapp.core import prometheus
+from weatherapp.core.metrics import Metrics
+
+
+class PrometheusTestCase(unittest.TestCase):
+
+    """ Unit test case for Prometheus text format export.
+    """
+
+    def setUp(self):
+        self.metrics = Metrics(buckets=(0.1, 1))
+
+    def test_counters_and_gauges(self):
+        """ Counters get _total suffix, hit ratio is computed.
+        """
+
+        self.metrics.inc('cache_hits', 3, provider='accu', tier='memory')
+        self.metrics.inc('cache_misses', provider='accu')
+        self.metrics.inc('fetch_errors', provider='rp5', host='rp5.ua',
+                         exception='ConnectTimeout')
+        self.metrics.add('http_in_flight', 1, host='rp5.ua')
+
+        lines = prometheus.render(self.metrics).splitlines()
+        self.assertIn('# TYPE weatherapp_cache_hits_total counter', lines)
+        self.assertIn('weatherapp_cache_hits_total{provider="accu",'
+                      'tier="memory"} 3', lines)
+        self.assertIn('weatherapp_fetch_errors_total{exception='
+                      '"ConnectTimeout",host="rp5.ua",provider="rp5"} 1',
+                      lines)
+        self.assertIn('weatherapp_http_in_flight{host="rp5.ua"} 1', lines)
+        self.assertIn('weatherapp_cache_hit_ratio{provider="accu"} 0.75',
+                      lines)
+
+    def test_histogram(self):
+        """ Buckets are cumulative and +Inf bucket holds all values.
+        """
+
+        for value in (0.05, 0.5, 0.5, 5):
+            self.metrics.observe('fetch', value, provider='accu')
+
+        lines = prometheus.render(self.metrics).splitlines()
+        self.assertEqual(lines, [
+            '# TYPE weatherapp_fetch_seconds histogram',
+            'weatherapp_fetch_seconds_bucket{provider="accu",le="0.1"} 1',
+            'weatherapp_fetch_seconds_bucket{provider="accu",le="1"} 3',
+            'weatherapp_fetch_seconds_bucket{provider="accu",le="+Inf"} 4',
+            'weatherapp_fetch_seconds_sum{provider="accu"} 6.05',
+            'weatherapp_fetch_seconds_count{provider="accu"} 4'])
+
+    def test_label_escaping(self):
+        self.metrics.inc('errors', reason='say "hi"\n')
+        self.assertIn(r'weatherapp_errors_total{reason="say \"hi\"\n"} 1',
+                      prometheus.render(self.metrics))
+
+    def test_textfile(self):
+        """ Metrics are written to the text file.
+        """
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'weatherapp.prom')
+        self.metrics.inc('http_requests', host='accuweather.com')
+        prometheus.write_textfile(self.metrics, path)
+
+        with open(path) as metrics_file:
+            self.assertEqual(metrics_file.read(),
+                             prometheus.render(self.metrics))
+        self.assertEqual(os.listdir(directory), ['weatherapp.prom'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,690 @@
+import io
+import os
+import sys
+import time
+import socket
+import subprocess
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+
+from weatherapp.core.abstract import WeatherProvider, Field
+from weatherapp.core.metrics import Metrics
+from weatherapp.core.parsermanager import ParserManager
+from weatherapp.core.parsepool import ParsePool
+from weatherapp.core.cache import (MemoryCache, FileCache, SingleFlight,
+                                   Revalidator)
+
+
+class FakeResponse:
+    """ Minimal stand-in for requests.Response.
+    """
+
+    def __init__(self, status_code=200, content=b'', headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+        self.url = 'http://example.com/'
+        self.read = 0
+
+    def iter_content(self, chunk_size=1):
+        for start in range(0, len(self.content), chunk_size):
+            self.read += 1
+            yield self.content[start:start + chunk_size]
+
+    def close(self):
+        pass
+
+
+class FakeSessionManager:
+    """ Session manager returning prepared responses and recording
+        request headers.
+    """
+
+    def __init__(self, *responses, pages=None, delay=0):
+        self.responses = list(responses)
+        self.pages = pages or {}
+        self.delay = delay
+        self.requests = []
+        self.urls = []
+
+    def get(self, url, headers=None, **kwargs):
+        self.requests.append(headers or {})
+        self.urls.append(url)
+        time.sleep(self.delay)
+        if url in self.pages:
+            return FakeResponse(content=self.pages[url])
+        return self.responses.pop(0)
+
+
+class DummyProvider(WeatherProvider):
+    """ Provider with a temporary configuration file.
+    """
+
+    cache_dir = None
+    config_file = Path(os.devnull)
+    title = 'Dummy'
+
+    def get_name(self):
+        return 'dummy'
+
+    def get_default_location(self):
+        return 'Kyiv'
+
+    def get_default_url(self):
+        return 'http://example.com/kyiv'
+
+    def configurate(self):
+        pass
+
+    def get_weather_info(self, page):
+        return {'temp': page}
+
+    def get_configuration_file(self):
+        return self.config_file
+
+
+def make_app(*responses, pages=None, **options):
+    """ Create application stub with fake session manager.
+    """
+
+    defaults = {'refresh': False, 'debug': False, 'workers': 4}
+    defaults.update(options)
+    return SimpleNamespace(options=SimpleNamespace(**defaults),
+                           stdout=io.StringIO(),
+                           memorycache=MemoryCache(),
+                           cache=FileCache(DummyProvider.cache_dir),
+                           singleflight=SingleFlight(
+                               DummyProvider.cache_dir / 'locks'),
+                           revalidator=Revalidator(),
+                           parsermanager=ParserManager(),
+                           parsepool=ParsePool(),
+                           metrics=Metrics(),
+                           sessionmanager=FakeSessionManager(*responses,
+                                                             pages=pages))
+
+
+class ProviderCacheTestCase(unittest.TestCase):
+
+    """ Unit test case for provider page cache.
+    """
+
+    def setUp(self):
+        DummyProvider.cache_dir = Path(tempfile.mkdtemp())
+        self.url = DummyProvider.get_default_url(None)
+
+    def tearDown(self):
+        shutil.rmtree(DummyProvider.cache_dir)
+
+    def expire(self, provider):
+        """ Make cached page older than the cache time.
+        """
+
+        path = provider.app.cache.directory / provider.get_url_hash(self.url)
+        old = time.time() - 10 * 3600
+        os.utime(path, (old, old))
+        provider.app.memorycache.delete(provider.get_url_hash(self.url))
+
+    def test_validators_saved(self):
+        """ Response validators are stored next to the page.
+        """
+
+        app = make_app(FakeResponse(content=b'page', headers={
+            'ETag': '"v1"', 'Last-Modified': 'Mon, 01 Jan 2024 00:00:00 GMT',
+            'Cache-Control': 'public, max-age=600'}))
+        provider = DummyProvider(app)
+
+        self.assertEqual(provider.get_page_source(self.url), 'page')
+        self.assertEqual(provider.get_cache_validators(self.url), {
+            'etag': '"v1"', 'last_modified': 'Mon, 01 Jan 2024 00:00:00 GMT',
+            'max_age': 600, 'digest': provider.get_digest(b'page')})
+
+    def test_not_modified(self):
+        """ Expired entry is revalidated and 304 reuses the cached page.
+        """
+
+        app = make_app(FakeResponse(content=b'page', headers={'ETag': '"v1"'}),
+                       FakeResponse(status_code=304))
+        provider = DummyProvider(app)
+        provider.get_page_source(self.url)
+        self.expire(provider)
+        self.assertEqual(provider.get_cache(self.url), b'')
+
+        self.assertEqual(provider.get_page_source(self.url), 'page')
+        self.assertEqual(app.sessionmanager.requests[1],
+                         {'If-None-Match': '"v1"'})
+        self.assertEqual(provider.get_cache(self.url), b'page')
+
+    def test_not_modified_removed(self):
+        """ Page removed while it was revalidated is fetched again.
+        """
+
+        app = make_app(FakeResponse(content=b'page', headers={'ETag': '"v1"'}),
+                       FakeResponse(status_code=304),
+                       FakeResponse(content=b'new', headers={'ETag': '"v2"'}))
+        provider = DummyProvider(app)
+        provider.get_page_source(self.url)
+        self.expire(provider)
+        headers = provider.get_conditional_headers(self.url)
+        app.cache.clear()
+        provider.get_conditional_headers = lambda url: headers
+
+        self.assertEqual(provider.get_page_source(self.url), 'new')
+        self.assertEqual(app.sessionmanager.requests[1:],
+                         [{'If-None-Match': '"v1"'}, {}])
+        self.assertEqual(provider.read_cache(self.url), b'new')
+
+    def test_modified(self):
+        """ Changed page replaces the expired entry.
+        """
+
+        app = make_app(FakeResponse(content=b'old', headers={'ETag': '"v1"'}),
+                       FakeResponse(content=b'new', headers={'ETag': '"v2"'}))
+        provider = DummyProvider(app)
+        provider.get_page_source(self.url)
+        self.expire(provider)
+
+        self.assertEqual(provider.get_page_source(self.url), 'new')
+        self.assertEqual(provider.get_cache_validators(self.url),
+                         {'etag': '"v2"',
+                          'digest': provider.get_digest(b'new')})
+
+    def test_memory_tier(self):
+        """ Repeated lookups are served from memory without disk access.
+        """
+
+        app = make_app(FakeResponse(content=b'page'))
+        provider = DummyProvider(app)
+        provider.get_page_source(self.url)
+        shutil.rmtree(DummyProvider.cache_dir)
+        DummyProvider.cache_dir.mkdir()
+
+        self.assertEqual(provider.get_page_source(self.url), 'page')
+        self.assertEqual(app.memorycache.stats()['hits'], 1)
+
+    def test_memory_tier_from_disk(self):
+        """ Page read from disk is kept in memory for next lookups.
+        """
+
+        provider = DummyProvider(make_app(FakeResponse(content=b'page')))
+        provider.get_page_source(self.url)
+
+        other = DummyProvider(make_app())
+        self.assertEqual(other.get_cache(self.url), b'page')
+        self.assertIn(other.get_url_hash(self.url), other.app.memorycache)
+
+    def test_single_flight(self):
+        """ Concurrent callers of one url cause one upstream request.
+        """
+
+        app = make_app(pages={self.url: b'page'})
+        app.sessionmanager.delay = 0.1
+        provider = DummyProvider(app)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            pages = list(executor.map(provider.get_page_source,
+                                      [self.url] * 8))
+
+        self.assertEqual(pages, ['page'] * 8)
+        self.assertEqual(app.sessionmanager.urls, [self.url])
+
+    @unittest.skipIf(sys.platform == 'win32', 'no advisory file locks')
+    def test_single_flight_processes(self):
+        """ Callers in other processes wait for the fetch in progress.
+        """
+
+        app = make_app(pages={self.url: b'page'})
+        lock_file = DummyProvider.cache_dir / 'locks' / (
+            DummyProvider.get_url_hash(self.url) + '.lock')
+        lock_file.parent.mkdir()
+        holder = subprocess.Popen([
+            sys.executable, '-c',
+            'import fcntl, sys, time; '
+            'f = open(sys.argv[1], "a"); fcntl.flock(f, fcntl.LOCK_EX); '
+            'print(flush=True); time.sleep(0.3)', str(lock_file)],
+            stdout=subprocess.PIPE)
+        holder.stdout.readline()
+
+        start = time.monotonic()
+        DummyProvider(app).get_page_source(self.url)
+        holder.wait()
+        self.assertGreater(time.monotonic() - start, 0.1)
+
+
+class ProviderObservationTestCase(unittest.TestCase):
+
+    """ Unit test case for observations of the provider.
+    """
+
+    def setUp(self):
+        DummyProvider.cache_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(DummyProvider.cache_dir)
+
+    def test_observe_locations(self):
+        """ Weather information is adapted to observations.
+        """
+
+        provider = DummyProvider(make_app(pages={
+            'http://example.com/kyiv': b'+12',
+            'http://example.com/lviv': b''}))
+        provider.locations.append(('Lviv', 'http://example.com/lviv'))
+
+        (kyiv, observation), (lviv, missing) = \
+            provider.observe_locations([])
+        self.assertEqual((kyiv, observation.temp), ('Kyiv', 12.0))
+        self.assertEqual(dict(observation), {'temp': '12°C'})
+        self.assertEqual(lviv, 'Lviv')
+        self.assertIsNone(missing)
+
+
+class CountingProvider(DummyProvider):
+    """ Provider counting parsed pages.
+    """
+
+    parsed = 0
+
+    def get_weather_info(self, page):
+        CountingProvider.parsed += 1
+        return super().get_weather_info(page)
+
+
+class ProviderParsedCacheTestCase(unittest.TestCase):
+
+    """ Unit test case for cache of parsed weather information.
+    """
+
+    def setUp(self):
+        DummyProvider.cache_dir = Path(tempfile.mkdtemp())
+        CountingProvider.parsed = 0
+        self.url = DummyProvider.get_default_url(None)
+
+    def tearDown(self):
+        shutil.rmtree(DummyProvider.cache_dir)
+        CountingProvider.version = DummyProvider.version
+
+    def test_cached_page(self):
+        """ Cached page is parsed once, also by other processes.
+        """
+
+        provider = CountingProvider(make_app(FakeResponse(content=b'page')))
+        self.assertEqual(provider.run([]), {'temp': 'page'})
+        self.assertEqual(provider.run([]), {'temp': 'page'})
+
+        # new process: empty memory cache, same cache directory
+        provider = CountingProvider(make_app())
+        self.assertEqual(provider.run([]), {'temp': 'page'})
+        self.assertEqual(CountingProvider.parsed, 1)
+        digest, fetched = provider.get_page_info(provider.url)
+        self.assertEqual(digest, provider.get_digest(b'page'))
+        self.assertLessEqual(fetched, time.time())
+
+    def test_parse_options(self):
+        """ Result depends on parse options and provider version.
+        """
+
+        app = make_app(FakeResponse(content=b'page'))
+        CountingProvider(app).run([])
+        app.options.regexp = True
+        CountingProvider(app).run([])
+        CountingProvider.version = '2'
+        CountingProvider(app).run([])
+
+        self.assertEqual(CountingProvider.parsed, 3)
+
+    def test_refetched_page(self):
+        """ Refetched page with the same content is not parsed again.
+        """
+
+        app = make_app(FakeResponse(content=b'page'),
+                       FakeResponse(content=b'page'),
+                       FakeResponse(content=b'new'))
+        provider = CountingProvider(app)
+        provider.run([])
+        app.options.refresh = True
+
+        self.assertEqual(provider.run([]), {'temp': 'page'})
+        self.assertEqual(CountingProvider.parsed, 1)
+        self.assertEqual(provider.run([]), {'temp': 'new'})
+        self.assertEqual(CountingProvider.parsed, 2)
+
+
+class ProviderStaleCacheTestCase(unittest.TestCase):
+
+    """ Unit test case for serving expired pages.
+    """
+
+    def setUp(self):
+        DummyProvider.cache_dir = Path(tempfile.mkdtemp())
+        self.url = DummyProvider.get_default_url(None)
+
+    def tearDown(self):
+        shutil.rmtree(DummyProvider.cache_dir)
+
+    def age(self, provider, seconds):
+        """ Make cached page the given number of seconds old.
+        """
+
+        path = provider.app.cache.directory / provider.get_url_hash(self.url)
+        old = time.time() - seconds
+        os.utime(path, (old, old))
+        provider.app.memorycache.clear()
+
+    def test_hanging_site(self):
+        """ Stale pages are shown when the site does not answer in time.
+        """
+
+        from weatherapp.core.app import App
+
+        hanging = socket.socket()
+        hanging.bind(('127.0.0.1', 0))
+        # connections are accepted by the kernel and never answered
+        hanging.listen(8)
+        self.addCleanup(hanging.close)
+        url = 'http://127.0.0.1:{}/'.format(hanging.getsockname()[1])
+
+        class HangingProvider(DummyProvider):
+            def get_default_url(self):
+                return url
+
+        app = App(stdout=io.StringIO())
+        app.options = app.arg_parser.parse_args(
+            ['-f', '--workers', '2', '--deadline', '0.5'])
+        app.cache = FileCache(DummyProvider.cache_dir)
+        app.singleflight = SingleFlight(DummyProvider.cache_dir / 'locks')
+        app.sessionmanager.timeout = 3
+        providers = [HangingProvider(app), HangingProvider(app)]
+        providers[0].save_cache(url, b'old')
+        self.url = url
+        self.age(providers[0], 2 * 3600)
+
+        for provider, results in app.run_concurrently(providers, []):
+            app.output_locations(provider.title, results)
+
+        output = app.stdout.getvalue()
+        self.assertEqual(output.count('temp: old'), 2)
+        self.assertEqual(output.count('age: 2.0 h'), 2)
+
+    def test_stale_while_revalidate(self):
+        """ Recently expired page is served at once and refreshed
+            in background.
+        """
+
+        app = make_app(FakeResponse(content=b'old'),
+                       FakeResponse(content=b'new'))
+        provider = DummyProvider(app)
+        provider.run([])
+        self.age(provider, 360)
+
+        self.assertEqual(provider.run([]), {'temp': 'old', 'age': '6 min'})
+        app.revalidator.shutdown()
+        self.assertEqual(provider.run([]), {'temp': 'new'})
+        self.assertEqual(len(app.sessionmanager.urls), 2)
+
+    def test_background_fetch_metrics(self):
+        """ Fetches of the background refresh are timed and counted.
+        """
+
+        app = make_app(FakeResponse(content=b'old'),
+                       FakeResponse(status_code=503))
+        provider = DummyProvider(app)
+        provider.run([])
+        self.age(provider, 360)
+
+        provider.run([])
+        app.revalidator.shutdown()
+        self.assertEqual(app.metrics.get('fetch_errors'), 1)
+        self.assertEqual(app.metrics.timings()[('fetch',)]['calls'], 2)
+
+    def test_fallback_to_stale(self):
+        """ Old page is served when the site is not available.
+        """
+
+        import requests
+
+        class FailingSessionManager(FakeSessionManager):
+            def get(self, url, headers=None, **kwargs):
+                raise requests.ConnectionError('down')
+
+        app = make_app(FakeResponse(content=b'old'))
+        provider = DummyProvider(app)
+        provider.run([])
+        self.age(provider, 2 * 3600)
+        app.sessionmanager = FailingSessionManager()
+
+        self.assertEqual(provider.run([]), {'temp': 'old', 'age': '2.0 h'})
+        app.options.max_stale = 60
+        with self.assertLogs(WeatherProvider.logger, 'ERROR') as logs:
+            self.assertEqual(provider.run([]), {})
+        self.assertIn('Connection Error', app.stdout.getvalue())
+        # errors of one host are limited to one record per interval
+        self.assertEqual([record.repeat_key for record in logs.records],
+                         [('dummy', 'example.com', 'ConnectionError')])
+
+    def test_error_status_not_cached(self):
+        """ Error page of the site does not replace the cached page.
+        """
+
+        app = make_app(FakeResponse(content=b'old'),
+                       FakeResponse(status_code=503, content=b'busy'))
+        provider = DummyProvider(app)
+        provider.run([])
+        self.age(provider, 2 * 3600)
+
+        self.assertEqual(provider.run([]), {'temp': 'old', 'age': '2.0 h'})
+        self.assertEqual(provider.read_cache(self.url), b'old')
+        self.assertEqual(app.metrics.get('fetch_errors'), 1)
+
+
+class FieldsProvider(DummyProvider):
+    """ Provider extracting fields with parser backend.
+    """
+
+    fields = {'temp': Field('span', {'class': 'temp'})}
+
+    def get_weather_info(self, page):
+        return self.parse_fields(page)
+
+
+class ProviderParserTestCase(unittest.TestCase):
+
+    """ Unit test case for parser backend selection.
+    """
+
+    def setUp(self):
+        DummyProvider.cache_dir = Path(tempfile.mkdtemp())
+        DummyProvider.config_file = DummyProvider.cache_dir / 'test.ini'
+
+    def tearDown(self):
+        shutil.rmtree(DummyProvider.cache_dir)
+        DummyProvider.config_file = Path(os.devnull)
+
+    def test_selection(self):
+        """ Backend is chosen by --parser, --regexp, then configuration.
+        """
+
+        DummyProvider.config_file.write_text(
+            '[dummy]\nname = Kyiv\nurl = http://example.com/kyiv\n'
+            'parser = lxml\n')
+        app = make_app()
+        provider = FieldsProvider(app)
+        self.assertEqual(provider.get_parser_name(), 'lxml')
+        app.options.regexp = True
+        self.assertEqual(provider.get_parser_name(), 'regex')
+        app.options.parser = 'html.parser'
+        self.assertEqual(provider.get_parser_name(), 'html.parser')
+
+    def test_parse_fields(self):
+        """ Fields are extracted with the selected backend, unknown
+            backend falls back to the default one.
+        """
+
+        page = b'<p><span class="temp">+5</span></p>'
+        for name in ('regex', 'html.parser', 'unknown'):
+            app = make_app(FakeResponse(content=page), parser=name)
+            self.assertEqual(FieldsProvider(app).run([]), {'temp': '+5'})
+
+
+class ProviderStreamTestCase(unittest.TestCase):
+
+    """ Unit test case for parsing pages while they are downloaded.
+    """
+
+    def setUp(self):
+        DummyProvider.cache_dir = Path(tempfile.mkdtemp())
+        self.page = ('<p><span class="temp">+5</span></p>' +
+                     '<p>ба</p>' * 50000).encode('utf-8')
+
+    def tearDown(self):
+        shutil.rmtree(DummyProvider.cache_dir)
+        FieldsProvider.version = DummyProvider.version
+
+    def test_stream(self):
+        """ Reading stops once all fields are found, the prefix is
+            cached and parsed again.
+        """
+
+        response = FakeResponse(content=self.page)
+        app = make_app(response, stream=True)
+        provider = FieldsProvider(app)
+
+        self.assertEqual(provider.run([]), {'temp': '+5'})
+        self.assertEqual(response.read, 1)
+        page = provider.read_cache(provider.url)
+        self.assertLess(len(page), len(self.page))
+        self.assertTrue(self.page.startswith(page))
+
+        provider = FieldsProvider(make_app(parser='regex'))
+        self.assertEqual(provider.run([]), {'temp': '+5'})
+
+    def test_partial_page_version(self):
+        """ Partial page cached by other provider version is fetched
+            again.
+        """
+
+        app = make_app(FakeResponse(content=self.page),
+                       FakeResponse(content=self.page), stream=True)
+        FieldsProvider(app).run([])
+        FieldsProvider.version = '2'
+        app.memorycache.clear()
+
+        self.assertEqual(FieldsProvider(app).run([]), {'temp': '+5'})
+        self.assertEqual(len(app.sessionmanager.urls), 2)
+
+
+class ProviderLocationsTestCase(unittest.TestCase):
+
+    """ Unit test case for multi-location provider runs.
+    """
+
+    def setUp(self):
+        DummyProvider.cache_dir = Path(tempfile.mkdtemp())
+        DummyProvider.config_file = DummyProvider.cache_dir / 'test.ini'
+        DummyProvider.config_file.write_text(
+            '[dummy]\nname = Kyiv\nurl = http://example.com/kyiv\n'
+            '[dummy:locations]\n'
+            'Lviv = http://example.com/lviv\n'
+            'Kiev = http://example.com/kyiv\n')
+
+    def tearDown(self):
+        shutil.rmtree(DummyProvider.cache_dir)
+        DummyProvider.config_file = Path(os.devnull)
+
+    def test_locations(self):
+        """ Additional locations are read from the configuration file.
+        """
+
+        provider = DummyProvider(make_app())
+        self.assertEqual(provider.locations, [
+            ('Kyiv', 'http://example.com/kyiv'),
+            ('Lviv', 'http://example.com/lviv'),
+            ('Kiev', 'http://example.com/kyiv')])
+
+    def test_run_locations(self):
+        """ Every unique url is fetched once, results keep location order.
+        """
+
+        app = make_app(pages={'http://example.com/kyiv': b'kyiv',
+                              'http://example.com/lviv': b'lviv'})
+        provider = DummyProvider(app)
+
+        self.assertEqual(provider.run_locations([]), [
+            ('Kyiv', {'temp': 'kyiv'}),
+            ('Lviv', {'temp': 'lviv'}),
+            ('Kiev', {'temp': 'kyiv'})])
+        self.assertEqual(sorted(app.sessionmanager.urls),
+                         ['http://example.com/kyiv',
+                          'http://example.com/lviv'])
+
+
+class ProcessProvider(DummyProvider):
+    """ Provider reporting the process which parsed the page.
+    """
+
+    def get_weather_info(self, page):
+        return {'temp': page, 'pid': os.getpid()}
+
+
+class ProviderProcessesTestCase(unittest.TestCase):
+
+    """ Unit test case for parsing pages in worker processes.
+    """
+
+    def setUp(self):
+        DummyProvider.cache_dir = Path(tempfile.mkdtemp())
+        self.locations = [(str(index), 'http://example.com/{}'.format(index))
+                          for index in range(6)]
+        self.app = make_app(pages={url: url.encode()
+                                   for name, url in self.locations})
+        self.app.parsepool = ParsePool(processes=2, chunk_size=2)
+
+    def tearDown(self):
+        self.app.parsepool.shutdown()
+        shutil.rmtree(DummyProvider.cache_dir)
+
+    def test_chunks(self):
+        """ Pages are split so that every worker gets a chunk.
+        """
+
+        pool = ParsePool(processes=4, chunk_size=8)
+        self.assertEqual(pool.get_chunks(list(range(10))),
+                         [[0, 1, 2], [3, 4, 5], [6, 7, 8], [9]])
+        self.assertEqual(len(pool.get_chunks(list(range(100)))), 13)
+        self.assertFalse(pool.is_enabled(1))
+        self.assertFalse(ParsePool(processes=1).is_enabled(100))
+
+    def test_run_locations(self):
+        """ Pages are parsed in workers, parse results are cached.
+        """
+
+        provider = ProcessProvider(self.app)
+        results = provider.run_locations([], self.locations)
+
+        self.assertEqual([(name, weather_info['temp'])
+                          for name, weather_info in results],
+                         [(name, url) for name, url in self.locations])
+        self.assertNotIn(os.getpid(), {weather_info['pid']
+                                       for name, weather_info in results})
+        self.assertEqual(provider.run_locations([], self.locations), results)
+        self.assertEqual(len(self.app.sessionmanager.urls), 6)
+
+    def test_fallback(self):
+        """ Provider which can not be sent to workers parses in process.
+        """
+
+        class LocalProvider(DummyProvider):
+            def get_weather_info(self, page):
+                return {'temp': page}
+
+        results = LocalProvider(self.app).run_locations([], self.locations)
+
+        self.assertEqual([weather_info for name, weather_info in results],
+                         [{'temp': url} for name, url in self.locations])
+        self.assertEqual(self.app.parsepool.failed, 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
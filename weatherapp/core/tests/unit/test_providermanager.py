@@ -1,5 +1,8 @@
 import unittest
+from importlib import metadata
+from collections import OrderedDict
 
+from weatherapp.core import config
 from weatherapp.core.providermanager import ProviderManager
 
 
@@ -41,6 +44,20 @@ class ProviderManagerTestCase(unittest.TestCase):
         self.assertTrue('provider' in self.provider_manager)
         self.assertFalse('bar' in self.provider_manager)
 
+    def test_lazy_load(self):
+        """ Provider is imported only when it is first used.
+        """
+
+        entry_point = metadata.EntryPoint(
+            name='lazy', group=config.PROVIDER_EP_NAMESPACE,
+            value='collections:OrderedDict')
+        self.provider_manager._commands['lazy'] = entry_point
+
+        self.assertIn('lazy', self.provider_manager.names())
+        self.assertIs(self.provider_manager._commands['lazy'], entry_point)
+        self.assertIs(self.provider_manager.get('lazy'), OrderedDict)
+        self.assertIs(self.provider_manager._commands['lazy'], OrderedDict)
+
 
 if __name__ == '__main__':
     unittest.main()
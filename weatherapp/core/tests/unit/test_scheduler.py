@@ -0,0 +1,115 @@
+import time
+import threading
+import unittest
+from types import SimpleNamespace
+
+from weatherapp.core.scheduler import PrefetchScheduler
+
+
+class CountingProvider:
+    """ Provider stub counting page fetches and concurrent fetches.
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl
+        self.fetched = []
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def get_cache_ttl(self, url):
+        return self.ttl
+
+    def fetch_page(self, url):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(0.05)
+        with self.lock:
+            self.running -= 1
+            self.fetched.append(url)
+            # refreshed page stays fresh for a while
+            self.ttl = 300
+        return b''
+
+
+class PrefetchSchedulerTestCase(unittest.TestCase):
+
+    """ Unit test case for background prefetch scheduler.
+    """
+
+    def wait_for(self, condition, timeout=2):
+        deadline = time.monotonic() + timeout
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def test_track_providers(self):
+        """ Every configured location is tracked, shared urls once.
+        """
+
+        provider = CountingProvider(ttl=300)
+        provider.locations = [('Kyiv', 'http://example.com/kyiv'),
+                              ('Lviv', 'http://example.com/lviv'),
+                              ('Kiev', 'http://example.com/kyiv')]
+        app = SimpleNamespace(
+            providermanager=SimpleNamespace(names=lambda: ['dummy']),
+            get_provider=lambda name: provider)
+        scheduler = PrefetchScheduler(app, jitter=0)
+        scheduler.track_providers()
+
+        self.assertEqual(scheduler.stats()['tracked'], 2)
+        self.assertEqual(sorted(scheduler._tracked),
+                         ['http://example.com/kyiv',
+                          'http://example.com/lviv'])
+
+    def test_refresh_before_expiry(self):
+        """ Uncached url is refreshed at once and then rescheduled.
+        """
+
+        provider = CountingProvider()
+        scheduler = PrefetchScheduler(None, lead_time=0, jitter=0)
+        scheduler.track(provider, 'http://example.com/a')
+        scheduler.start()
+        try:
+            self.wait_for(lambda: scheduler.stats()['refreshed'] == 1)
+        finally:
+            scheduler.stop()
+
+        self.assertEqual(provider.fetched, ['http://example.com/a'])
+        self.assertEqual(scheduler.stats()['tracked'], 1)
+        self.assertEqual(scheduler.stats()['queue_depth'], 0)
+
+    def test_fresh_page_waits(self):
+        """ Page which stays fresh is not refreshed yet.
+        """
+
+        provider = CountingProvider(ttl=300)
+        scheduler = PrefetchScheduler(None, lead_time=30, jitter=0)
+        scheduler.track(provider, 'http://example.com/a')
+        scheduler.start()
+        time.sleep(0.1)
+        scheduler.stop()
+
+        self.assertEqual(provider.fetched, [])
+
+    def test_concurrency_cap(self):
+        """ No more than 'workers' refreshes run at the same time.
+        """
+
+        provider = CountingProvider()
+        scheduler = PrefetchScheduler(None, workers=2, lead_time=0, jitter=0)
+        for index in range(6):
+            scheduler.track(provider, 'http://example.com/{}'.format(index))
+        self.assertEqual(scheduler.stats()['queue_depth'], 6)
+        scheduler.start()
+        try:
+            self.wait_for(lambda: scheduler.stats()['refreshed'] == 6)
+        finally:
+            scheduler.stop()
+
+        self.assertEqual(len(provider.fetched), 6)
+        self.assertLessEqual(provider.max_running, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
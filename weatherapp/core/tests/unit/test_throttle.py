@@ -0,0 +1,72 @@
+import time
+import unittest
+
+from weatherapp.core.throttle import TokenBucket, CircuitBreaker
+
+
+class TokenBucketTestCase(unittest.TestCase):
+
+    """ Unit test case for token bucket rate limiter.
+    """
+
+    def test_burst(self):
+        """ Burst of requests is not delayed, following ones are.
+        """
+
+        bucket = TokenBucket(rate=10, burst=3)
+        delays = [bucket.reserve() for _ in range(5)]
+
+        self.assertEqual(delays[:3], [0, 0, 0])
+        self.assertAlmostEqual(delays[3], 0.1, places=2)
+        self.assertAlmostEqual(delays[4], 0.2, places=2)
+
+    def test_no_limit(self):
+        """ Zero rate disables limiting.
+        """
+
+        bucket = TokenBucket(rate=0, burst=1)
+        self.assertEqual([bucket.reserve() for _ in range(3)], [0, 0, 0])
+
+
+class CircuitBreakerTestCase(unittest.TestCase):
+
+    """ Unit test case for circuit breaker.
+    """
+
+    def test_opens_after_failures(self):
+        """ Circuit opens after consecutive failures only.
+        """
+
+        breaker = CircuitBreaker(failures=2, reset_timeout=60)
+        breaker.failure()
+        breaker.success()
+        breaker.failure()
+        self.assertTrue(breaker.allow())
+        breaker.failure()
+
+        self.assertFalse(breaker.allow())
+        self.assertEqual(breaker.stats(), {'state': 'open', 'failures': 2,
+                                           'rejected': 1})
+
+    def test_half_open(self):
+        """ Single probe is let through once reset timeout passed.
+        """
+
+        breaker = CircuitBreaker(failures=1, reset_timeout=0.01)
+        breaker.failure()
+        time.sleep(0.02)
+
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.failure()
+        self.assertFalse(breaker.allow())
+
+        time.sleep(0.02)
+        self.assertTrue(breaker.allow())
+        breaker.success()
+        self.assertEqual(breaker.state, 'closed')
+        self.assertTrue(breaker.allow())
+
+
+if __name__ == '__main__':
+    unittest.main()
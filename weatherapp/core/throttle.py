@@ -0,0 +1,130 @@
+""" Rate limiting and circuit breaking of requests to one host.
+"""
+
+import time
+import threading
+
+from weatherapp.core import config
+
+
+class TokenBucket:
+    """ Token bucket rate limiter.
+
+    The bucket holds up to 'burst' tokens and is refilled with 'rate'
+    tokens per second; every request takes one token and waits for it
+    if the bucket is empty.
+
+    :param rate: tokens added per second, 0 disables limiting
+    :type rate: float
+    :param burst: bucket capacity
+    :type burst: int
+    """
+
+    def __init__(self, rate=config.HTTP_RATE_LIMIT,
+                 burst=config.HTTP_RATE_BURST):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.waited = 0.0
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """ Take a token and return number of seconds to wait for it.
+        """
+
+        if not self.rate:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens +
+                               (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self.waited += delay
+            return delay
+
+    def acquire(self):
+        """ Block until a token is available.
+        """
+
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+
+class CircuitBreaker:
+    """ Stops sending requests to a failing host.
+
+    After 'failures' consecutive failed requests the circuit opens and
+    requests are rejected without touching the network. Once
+    'reset_timeout' seconds passed, a single probe request is let through
+    (half-open state): its success closes the circuit, its failure opens
+    it again.
+
+    :param failures: consecutive failures which open the circuit
+    :type failures: int
+    :param reset_timeout: seconds the circuit stays open
+    :type reset_timeout: float
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failures=config.CIRCUIT_FAILURES,
+                 reset_timeout=config.CIRCUIT_RESET_TIMEOUT):
+        self.failures = failures
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failed = 0
+        self.rejected = 0
+        self._opened = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """ Return True if a request may be sent now.
+        """
+
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if (self.state == self.OPEN and
+                    time.monotonic() - self._opened >= self.reset_timeout):
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self.rejected += 1
+            return False
+
+    def success(self):
+        """ Record successful request.
+        """
+
+        with self._lock:
+            self.state = self.CLOSED
+            self.failed = 0
+            self._probing = False
+
+    def failure(self):
+        """ Record failed request.
+        """
+
+        with self._lock:
+            self.failed += 1
+            self._probing = False
+            if self.state == self.HALF_OPEN or self.failed >= self.failures:
+                self.state = self.OPEN
+                self._opened = time.monotonic()
+
+    def stats(self):
+        """ Return breaker state and counters.
+        """
+
+        with self._lock:
+            return {'state': self.state,
+                    'failures': self.failed,
+                    'rejected': self.rejected}